@@ -1,127 +1,239 @@
-# SIMULATION BUILD SCRIPT 
-
-# this script opens the specified .v file from the src folder, opens the file, and all of its dependencies, copying all fo them into a new .v file 
-# with addition comments about the most recent build version. 
-
-import sys
-import os
-import datetime
-
-def getIncludeFile(cmd_args):
-    
-    filenames = []
-
-    for arg in cmd_args:
-        
-        if ".v" in arg:
-            print(f"BUILD: adding {arg} to build.")
-            filenames.append(arg)
-            break
-
-    return filenames
-
-def getOutputFile(cmd_args):
-    
-    outputfile = ""
-    argIsOutputFile = False
-
-    for arg in cmd_args:
-       
-        if (arg == "-O" or arg == "-o"):
-            argIsOutputFile = True
-            continue
-
-        if argIsOutputFile:
-            print(f"BUILD: outputting to {arg}.")
-            outputfile = arg
-            break
-        
-        outputfile =  "vga_playground.v" # if no filename is specified
-
-    outputfile.strip()
-    
-    if ".v" not in outputfile:  # ensure filename ends in .v
-        outputfile = outputfile + ".v" 
-
-    return outputfile
-
-def getTopModule(cmd_args):
-    
-    top_module = ""
-    
-    argIsTopModule = False
-
-    for arg in cmd_args:
-        if (arg == "-Top" or  arg == "-top" or arg == "-T" or arg == "-t"):
-            argIsTopModule = True
-            continue
-
-        elif (argIsTopModule == True ):
-            print(f"BUILD: adding {arg} to build.")
-            top_module = arg
-            break
-
-    print(f"top module is {top_module}")
-    return top_module
-
-if __name__ == "__main__":
-    
-    current_time = datetime.datetime.now()
-    
-    filenames = getIncludeFile(sys.argv)
-    top = getTopModule(sys.argv)
-    outputfile_name = getOutputFile(sys.argv)
-    outputfile = open(outputfile_name, "w") 
-
-    print(f"BUILD: building to '{outputfile_name}' .")
-
-    for file in filenames:
-        
-        file_index = filenames.index(file)
-        filename = str(filenames[file_index])
-        file_exists = os.path.exists(filename)
-        
-        if file_exists:
-
-            print(f"INFO: building from {filename}.")
-            buildfile = open(filename,"r")
-            
-            
-            if file_index != 0: # separate files with border
-                outputfile.write("\n//================================================\n")   
-
-            for line in buildfile:
-
-                if file_index == 0:
-                    if  "=== BUILD DEPENDENCIES" in line: #add metadata
-                        outputfile.write(f"// BUILD TIME: {current_time} \n") 
-                        continue
-
-                    if top in line:
-                        line = line.replace(top, "tt_um_vga_example")  
-                        print("INFO: Renamed Top module.")
-
-
-                if "`include" in line:
-                    includefile = line.strip()
-                    includefile = includefile.removeprefix("// ")
-                    includefile = includefile.strip()
-                    includefile = includefile.removeprefix("`include")
-                    includefile = includefile.strip()
-                    includefile = includefile.replace('"', "")
-                    includefile = "src/" + includefile
-                    filenames.append(includefile)
-                    print(f"INFO: Found dependency: '{includefile}'.")
-                    continue 
-
-                if "===" in line:
-                    continue
-            
-                outputfile.write(line)   
-            
-            print(f"INFO: {filename} - Build complete.")
-
-        else:
-            print(f"ERROR: '{filename}' does not exist.")
-    
-    print("BUILD: Build Complete!")
+# SIMULATION BUILD SCRIPT
+
+# this script opens the specified .v file from the src folder, resolves all of its `include dependencies (including the
+# commented-out build dependency lists) into a graph, and concatenates every file once, in dependency order, into a new .v file
+# with additional comments about the most recent build version.
+# the output records a hash of all of its inputs, so re-running with unchanged sources skips the rebuild entirely.
+#
+# usage: python buildsim.py src/tt_um_Enjimneering_TTS.v -t <top module> -o <output.v> [-f] [-watch [seconds]]
+
+import sys
+import os
+import re
+import time
+import hashlib
+import datetime
+
+PLAYGROUND_TOP = "tt_um_vga_example"  # the top module name the VGA playground expects
+FILE_SEPARATOR = "\n//================================================\n"
+
+INCLUDE_PATTERN = re.compile(r'^\s*(?://\s*)?`include\s+"?([^"\s]+)"?')  # `include "x.v" or // `include x.v
+MARKER_PATTERN = re.compile(r"^\s*//.*===")                              # === SIMULATION BUILD DEPENDENCIES === etc.
+HASH_PATTERN = re.compile(r"^// BUILD HASH: ([0-9a-f]+)")
+
+
+class BuildError(Exception):
+    pass
+
+
+def getIncludeFile(cmd_args):
+
+    outputfile = getOutputFile(cmd_args)
+
+    for arg in cmd_args[1:]:
+        if arg.endswith(".v") and arg != outputfile:
+            print(f"BUILD: adding {arg} to build.")
+            return arg
+
+    return ""
+
+def getOutputFile(cmd_args):
+
+    argIsOutputFile = False
+
+    for arg in cmd_args:
+
+        if (arg == "-O" or arg == "-o"):
+            argIsOutputFile = True
+            continue
+
+        if argIsOutputFile:
+            outputfile = arg.strip()
+            if not outputfile.endswith(".v"):  # ensure filename ends in .v
+                outputfile = outputfile + ".v"
+            return outputfile
+
+    return "vga_playground.v"  # if no filename is specified
+
+def getTopModule(cmd_args):
+
+    argIsTopModule = False
+
+    for arg in cmd_args:
+        if (arg == "-Top" or  arg == "-top" or arg == "-T" or arg == "-t"):
+            argIsTopModule = True
+            continue
+
+        elif (argIsTopModule == True ):
+            return arg
+
+    return ""
+
+def getWatchInterval(cmd_args):
+
+    if "-watch" not in cmd_args:
+        return None
+
+    index = cmd_args.index("-watch")
+    if index + 1 < len(cmd_args):
+        try:
+            return float(cmd_args[index + 1])
+        except ValueError:
+            pass
+    return 1.0
+
+
+def resolveInclude(name, including_file, root_dir):
+    """Includes are looked up next to the including file first, then next to the root file."""
+    for directory in (os.path.dirname(including_file), root_dir):
+        path = os.path.normpath(os.path.join(directory, name))
+        if os.path.isfile(path):
+            return path
+    return None
+
+def buildGraph(root):
+    """Read every file reachable from the root, returning ({file: text}, {file: [included files]})."""
+
+    sources = {}
+    includes = {}
+    missing = []
+    root_dir = os.path.dirname(root)
+    pending = [root]
+
+    while pending:
+        filename = pending.pop()
+        if filename in sources:
+            continue
+
+        with open(filename, "r") as buildfile:
+            sources[filename] = buildfile.read()
+
+        includes[filename] = []
+        for line in sources[filename].splitlines():
+            match = INCLUDE_PATTERN.match(line)
+            if not match:
+                continue
+            dependency = resolveInclude(match.group(1), filename, root_dir)
+            if dependency is None:
+                missing.append(f"'{match.group(1)}' (included from {filename})")
+                continue
+            if dependency not in includes[filename]:  # de-duplicate repeated includes
+                includes[filename].append(dependency)
+                pending.append(dependency)
+
+    if missing:
+        raise BuildError("missing dependencies:\n  " + "\n  ".join(missing))
+
+    return sources, includes
+
+def topologicalOrder(root, includes):
+    """Order the files so each one comes before the files it includes (the root first), each file once."""
+
+    order = []
+    state = {}  # file -> "visiting" | "done"
+
+    def visit(filename, chain):
+        if state.get(filename) == "done":
+            return
+        if state.get(filename) == "visiting":
+            cycle = chain[chain.index(filename):] + [filename]
+            raise BuildError("include cycle: " + " -> ".join(cycle))
+
+        state[filename] = "visiting"
+        for dependency in reversed(includes[filename]):  # reversed so siblings keep their listed order
+            visit(dependency, chain + [filename])
+        state[filename] = "done"
+        order.append(filename)
+
+    visit(root, [])
+    return order[::-1]
+
+def buildHash(order, sources, top):
+    digest = hashlib.sha256(top.encode())
+    for filename in order:
+        digest.update(b"\0" + filename.encode() + b"\0" + sources[filename].encode())
+    return digest.hexdigest()
+
+def existingHash(outputfile_name):
+    if not os.path.exists(outputfile_name):
+        return None
+    with open(outputfile_name, "r") as outputfile:
+        for _ in range(4):  # the hash is part of the short build header
+            match = HASH_PATTERN.match(outputfile.readline())
+            if match:
+                return match.group(1)
+    return None
+
+def renderFile(text, is_root, top):
+    """Strip the include and marker lines, and rename the top module in the root file."""
+
+    lines = []
+    for line in text.splitlines(keepends=True):
+        if INCLUDE_PATTERN.match(line) or MARKER_PATTERN.match(line):
+            continue
+        if is_root and top and top in line:
+            line = line.replace(top, PLAYGROUND_TOP)
+            print("INFO: Renamed Top module.")
+        lines.append(line)
+    return "".join(lines)
+
+def build(root, top, outputfile_name, force=False):
+    """Build the simulation file, returning False if it was already up to date."""
+
+    sources, includes = buildGraph(root)
+    order = topologicalOrder(root, includes)
+    build_hash = buildHash(order, sources, top)
+
+    if not force and existingHash(outputfile_name) == build_hash:
+        print(f"BUILD: '{outputfile_name}' is up to date.")
+        return False
+
+    header = f"// BUILD TIME: {datetime.datetime.now()} \n// BUILD HASH: {build_hash}\n"
+    body = FILE_SEPARATOR.join(renderFile(sources[filename], filename == root, top) for filename in order)
+    for filename in order:
+        print(f"INFO: {filename} - Build complete.")
+
+    output_dir = os.path.dirname(outputfile_name)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    tmp_name = f"{outputfile_name}.tmp"
+    with open(tmp_name, "w") as outputfile:  # single write, then swap in place
+        outputfile.write(header + body)
+    os.replace(tmp_name, outputfile_name)
+
+    print(f"BUILD: built {len(order)} files to '{outputfile_name}'.")
+    return True
+
+if __name__ == "__main__":
+
+    root = os.path.normpath(getIncludeFile(sys.argv))
+    top = getTopModule(sys.argv)
+    outputfile_name = getOutputFile(sys.argv)
+    force = "-f" in sys.argv
+    interval = getWatchInterval(sys.argv)
+
+    if not os.path.isfile(root):
+        print(f"ERROR: '{root}' does not exist.")
+        sys.exit(1)
+
+    print(f"top module is {top}")
+    print(f"BUILD: building to '{outputfile_name}' .")
+
+    while True:
+        try:
+            build(root, top, outputfile_name, force)
+        except BuildError as error:
+            print(f"ERROR: {error}")
+            if interval is None:
+                print("BUILD: Build Failed!")
+                sys.exit(1)
+
+        if interval is None:
+            break
+        force = False
+        try:
+            time.sleep(interval)  # watch mode: unchanged sources hash the same, so polling is cheap
+        except KeyboardInterrupt:
+            break
+
+    print("BUILD: Build Complete!")
@@ -1,85 +1,121 @@
-# UPDATE FILE METADATA SCRIPT
-# This script atuomatically updates the  last edited date and time of the file 
-
-import sys
-import os
-from time import strftime,localtime
-
-def getFileName(cmd_args):
-    
-    filename = ""
-
-    argcount = 0
-    
-    for arg in cmd_args: # the first argcount will always be the name of the script - can ignore this.
-        if argcount != 0:
-            if ".v" in arg:
-                print(f"INFO: adding {arg} to update queue.")
-                filename = arg
-                break
-            else:
-                print(arg + " is not a valid verilog filename.")
-        argcount = argcount + 1
-
-    return filename
-
-if __name__ == "__main__":
-    
-    current_time = strftime("%d/%m/%Y @ %H:%M:%S", localtime())
-    
-    filename = getFileName(sys.argv)
-    fileExists = os.path.exists(filename)
-
-    updateLine = ""
-    linecounter = 0
-
-    foundUpdateHeader = False
-    UpdateHeaders = ["Last Updated:","Last Edited:","Last Modified:", "Last Accessed:"]
-    
-    if fileExists:
-        
-        print(f"UPDATE: updating '{filename}' metadata.")
-        file = open(filename,"r")
-        
-        lines = file.readlines()
-
-        for line in lines:
-            
-            for header in UpdateHeaders:
-                    
-                if header in line:
-                    linestart = line.index(header[0])
-
-                    for i in range(0, linestart):
-                        updateLine = updateLine + line[i]
-                        
-                    updateLine = updateLine + header + " " + current_time + "\n"
-                    foundUpdateHeader = True
-                    break
-
-            if (foundUpdateHeader == False):
-                linecounter = linecounter + 1
-            
-            elif foundUpdateHeader:
-                print(f"INFO: Update Time found on Line {linecounter}.")
-                break
-
-            
-                  
-        file.close() 
-
-        if (foundUpdateHeader):
-            print(f"UPDATE: {filename}, last updated on {current_time}")
-            lines[linecounter] = updateLine
-            file = open(filename,"w")
-            file.writelines(lines)
-
-    else:
-        print("No verilog file updated.")
-        sys.exit(0)
-
-    print("Update Complete!")
-    sys.exit(0)
-    
-    # python3 updatefileinfo.py tt_um_enjimneering_top.v 
-    # :P
\ No newline at end of file
+# UPDATE FILE METADATA SCRIPT
+# This script atuomatically updates the  last edited date and time of the files given to it.
+# Only the header region of each file is read, files whose stamp is already newer than their last edit are skipped,
+# and a stamp of the same length is patched in place instead of rewriting the whole file.
+#
+# usage: python updatefileinfo.py <file.v> [file.v ...]
+#        python updatefileinfo.py --changed [<git revision>]   (the .v files changed since the revision, default HEAD)
+
+import sys
+import os
+import time
+import subprocess
+
+HEADER_BYTES = 4096  # the metadata block always sits at the top of the file
+UpdateHeaders = ["Last Updated:","Last Edited:","Last Modified:", "Last Accessed:"]
+STAMP_FORMAT = "%d/%m/%Y @ %H:%M:%S"
+OLD_STAMP_FORMATS = ("%H:%M %d/%m/%Y",)  # hand written stamps, e.g. "16:21 08/11/2025"
+STAMP_SLACK = 1  # stamps are truncated to the second, the write that follows is at most a second later
+
+def getFileNames(cmd_args):
+
+    filenames = []
+
+    for arg in cmd_args[1:]: # the first arg will always be the name of the script - can ignore this.
+        if arg.endswith(".v"):
+            filenames.append(arg)
+        else:
+            print(arg + " is not a valid verilog filename.")
+
+    return filenames
+
+def getChangedFiles(revision):
+    """The .v files that differ from the given git revision, including new untracked files."""
+
+    top = subprocess.run(["git", "rev-parse", "--show-toplevel"], capture_output=True, text=True, check=True).stdout.strip()
+    changed = subprocess.run(["git", "diff", "--name-only", "--diff-filter=d", revision, "--", "*.v"],
+                             capture_output=True, text=True, check=True, cwd=top).stdout.split()
+    untracked = subprocess.run(["git", "ls-files", "--others", "--exclude-standard", "--", "*.v"],
+                               capture_output=True, text=True, check=True, cwd=top).stdout.split()
+
+    return [os.path.relpath(os.path.join(top, name)) for name in sorted(set(changed + untracked))]
+
+def findStamp(head):
+    """Find the first metadata line in the header bytes, returning (offset, line, prefix, header, stamp text)."""
+
+    offset = 0
+    for line in head.splitlines(keepends=True):
+        if not line.endswith(b"\n"):  # the header region may end part way through a line
+            break
+        text = line.decode("utf-8", errors="replace")
+        for header in UpdateHeaders:
+            if header in text:
+                start = text.index(header)
+                return offset, line, text[:start], header, text[start + len(header):].strip()
+        offset += len(line)
+
+    return None
+
+def parseStamp(stamp):
+    for stamp_format in (STAMP_FORMAT,) + OLD_STAMP_FORMATS:
+        try:
+            return time.mktime(time.strptime(stamp, stamp_format))
+        except ValueError:
+            continue
+    return None
+
+def updateFile(filename, current_time):
+    """Stamp one file, returning what happened to it."""
+
+    with open(filename, "r+b") as file:
+
+        head = file.read(HEADER_BYTES)
+        found = findStamp(head)
+        if found is None:
+            return "no metadata header"
+
+        offset, line, prefix, header, stamp = found
+        stamp_time = parseStamp(stamp)
+        if stamp_time is not None and stamp_time >= os.fstat(file.fileno()).st_mtime - STAMP_SLACK:
+            return "already current"
+
+        line_ending = b"\r\n" if line.endswith(b"\r\n") else b"\n"
+        update_line = (prefix + header + " " + current_time).encode() + line_ending
+
+        if len(update_line) == len(line):
+            file.seek(offset)
+            file.write(update_line)  # same length: patch the stamp in place
+        else:
+            rest = head[offset + len(line):] + file.read()  # only the part after the stamp moves
+            file.seek(offset)
+            file.write(update_line + rest)
+            file.truncate()
+
+    return f"last updated on {current_time}"
+
+if __name__ == "__main__":
+
+    current_time = time.strftime(STAMP_FORMAT, time.localtime())
+
+    if "--changed" in sys.argv:
+        index = sys.argv.index("--changed")
+        revision = sys.argv[index + 1] if index + 1 < len(sys.argv) else "HEAD"
+        filenames = getChangedFiles(revision)
+    else:
+        filenames = getFileNames(sys.argv)
+
+    if not filenames:
+        print("No verilog file updated.")
+        sys.exit(0)
+
+    updated = 0
+    for filename in filenames:
+        if not os.path.exists(filename):
+            print(f"INFO: skipping '{filename}', it does not exist.")
+            continue
+        result = updateFile(filename, current_time)
+        updated += result.startswith("last updated")
+        print(f"UPDATE: {filename}, {result}")
+
+    print(f"Update Complete! ({updated} of {len(filenames)} files stamped)")
+    sys.exit(0)
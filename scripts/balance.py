@@ -0,0 +1,97 @@
+# GAMEPLAY BALANCE SCRIPT
+# Plays many games at once on the NumPy model of the game logic (test/lib/tts/game_model.py) with a random
+# player, for every combination of the Hearts tolerance and the attack cooldown given, and reports how the
+# games went: frames survived per game over, lives lost, sheep eaten and sword hits on the dragon.
+# The model steps all the games a frame at a time, so a million frames of gameplay take minutes where the
+# RTL simulation would take most of a year.
+#
+# usage: python3 balance.py [-games <n>] [-frames <n>] [-tolerance <n> ...] [-cooldown <cycles> ...]
+#                           [-gate] [-hold <frames>] [-seed <n>] [-pad nes|snes]
+
+import argparse
+import itertools
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT_DIR, "test", "lib"))
+
+from tts.game_model import BUTTON_BITS, GameModel, button_word  # noqa: E402
+
+# what the random player holds: nothing, one direction, A, or a direction with A
+MOVES = [0] + [button_word(name) for name in BUTTON_BITS] + [button_word(name, "A") for name in ("UP", "DOWN", "LEFT", "RIGHT")]
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Tiny Tapestation gameplay balance on the game model")
+    parser.add_argument("-games", type=int, default=1024, help="games played at once")
+    parser.add_argument("-frames", type=int, default=2000, help="frames each game is played for")
+    parser.add_argument("-tolerance", type=int, nargs="+", default=[1], help="Hearts PlayerTolerance values to try")
+    parser.add_argument("-cooldown", type=lambda text: int(text, 0), nargs="+", default=[0xFF],
+                        help="attack cooldowns in clock cycles to try (the top level uses 0xFF)")
+    parser.add_argument("-gate", action="store_true", help="only start attacks while attack_enable is set")
+    parser.add_argument("-hold", type=float, default=4.0, help="mean frames the random player holds its buttons")
+    parser.add_argument("-seed", type=int, default=0, help="seed for the player and the sheep")
+    parser.add_argument("-pad", choices=("nes", "snes"), default="nes")
+    args = parser.parse_args(argv)
+    if args.games < 1 or args.frames < 1:
+        parser.error("-games and -frames must be positive")
+    return args
+
+
+def play(args, tolerance, cooldown):
+    """Play args.games games for args.frames frames and return a dict of per-1000-frame rates."""
+    model = GameModel(args.games, tolerance=tolerance, attack_cooldown=cooldown, gate_attacks=args.gate,
+                      pad=args.pad, seed=args.seed)
+    rng = np.random.default_rng(args.seed)
+    moves = np.array(MOVES)
+    buttons = np.zeros(args.games, dtype=np.int64)
+    segments = 0
+
+    start = time.perf_counter()
+    for _ in range(args.frames):
+        change = rng.random(args.games) < 1 / args.hold
+        buttons = np.where(change, moves[rng.integers(0, len(moves), args.games)], buttons)
+        model.step(buttons)
+        segments += np.unpackbits(model.visible.astype(np.uint8)[:, None], axis=1).sum()
+    seconds = time.perf_counter() - start
+
+    frames = args.games * args.frames
+    per_k = 1000 / frames
+    return {
+        "tolerance": tolerance,
+        "cooldown": cooldown,
+        "frames_per_game_over": frames / model.game_overs.sum() if model.game_overs.sum() else float("inf"),
+        "lives_lost": model.hurts.sum() * per_k,
+        "sheep_eaten": model.sheep_eaten.sum() * per_k,
+        "dragon_hits": model.dragon_hits.sum() * per_k,
+        "segments": segments / frames,
+        "frames_per_s": frames / seconds,
+    }
+
+
+def print_summary(results):
+    print("")
+    print(f"{'TOLERANCE':>9}{'COOLDOWN':>12}{'FRAMES/GAME OVER':>18}{'LIVES LOST':>12}{'SHEEP EATEN':>13}"
+          f"{'DRAGON HITS':>13}{'SEGMENTS':>10}")
+    print("-" * 87)
+    for r in results:
+        print(f"{r['tolerance']:>9}{r['cooldown']:>12}{r['frames_per_game_over']:>18.0f}{r['lives_lost']:>12.2f}"
+              f"{r['sheep_eaten']:>13.2f}{r['dragon_hits']:>13.2f}{r['segments']:>10.2f}")
+    print("-" * 87)
+    print("(lives lost, sheep eaten and dragon hits are per 1000 frames; segments is the mean visible dragon length)")
+
+
+if __name__ == "__main__":
+
+    args = parse_args(sys.argv[1:])
+    results = []
+    for tolerance, cooldown in itertools.product(args.tolerance, args.cooldown):
+        print(f"BALANCE: tolerance {tolerance}, cooldown {cooldown}: {args.games} games x {args.frames} frames...")
+        result = play(args, tolerance, cooldown)
+        print(f"  {result['frames_per_s']:.0f} frames/s")
+        results.append(result)
+    print_summary(results)
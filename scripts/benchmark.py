@@ -0,0 +1,217 @@
+# SIMULATION BENCHMARK SCRIPT
+# Runs fixed simulation workloads (the bench_*.py cocotb modules next to the testbenches) for each simulator
+# backend and records compile time, run time, simulated cycles per second and peak memory in a JSON history.
+# Each result is compared with the recent history of the same workload, simulator and host, and a slowdown
+# beyond the threshold is reported as a regression (exit code 1).
+#
+# usage: python3 benchmark.py [-sim icarus verilator] [-workloads <name> ...] [-frames <n>] [-threshold <pct>]
+#                             [-history <file>] [-no-record] [MAKEVAR=value ...]
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+TEST_ROOT = os.path.join(ROOT_DIR, "test")
+BENCH_DIR = os.path.join(TEST_ROOT, "benchmark")
+HISTORY_FILE = os.path.join(BENCH_DIR, "history.json")
+
+FRAME_CYCLES = 420_000  # 800 x 525, see src/Sync.v
+BASELINE_RUNS = 5       # a result is compared with the median of this many previous runs
+
+# name: (testbench, cocotb module, clock period in ns, cycles; None = -frames frames)
+WORKLOADS = {
+    "top_frames":  ("top",  "bench_top",  10_000, None),
+    "apu_sustain": ("apu",  "bench_apu",  10,     FRAME_CYCLES),
+    "sync_frame":  ("sync", "bench_sync", 40,     FRAME_CYCLES),
+}
+
+SIMULATOR_VERSION = {
+    "icarus": ["iverilog", "-V"],
+    "verilator": ["verilator", "--version"],
+}
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Tiny Tapestation simulation benchmarks")
+    parser.add_argument("-sim", nargs="+", default=None, help="simulators to benchmark (default: every one installed)")
+    parser.add_argument("-workloads", nargs="+", default=list(WORKLOADS), choices=list(WORKLOADS))
+    parser.add_argument("-frames", type=int, default=1, help="frames of the top level to run in top_frames")
+    parser.add_argument("-threshold", type=float, default=10.0, help="percent slowdown reported as a regression")
+    parser.add_argument("-history", default=HISTORY_FILE, help="JSON history file")
+    parser.add_argument("-no-record", action="store_true", help="compare with the history but don't add to it")
+    parser.add_argument("make_vars", nargs="*", help="extra make variables passed to every job (e.g. VERILATOR_THREADS=2)")
+    args = parser.parse_args(argv)
+
+    if args.sim is None:
+        args.sim = [sim for sim, cmd in SIMULATOR_VERSION.items() if shutil.which(cmd[0])]
+    if not args.sim:
+        parser.error("no simulator found, install iverilog or verilator")
+    for var in args.make_vars:
+        if "=" not in var:
+            parser.error(f"'{var}' is not a make variable assignment (expected NAME=value)")
+    return args
+
+
+def simulator_version(sim):
+    try:
+        out = subprocess.run(SIMULATOR_VERSION[sim], capture_output=True, text=True).stdout
+    except OSError:
+        return "unknown"
+    return out.splitlines()[0].strip() if out else "unknown"
+
+
+def git_revision():
+    def git(*args):
+        return subprocess.run(["git", *args], capture_output=True, text=True, cwd=ROOT_DIR).stdout.strip()
+    dirty = bool(git("status", "--porcelain", "--", "src", "test"))
+    return git("rev-parse", "--short", "HEAD") or "unknown", dirty
+
+
+def run_make(job_dir, log, make_args, env):
+    """Run one make job, returning (wall seconds, peak RSS in MB of the largest process it ran, exit code)."""
+    start = time.monotonic()
+    proc = subprocess.Popen(["make", "-s", "-C", TEST_ROOT, "job", f"JOB_DIR={job_dir}", *make_args],
+                            stdout=log, stderr=subprocess.STDOUT, env=env)
+    _, status, usage = os.wait4(proc.pid, 0)  # the usage includes every process make waited for
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return time.monotonic() - start, usage.ru_maxrss / 1024, proc.returncode
+
+
+def read_sim_result(results_file):
+    """(simulated ns, simulator seconds) of the single testcase in a cocotb results file."""
+    if not os.path.exists(results_file):
+        return None
+    for case in ET.parse(results_file).getroot().iter("testcase"):
+        if case.find("failure") is not None or case.find("error") is not None:
+            return None
+        return float(case.get("sim_time_ns", 0)), float(case.get("time", 0))
+    return None
+
+
+def run_workload(name, sim, frames, make_vars):
+    testbench, module, period_ns, cycles = WORKLOADS[name]
+    cycles = cycles or frames * FRAME_CYCLES
+
+    job_dir = os.path.join(BENCH_DIR, sim, name)
+    if os.path.exists(job_dir):
+        shutil.rmtree(job_dir)  # always a cold build
+    os.makedirs(job_dir)
+
+    env = dict(os.environ, BENCH_CYCLES=str(cycles), BENCH_PERIOD_NS=str(period_ns))
+    make_args = [f"TESTBENCH={testbench}", f"SIM={sim}", f"TEST_MODULE={module}",
+                 "SIMCACHE=no", "OBJCACHE=", "DUMP_ON_FAIL=no", *make_vars]
+
+    with open(os.path.join(job_dir, "latest.log"), "w") as log:
+        compile_s, compile_rss, code = run_make(job_dir, log, make_args + ["JOB_TARGETS=build"], env)
+        if code != 0:
+            return None
+        wall_s, rss, code = run_make(job_dir, log, make_args + ["JOB_TARGETS=sim"], env)
+
+    result = read_sim_result(os.path.join(job_dir, "results.xml"))
+    if code != 0 or result is None:
+        return None
+    sim_ns, run_s = result
+    simulated = sim_ns / period_ns
+
+    return {
+        "workload": name,
+        "sim": sim,
+        "cycles": int(simulated),
+        "compile_s": round(compile_s, 3),
+        "run_s": round(run_s, 3),
+        "wall_s": round(compile_s + wall_s, 3),
+        "cycles_per_s": round(simulated / run_s, 1) if run_s else 0.0,
+        "peak_rss_mb": round(rss, 1),
+        "compile_rss_mb": round(compile_rss, 1),
+    }
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_history(path, history):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path + ".new", "w") as f:
+        json.dump(history, f, indent=1)
+        f.write("\n")
+    os.replace(path + ".new", path)
+
+
+def find_regressions(entry, history, threshold):
+    """Compare an entry with the median of the last BASELINE_RUNS runs of the same workload and setup on this host."""
+    key = ("workload", "sim", "host", "cycles", "make_vars")
+    previous = [old for old in history if all(old.get(k) == entry[k] for k in key)][-BASELINE_RUNS:]
+    if not previous:
+        return []
+
+    limit = threshold / 100
+    regressions = []
+    speed = statistics.median(old["cycles_per_s"] for old in previous)
+    if speed and entry["cycles_per_s"] < speed * (1 - limit):
+        regressions.append(f"{entry['cycles_per_s']:.0f} cycles/s, {100 * (1 - entry['cycles_per_s'] / speed):.1f}% "
+                           f"slower than {speed:.0f}")
+    build = statistics.median(old["compile_s"] for old in previous)
+    if build and entry["compile_s"] > build * (1 + limit) and entry["compile_s"] - build > 1:
+        regressions.append(f"compile took {entry['compile_s']:.1f}s, up from {build:.1f}s")
+    return regressions
+
+
+def print_summary(entries):
+    print("")
+    print(f"{'WORKLOAD':<14}{'SIM':<11}{'CYCLES':>10}{'COMPILE (s)':>13}{'RUN (s)':>10}{'CYCLES/S':>12}{'RSS (MB)':>10}")
+    print("-" * 80)
+    for e in entries:
+        print(f"{e['workload']:<14}{e['sim']:<11}{e['cycles']:>10}{e['compile_s']:>13.2f}{e['run_s']:>10.2f}"
+              f"{e['cycles_per_s']:>12.0f}{e['peak_rss_mb']:>10.1f}")
+    print("-" * 80)
+
+
+if __name__ == "__main__":
+
+    args = parse_args(sys.argv[1:])
+    history = load_history(args.history)
+    revision, dirty = git_revision()
+
+    entries = []
+    failed = []
+    regressed = []
+    for sim in args.sim:
+        version = simulator_version(sim)
+        for name in args.workloads:
+            print(f"BENCH: {name} on {sim}...")
+            entry = run_workload(name, sim, args.frames, args.make_vars)
+            if entry is None:
+                print(f"ERROR: {name} on {sim} failed, see {os.path.join(BENCH_DIR, sim, name, 'latest.log')}")
+                failed.append(f"{name}/{sim}")
+                continue
+
+            entry.update(time=time.strftime("%Y-%m-%dT%H:%M:%S"), revision=revision, dirty=dirty,
+                         host=platform.node(), sim_version=version, make_vars=args.make_vars)
+            for message in find_regressions(entry, history, args.threshold):
+                print(f"REGRESSION: {name} on {sim}: {message}")
+                regressed.append(f"{name}/{sim}")
+            entries.append(entry)
+
+    if entries:
+        print_summary(entries)
+    if entries and not args.no_record:
+        save_history(args.history, history + entries)
+        print(f"Recorded {len(entries)} result(s) in {args.history}")
+
+    if failed:
+        print(f"FAILED: {', '.join(failed)}")
+    if regressed:
+        print(f"REGRESSED (>{args.threshold:g}% slower): {', '.join(sorted(set(regressed)))}")
+    sys.exit(1 if failed or regressed else 0)
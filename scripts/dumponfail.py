@@ -0,0 +1,72 @@
+# DUMP ON FAIL SCRIPT
+# Called by the testbench Makefiles after a run (make target dump_on_fail, see test/common.mk).
+# Normal runs don't dump waveforms, so each failing test in the cocotb results file is re-run on its own
+# with dumping switched on for a window that ends where it failed, e.g. sim/test_reset.fst. The re-run uses
+# the run's random seed, so random tests fail the same way again.
+#
+# usage: python3 dumponfail.py <results.xml> -makefile <Makefile> [-window <ns>] [-format fst|vcd]
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import xml.etree.ElementTree as ET
+
+
+def failed_tests(results_file):
+    """The (name, sim time in ns) of every failing or erroring testcase in a cocotb JUnit results file."""
+    if not os.path.isfile(results_file):
+        return []
+    failed = []
+    for testcase in ET.parse(results_file).getroot().iter("testcase"):
+        if testcase.find("failure") is not None or testcase.find("error") is not None:
+            failed.append((testcase.get("name"), float(testcase.get("sim_time_ns", 0))))
+    return failed
+
+
+def random_seed(results_file):
+    """The RANDOM_SEED cocotb recorded in a results file, or None."""
+    for prop in ET.parse(results_file).getroot().iter("property"):
+        if prop.get("name") == "random_seed":
+            return prop.get("value")
+    return None
+
+
+def rerun_with_dump(makefile, name, fail_ns, window_ns, dump_format, seed):
+    """Re-run a single test with a dump of the window_ns of simulation time before it failed."""
+    dump_file = f"{name}.{dump_format}"
+    start_ns = max(0, int(fail_ns - window_ns))
+
+    with tempfile.TemporaryDirectory() as tmp:  # keep the original results file untouched
+        cmd = [os.environ.get("MAKE", "make"), "-s", "-f", makefile, "sim",
+               f"TESTCASE={name}", "DUMP=1", "DUMP_ON_FAIL=no", f"DUMP_FORMAT={dump_format}",
+               f"DUMP_FILE={dump_file}", f"DUMP_START_NS={start_ns}", *([f"SEED={seed}"] if seed else []),
+               f"COCOTB_RESULTS_FILE={os.path.join(tmp, 'results.xml')}"]
+        proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+
+    if proc.returncode != 0 or not os.path.isfile(dump_file):
+        print(f"[DUMP] re-running {name} did not produce a dump (make exited {proc.returncode})")
+        return None
+    print(f"[DUMP] {name} failed at {fail_ns:.0f} ns, dumped {start_ns}-{fail_ns:.0f} ns to {dump_file}")
+    return dump_file
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Re-run failing cocotb tests with a waveform dump")
+    parser.add_argument("results", help="cocotb results file of the run")
+    parser.add_argument("-makefile", required=True, help="testbench Makefile to re-run the tests with")
+    parser.add_argument("-window", type=float, default=1_000_000, help="ns of simulation to dump before the failure")
+    parser.add_argument("-format", choices=("fst", "vcd"), default="fst", help="dump format")
+    args = parser.parse_args()
+
+    failed = failed_tests(args.results)
+    if not failed:
+        sys.exit(0)
+
+    seed = random_seed(args.results)
+    print(f"[DUMP] {len(failed)} failing test(s), re-running with waveform dumps (seed {seed})...")
+    for name, fail_ns in failed:
+        rerun_with_dump(args.makefile, name, fail_ns, args.window, args.format, seed)
+    sys.exit(0)  # the failures themselves are already in the results file
@@ -0,0 +1,47 @@
+# PROBE BUS GENERATOR
+# Writes test/lib/probes/<name>.vh for every probe declared in test/lib/tts/probe.py (PROBES). Each include
+# declares one packed `probe` wire in a testbench wrapper, which tts.probe.Probe reads and splits into fields.
+# Re-run it after changing PROBES; -check only reports includes that are out of date (exit code 1).
+#
+# usage: python3 probes.py [-check] [<name> ...]
+
+import argparse
+import os
+import sys
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT_DIR, "test", "lib"))
+
+from tts.probe import PROBES, ProbeLayout  # noqa: E402
+
+PROBE_DIR = os.path.join(ROOT_DIR, "test", "lib", "probes")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Generate the testbench probe bus includes")
+    parser.add_argument("names", nargs="*", default=list(PROBES), help="probes to generate (default: all)")
+    parser.add_argument("-check", action="store_true", help="only check that the includes are up to date")
+    args = parser.parse_args()
+
+    stale = []
+    for name in args.names:
+        if name not in PROBES:
+            parser.error(f"unknown probe '{name}' (known: {', '.join(PROBES)})")
+        layout = ProbeLayout(name, PROBES[name])
+        path = os.path.join(PROBE_DIR, f"{name}.vh")
+        text = layout.verilog()
+        current = open(path).read() if os.path.exists(path) else None
+        if current == text:
+            continue
+        if args.check:
+            stale.append(path)
+            continue
+        os.makedirs(PROBE_DIR, exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        print(f"PROBE: {name} ({layout.width} bits, {len(layout.fields)} fields) -> {os.path.relpath(path, ROOT_DIR)}")
+
+    if stale:
+        print(f"ERROR: out of date, run scripts/probes.py: {', '.join(stale)}")
+        sys.exit(1)
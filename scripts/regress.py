@@ -0,0 +1,349 @@
+# REGRESSION RUNNER SCRIPT
+# Runs every discovered testbench (test/unit/* and test/top) as an independent job on a pool of workers.
+# Each job is simulated in its own directory under test/regress/ so sim_build, waveforms and results
+# files never clash, and the job results are merged into a single JUnit report at the end.
+# With -shards, the tests of each testbench are split across several simulator processes (cocotb's TESTCASE
+# filter) that share one compiled image, so a long unit suite scales with cores instead of running serially.
+# Every run has its own random seed (-seed, then -seed + 1, ...), so -runs is a seed sweep; the seed of every
+# failing test is written to test/regress/failing_seeds.txt, which -replay runs again test by test.
+# All jobs share one functional coverage database (tts.coverage), merged into test/regress/coverage.json.
+#
+# usage: python3 regress.py -runs <n> -width <n> [-shards <n>] [-seed <n>] [-tb <name>,...] [MAKEVAR=value ...]
+#        python3 regress.py -replay <failing_seeds.txt> [-width <n>] [MAKEVAR=value ...]
+
+import argparse
+import ast
+import collections
+import os
+import shutil
+import subprocess
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+TEST_ROOT = os.path.join(ROOT_DIR, "test")
+REGRESS_DIR = os.path.join(TEST_ROOT, "regress")
+FAILING_SEEDS = os.path.join(REGRESS_DIR, "failing_seeds.txt")
+COVERAGE_DB = os.path.join(REGRESS_DIR, "coverage")
+
+sys.path.insert(0, os.path.join(TEST_ROOT, "lib"))
+from tts.coverage import merge  # noqa: E402
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Tiny Tapestation parallel regression runner")
+    parser.add_argument("-runs", type=int, default=1, help="number of times to repeat every testbench")
+    parser.add_argument("-width", type=int, default=os.cpu_count() or 1, help="number of jobs to run concurrently")
+    parser.add_argument("-shards", type=int, default=1, help="split each testbench's tests across this many processes")
+    parser.add_argument("-seed", type=int, default=None, help="random seed of the first run (default: the time)")
+    parser.add_argument("-replay", default=None, help="re-run the failing tests and seeds listed in this file")
+    parser.add_argument("-tb", default=None, help="only run these testbenches, comma separated (e.g. sync,apu,top)")
+    parser.add_argument("make_vars", nargs="*", help="extra make variables passed to every job (e.g. SIM=icarus)")
+    args = parser.parse_args(argv)
+
+    if args.runs < 1 or args.width < 1 or args.shards < 1:
+        parser.error("-runs, -width and -shards must all be at least 1")
+    for var in args.make_vars:
+        if "=" not in var:
+            parser.error(f"'{var}' is not a make variable assignment (expected NAME=value)")
+        if var.startswith(("SEED=", "RANDOM_SEED=", "TESTCASE=")):
+            parser.error(f"set the seed with -seed and rerun single tests with -replay, not {var}")
+
+    # the jobs run in their own directories, so a relative COVERAGE_DB is made absolute here (from where
+    # regress.py was started) and the jobs and the final merge use the same directory
+    coverage_vars = [var for var in args.make_vars if var.startswith("COVERAGE_DB=")]
+    args.make_vars = [var for var in args.make_vars if var not in coverage_vars]
+    args.coverage_db = os.path.abspath(coverage_vars[-1].split("=", 1)[1]) if coverage_vars else COVERAGE_DB
+    args.make_vars.append(f"COVERAGE_DB={args.coverage_db}")
+    if args.tb is not None:
+        args.tb = [name.removeprefix("unit/") for name in args.tb.split(",") if name]
+        unknown = sorted(set(args.tb) - set(discover_testbenches(args.make_vars)))
+        if unknown or not args.tb:
+            parser.error(f"-tb: not a testbench: {', '.join(unknown) or repr('')}")
+    if args.seed is None:
+        args.seed = int(time.time())
+    return args
+
+
+def discover_testbenches(make_vars):
+    """Ask the test Makefile for its unit test directories, so discovery matches `make` exactly."""
+    result = subprocess.run(
+        ["make", "-s", "-C", TEST_ROOT, "list_tests"],
+        capture_output=True, text=True, check=True,
+    )
+    if "GATES=yes" in make_vars:  # gate level simulation only exists for the top level
+        return ["top"]
+    return result.stdout.split() + ["top"]
+
+
+def make_job(testbench, job_dir, make_vars, stdout):
+    return subprocess.run(
+        ["make", "-s", "-C", TEST_ROOT, "job", f"TESTBENCH={testbench}", f"JOB_DIR={job_dir}", *make_vars],
+        stdout=stdout, stderr=subprocess.STDOUT, text=True,
+    )
+
+
+def run_job(spec, make_vars):
+    """Simulate one job from plan_jobs in its isolated directory and collect its results."""
+    os.makedirs(spec["dir"], exist_ok=True)
+    log_path = os.path.join(spec["dir"], "latest.log")
+    start = time.monotonic()
+
+    make_vars = [*make_vars, f"SEED={spec['seed']}"]
+    if spec["tests"]:
+        make_vars.append(f"TESTCASE={','.join(spec['tests'])}")
+    if spec["sim_build"]:
+        make_vars.append(f"SIM_BUILD={spec['sim_build']}")
+    with open(log_path, "w") as log:
+        proc = make_job(spec["testbench"], spec["dir"], make_vars, log)
+
+    return dict(
+        spec,
+        log=log_path,
+        returncode=proc.returncode,
+        duration=time.monotonic() - start,
+        results=read_results(os.path.join(spec["dir"], "results.xml")),
+    )
+
+
+# ====================== SHARED BUILDS AND SHARDS ======================
+
+def list_testcases(testbench, build_dir, make_vars):
+    """Names of the @cocotb.test functions of a testbench's modules, in file order."""
+    proc = make_job(testbench, build_dir, [*make_vars, "JOB_TARGETS=list_modules"], subprocess.PIPE)
+    tb_dir = os.path.join(TEST_ROOT, "top" if testbench == "top" else os.path.join("unit", testbench), "tb")
+    tests = []
+    for module in proc.stdout.split():
+        path = os.path.join(tb_dir, module.replace(".", os.sep) + ".py")
+        if not os.path.isfile(path):
+            continue  # a shared helper such as tts.profiling
+        with open(path) as f:
+            tree = ast.parse(f.read(), path)
+        for node in tree.body:
+            if isinstance(node, (ast.AsyncFunctionDef, ast.FunctionDef)) and any(
+                    "cocotb.test" in ast.unparse(decorator) for decorator in node.decorator_list):
+                tests.append(node.name)
+    return tests
+
+
+def build_once(testbench, build_dir, make_vars):
+    """Compile a testbench into build_dir/sim_build for its jobs to share, as a job with no results."""
+    os.makedirs(build_dir, exist_ok=True)
+    log_path = os.path.join(build_dir, "latest.log")
+    start = time.monotonic()
+    with open(log_path, "w") as log:
+        proc = make_job(testbench, build_dir, [*make_vars, "JOB_TARGETS=build",
+                                               f"SIM_BUILD={os.path.join(build_dir, 'sim_build')}"], log)
+    return {"testbench": testbench, "run": 0, "seed": None, "shard": None, "dir": build_dir, "log": log_path,
+            "returncode": proc.returncode, "duration": time.monotonic() - start, "results": []}
+
+
+def previous_durations(results_file):
+    """Test name -> seconds from the last merged report, used to balance the shards."""
+    return {case.get("name"): float(case.get("time", 0)) for case in read_results(results_file)}
+
+
+def split_tests(tests, count, durations):
+    """Split tests into at most `count` shards of similar total time, longest first onto the least loaded shard.
+    Tests that haven't been timed before count as the average of those that have."""
+    known = [durations[test] for test in tests if test in durations]
+    default = sum(known) / len(known) if known else 1.0
+    shards = [[0.0, []] for _ in range(min(count, len(tests)))]
+    for test in sorted(tests, key=lambda test: durations.get(test, default), reverse=True):
+        shard = min(shards, key=lambda shard: shard[0])
+        shard[0] += durations.get(test, default)
+        shard[1].append(test)
+    return [sorted(names, key=tests.index) for _, names in shards]
+
+
+def plan_jobs(runs, shards, make_vars, durations, pool):
+    """Job specs for a list of (testbench, run, seed, test names or None for all of them).
+
+    A testbench that runs as more than one job (several runs, seeds or shards) is compiled once first and
+    every job uses that build. Also returns the failed builds, whose testbenches aren't run."""
+    splits = {}
+    for tb in dict.fromkeys(run[0] for run in runs):
+        tests = list_testcases(tb, os.path.join(REGRESS_DIR, tb, "build"), make_vars) if shards > 1 else []
+        splits[tb] = split_tests(tests, shards, durations) if len(tests) > 1 else [None]
+
+    counts = collections.Counter()
+    for tb, _, _, tests in runs:
+        counts[tb] += len(splits[tb]) if tests is None else 1
+    builds = {tb: pool.submit(build_once, tb, os.path.join(REGRESS_DIR, tb, "build"), make_vars)
+              for tb, count in counts.items() if count > 1}
+
+    jobs = []
+    failed = []
+    for tb, run, seed, tests in runs:
+        sim_build = None
+        if tb in builds:
+            build = builds[tb].result()
+            if build["returncode"] != 0:
+                if build not in failed:
+                    failed.append(build)
+                continue
+            sim_build = os.path.join(build["dir"], "sim_build")
+
+        split = splits[tb] if tests is None else [tests]
+        run_dir = os.path.join(REGRESS_DIR, tb, f"run{run}")
+        for index, shard_tests in enumerate(split):
+            sharded = len(split) > 1
+            jobs.append({"testbench": tb, "run": run, "seed": seed, "tests": shard_tests, "sim_build": sim_build,
+                         "shard": (index, len(split)) if sharded else None,
+                         "dir": os.path.join(run_dir, f"shard{index}") if sharded else run_dir})
+    return jobs, failed
+
+
+# ====================== SEEDS ======================
+
+def load_failing_seeds(path):
+    """(testbench, test, seed) of every line of a failing seeds file."""
+    entries = []
+    with open(path) as f:
+        for line in f:
+            fields = line.split("#")[0].split()
+            if fields:
+                entries.append((fields[0], fields[1], int(fields[2])))
+    return entries
+
+
+def failing_seeds(jobs):
+    failing = []
+    for job in jobs:
+        for case in job["results"]:
+            if case.find("failure") is not None or case.find("error") is not None:
+                failing.append((job["testbench"], case.get("name"), job["seed"]))
+    return sorted(set(failing))
+
+
+def write_failing_seeds(entries, path):
+    with open(path, "w") as f:
+        f.write("# testbench test seed - run again with: python3 scripts/regress.py -replay <this file>\n")
+        for testbench, test, seed in entries:
+            f.write(f"{testbench} {test} {seed}\n")
+
+
+def read_results(results_file):
+    """Return the <testcase> elements of a cocotb JUnit results file (empty if the sim never ran)."""
+    if not os.path.exists(results_file):
+        return []
+    try:
+        return ET.parse(results_file).getroot().findall(".//testcase")
+    except ET.ParseError:
+        return []
+
+
+def job_passed(job):
+    if job["returncode"] != 0 or not job["results"]:
+        return False
+    return not any(case.find("failure") is not None or case.find("error") is not None for case in job["results"])
+
+
+def job_name(job):
+    if job["shard"] is None:
+        return job["testbench"]
+    index, count = job["shard"]
+    return f"{job['testbench']}[{index + 1}/{count}]"
+
+
+def write_merged_results(jobs, output_file):
+    """Merge every job's testcases into one JUnit report, one testsuite per testbench run (shards included)."""
+    root = ET.Element("testsuites", name="regression")
+    suites = {}
+    for job in sorted(jobs, key=lambda j: (j["testbench"], j["run"], j["shard"] or (0, 1))):
+        name = f"{job['testbench']}.run{job['run']}"
+        if name not in suites:
+            suites[name] = ET.SubElement(root, "testsuite", name=name, time="0")
+            if job["seed"] is not None:
+                properties = ET.SubElement(suites[name], "properties")
+                ET.SubElement(properties, "property", name="random_seed", value=str(job["seed"]))
+        suite = suites[name]
+        suite.set("time", f"{float(suite.get('time')) + job['duration']:.2f}")
+        if not job["results"]:
+            case = ET.SubElement(suite, "testcase", name="build", classname=job_name(job))
+            ET.SubElement(case, "failure", message=f"no results produced, see {job['log']}")
+        for case in job["results"]:
+            suite.append(case)
+    ET.ElementTree(root).write(output_file, encoding="unicode", xml_declaration=True)
+
+
+def print_coverage(db, output_file):
+    """Merge the jobs' coverage into one database and print how many bins of each point were hit."""
+    if not os.path.isdir(db):
+        return
+    merged = merge(db, output_file)
+    print("")
+    print(f"{'COVERPOINT':<36}{'BINS HIT':>10}  MISSING")
+    print("-" * 65)
+    for group, points in sorted(merged.items()):
+        for point, bins in sorted(points.items()):
+            missing = [name for name, hits in bins.items() if not hits]
+            print(f"{group + '.' + point:<36}{len(bins) - len(missing):>5}/{len(bins):<4}  {', '.join(missing)}")
+    print(f"Coverage merged into {output_file}")
+
+
+def print_summary(jobs, wall_time):
+    serial_time = sum(job["duration"] for job in jobs)
+    print("")
+    print(f"{'TESTBENCH':<20}{'RUN':>5}{'SEED':>12}{'TESTS':>8}{'STATUS':>9}{'TIME (s)':>11}")
+    print("-" * 65)
+    for job in sorted(jobs, key=lambda j: (j["testbench"], j["run"], j["shard"] or (0, 1))):
+        status = "PASS" if job_passed(job) else "FAIL"
+        seed = "-" if job["seed"] is None else job["seed"]
+        print(f"{job_name(job):<20}{job['run']:>5}{seed:>12}{len(job['results']):>8}{status:>9}{job['duration']:>11.2f}")
+    print("-" * 65)
+    failed = sum(not job_passed(job) for job in jobs)
+    print(f"JOBS={len(jobs)} PASS={len(jobs) - failed} FAIL={failed}")
+    print(f"Wall time: {wall_time:.2f}s (serial would be {serial_time:.2f}s)")
+
+
+if __name__ == "__main__":
+
+    args = parse_args(sys.argv[1:])
+
+    if args.replay:
+        runs = [(tb, run, seed, [test]) for run, (tb, test, seed) in enumerate(load_failing_seeds(args.replay))]
+        if not runs:
+            print(f"ERROR: no failing seeds in {args.replay}.")
+            sys.exit(1)
+        print(f"REGRESS: replaying {len(runs)} failing seeds from {args.replay} on {args.width} workers.")
+    else:
+        testbenches = discover_testbenches(args.make_vars)
+        if args.tb:
+            testbenches = [tb for tb in testbenches if tb in args.tb]
+        if not testbenches:
+            print("ERROR: no testbenches selected.")
+            sys.exit(1)
+        runs = [(tb, run, args.seed + run, None) for run in range(args.runs) for tb in testbenches]
+        shards = f", up to {args.shards} shards each" if args.shards > 1 else ""
+        print(f"REGRESS: {len(testbenches)} testbenches x {args.runs} runs (seeds {args.seed}-{args.seed + args.runs - 1})"
+              f" on {args.width} workers{shards}.")
+
+    durations = previous_durations(os.path.join(REGRESS_DIR, "results.xml"))
+    if os.path.exists(REGRESS_DIR):  # a COVERAGE_DB outside test/regress keeps its hits from one regression to the next
+        shutil.rmtree(REGRESS_DIR)
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.width) as pool:  # each job is its own simulator process
+        planned, jobs = plan_jobs(runs, 1 if args.replay else args.shards, args.make_vars, durations, pool)
+        futures = [pool.submit(run_job, spec, args.make_vars) for spec in planned]
+        for future in as_completed(futures):
+            job = future.result()
+            status = "PASS" if job_passed(job) else "FAIL"
+            print(f"INFO: {job_name(job)} run {job['run']} (seed {job['seed']}) {status} in {job['duration']:.2f}s")
+            jobs.append(job)
+
+    write_merged_results(jobs, os.path.join(REGRESS_DIR, "results.xml"))
+    print_summary(jobs, time.monotonic() - start)
+    print_coverage(args.coverage_db, os.path.join(REGRESS_DIR, "coverage.json"))
+
+    failing = failing_seeds(jobs)
+    if failing:
+        write_failing_seeds(failing, FAILING_SEEDS)
+        for testbench, test, seed in failing:
+            print(f"FAILED: {testbench} {test} with seed {seed}")
+        print(f"Failing seeds written to {FAILING_SEEDS} (re-run them with -replay)")
+
+    sys.exit(0 if all(job_passed(job) for job in jobs) else 1)
@@ -0,0 +1,110 @@
+# RNG CHARACTERISATION SCRIPT
+# Sweeps the bit-exact model of rng (test/lib/tts/rng_model.py) over all 256 seeds and all 256 seed_reg
+# states at once and reports the cycle structure of seed_reg - tails, cycle lengths, fixed points, the
+# period each seed runs in from reset - and the distribution of the numbers it draws. The whole sweep is a
+# few hundred NumPy steps over a 256 x 256 table, where following every seed in simulation would take hours.
+# test/unit/rng checks the model against the RTL.
+#
+# usage: python3 rng_sweep.py [-short <period>]
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT_DIR, "test", "lib"))
+
+from tts.rng_model import SEEDS, STATES, draw, reset_state, sweep  # noqa: E402
+
+PERIOD_BUCKETS = [(1, 1), (2, 7), (8, 31), (32, 127), (128, 255), (256, 256)]
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Tiny Tapestation rng cycle structure and value distribution")
+    parser.add_argument("-short", type=int, default=16, help="list the seeds whose period from reset is at most this")
+    return parser.parse_args(argv)
+
+
+def characterise():
+    """Sweep the model and return the per-seed cycle structure and the draw distribution."""
+    start = time.perf_counter()
+    result = sweep()
+    seconds = time.perf_counter() - start
+
+    seeds = np.arange(SEEDS)
+    first = reset_state(seeds).astype(np.int64)
+    period = result["period"][seeds, first]
+    cycles = np.array([len(np.unique(names)) for names in result["cycle"]])
+
+    # a trigger at a uniformly random time after reset draws from the states of the reset state's cycle
+    # (mix() maps that cycle onto itself), with every seed equally likely
+    on_cycle = result["cycle"] == result["cycle"][seeds, first][:, None]
+    weights = np.where(on_cycle, 1 / period[:, None], 0) / SEEDS
+    values = np.broadcast_to(draw(np.arange(STATES)), (SEEDS, STATES))
+    drawn = np.bincount(values.ravel(), weights=weights.ravel(), minlength=256)
+    ideal = np.bincount(draw(np.arange(STATES)), minlength=256) / STATES  # every state equally likely
+
+    return {
+        "seconds": seconds,
+        "tail": result["tail"],
+        "fixed_points": (result["period"] == 1).sum(axis=1),
+        "cycles": cycles,
+        "first": first,
+        "period": period,
+        "drawn": drawn,
+        "ideal": ideal,
+    }
+
+
+def entropy(p):
+    p = p[p > 0]
+    return float(-(p * np.log2(p)).sum())
+
+
+def print_report(r, short):
+    print(f"SWEEP: {SEEDS} seeds x {STATES} states in {r['seconds']:.2f} s")
+    print("")
+    print("CYCLE STRUCTURE (every state of every seed)")
+    if r["tail"].max() == 0:
+        print("  mix() permutes the states for every seed: no state has a tail, so every run from reset is a pure cycle")
+    else:
+        print(f"  longest tail {r['tail'].max()} edges, {(r['tail'] > 0).sum()} states not on a cycle")
+    print(f"  cycles per seed      min {r['cycles'].min()}, median {np.median(r['cycles']):.0f}, max {r['cycles'].max()}")
+    print(f"  fixed points         {r['fixed_points'].sum()} across {(r['fixed_points'] > 0).sum()} seeds")
+    print("")
+    print("FROM RESET (seed held on the input)")
+    period = r["period"]
+    print(f"  period               min {period.min()}, median {np.median(period):.0f}, max {period.max()}, "
+          f"mean {period.mean():.1f}")
+    for low, high in PERIOD_BUCKETS:
+        count = ((period >= low) & (period <= high)).sum()
+        label = f"{low}" if low == high else f"{low}-{high}"
+        print(f"  {label:>9} edges   {count:>4} seeds  {'#' * int(np.ceil(count / 4))}")
+    weak = np.flatnonzero(period <= short)
+    if weak.size:
+        print(f"  period <= {short}:")
+        for seed in weak[np.argsort(period[weak], kind="stable")]:
+            locked = " (locked: every draw is the same)" if period[seed] == 1 else ""
+            print(f"    seed {seed:#04x}  reset state {r['first'][seed]:#04x}  period {period[seed]}{locked}")
+    print("")
+    print("VALUE DISTRIBUTION (random seed, trigger at a random time)")
+    drawn, ideal = r["drawn"], r["ideal"]
+    reachable = ideal > 0
+    print(f"  values               {(drawn > 0).sum()} drawn of {reachable.sum()} rdm_num can hold")
+    values, ratio = np.flatnonzero(reachable), drawn[reachable] / ideal[reachable]
+    print(f"  probability / ideal  min {ratio.min():.2f}, max {ratio.max():.2f} "
+          f"(most likely {values[np.argmax(ratio)]:#04x}, least likely {values[np.argmin(ratio)]:#04x})")
+    print(f"  total variation      {0.5 * np.abs(drawn - ideal).sum():.4f} from a uniform seed_reg")
+    print(f"  entropy              {entropy(drawn):.2f} bits (uniform seed_reg {entropy(ideal):.2f}, 8 bits max)")
+    rows = np.bincount(np.arange(256) & 15, weights=drawn, minlength=16)
+    print("  low nibble           " + " ".join(f"{row}:{rows[row]:.3f}" for row in range(13)))
+    print("(the low nibble folds 13-15 onto 1-3, so 1-3 are twice as likely even with a uniform seed_reg)")
+
+
+if __name__ == "__main__":
+
+    args = parse_args(sys.argv[1:])
+    print_report(characterise(), args.short)
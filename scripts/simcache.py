@@ -0,0 +1,144 @@
+# SIMULATION COMPILE CACHE
+# A ccache-style launcher for the Icarus compile step. test/common.mk prefixes the iverilog command with
+# this script, which hashes everything that affects the compiled image (source and wrapper contents,
+# command files, include directories, compile args and toplevel) and copies a cached .vvp into place
+# on a hit, so iverilog only runs when something actually changed.
+#
+# usage: python3 simcache.py <compiler> [compiler args ...] -o <output.vvp>
+#        python3 simcache.py --stats | --clear
+
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+
+CACHE_DIR = os.environ.get("SIMCACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "tinytapestation", "simcache"))
+MAX_ENTRIES = int(os.environ.get("SIMCACHE_MAX_ENTRIES", "64"))
+MAX_SIZE = int(os.environ.get("SIMCACHE_MAX_MB", "512")) * 1024 * 1024
+
+VERILOG_EXTENSIONS = (".v", ".vh", ".sv", ".svh")
+VALUE_FLAGS = ("-B", "-c", "-D", "-d", "-f", "-g", "-I", "-L", "-l", "-M", "-m", "-N", "-P", "-p", "-s", "-T", "-W", "-y", "-Y")
+
+
+def hash_file(digest, path):
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+
+
+def hash_directory(digest, path):
+    """Hash every Verilog file an include (-I) or library (-y) directory could pull in, subdirectories
+    included: `include "probes/top.vh" resolves below the -I directory."""
+    if not os.path.isdir(path):
+        return
+    for root, dirs, files in os.walk(path):
+        dirs[:] = sorted(name for name in dirs if not name.startswith("."))
+        for name in sorted(files):
+            if name.endswith(VERILOG_EXTENSIONS):
+                file_path = os.path.join(root, name)
+                digest.update(os.path.relpath(file_path, path).encode())
+                hash_file(digest, file_path)
+
+
+def cache_key(compiler, args):
+    """Return (key, output file) for a compile command line, or (None, None) if it can't be cached."""
+    digest = hashlib.sha256()
+
+    compiler_path = shutil.which(compiler) or compiler
+    stat = os.stat(compiler_path)
+    digest.update(f"{compiler_path}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+
+    output = None
+    args = list(args)
+    i = 0
+    while i < len(args):
+        arg = args[i]
+
+        if arg == "-o" and i + 1 < len(args):  # the output path is not part of the key
+            output = args[i + 1]
+            i += 2
+            continue
+
+        if arg in VALUE_FLAGS and i + 1 < len(args):  # split form, e.g. '-s top_tb'
+            arg = arg + args[i + 1]
+            i += 1
+
+        digest.update(b"\0" + arg.encode())
+
+        if arg.startswith(("-f", "-c", "-l")):
+            hash_file(digest, arg[2:])
+        elif arg.startswith(("-I", "-y")):
+            hash_directory(digest, arg[2:])
+        elif not arg.startswith(("-", "+")):
+            if not os.path.isfile(arg):
+                return None, None
+            hash_file(digest, arg)
+        i += 1
+
+    if output is None:
+        return None, None
+    return digest.hexdigest(), output
+
+
+def evict():
+    """Drop the least recently used images until the cache fits its entry and size limits."""
+    entries = []
+    for name in os.listdir(CACHE_DIR):
+        if name.endswith(".vvp"):
+            stat = os.stat(os.path.join(CACHE_DIR, name))
+            entries.append((stat.st_mtime, stat.st_size, name))
+    entries.sort()
+
+    total_size = sum(size for _, size, _ in entries)
+    while entries and (len(entries) > MAX_ENTRIES or total_size > MAX_SIZE):
+        _, size, name = entries.pop(0)
+        os.remove(os.path.join(CACHE_DIR, name))
+        total_size -= size
+
+
+def compile_cached(compiler, args):
+    key, output = cache_key(compiler, args)
+    if key is None:
+        return subprocess.call([compiler, *args])
+
+    entry = os.path.join(CACHE_DIR, key + ".vvp")
+    if os.path.exists(entry):
+        shutil.copyfile(entry, output)
+        os.utime(entry)  # mark as recently used
+        print(f"[SIMCACHE] hit {key[:12]} -> {output}")
+        return 0
+
+    print(f"[SIMCACHE] miss {key[:12]}, compiling...")
+    returncode = subprocess.call([compiler, *args])
+    if returncode == 0 and os.path.exists(output):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = f"{entry}.{os.getpid()}.tmp"  # parallel jobs may store the same key at once
+        shutil.copyfile(output, tmp)
+        os.replace(tmp, entry)
+        evict()
+    return returncode
+
+
+def print_stats():
+    if not os.path.isdir(CACHE_DIR):
+        print(f"[SIMCACHE] {CACHE_DIR} is empty.")
+        return
+    sizes = [os.path.getsize(os.path.join(CACHE_DIR, n)) for n in os.listdir(CACHE_DIR) if n.endswith(".vvp")]
+    print(f"[SIMCACHE] {CACHE_DIR}: {len(sizes)}/{MAX_ENTRIES} images, "
+          f"{sum(sizes) / (1024 * 1024):.1f}/{MAX_SIZE // (1024 * 1024)} MB")
+
+
+if __name__ == "__main__":
+
+    if len(sys.argv) < 2:
+        print("usage: simcache.py <compiler> [args ...] | --stats | --clear")
+        sys.exit(1)
+
+    if sys.argv[1] == "--stats":
+        print_stats()
+    elif sys.argv[1] == "--clear":
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+        print(f"[SIMCACHE] cleared {CACHE_DIR}")
+    else:
+        sys.exit(compile_cached(sys.argv[1], sys.argv[2:]))
@@ -0,0 +1,52 @@
+# SPRITE ATLAS TOOL
+# Parses the sprite bitmaps out of src/SpriteROM.v, precomputes every sprite in all four orientations
+# and stores the packed atlas in the on-disk cache used by the testbench models (test/lib/tts/sprites.py).
+# Also prints ASCII previews and exports the atlas as .npy.
+#
+# usage: python3 sprites.py [-rom <SpriteROM.v>] [-preview] [-sprite <id> ...] [-out <atlas.npy>]
+
+import argparse
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT_DIR, "test", "lib"))
+
+import numpy as np  # noqa: E402
+from tts.sprites import (  # noqa: E402
+    CACHE_DIR, N_SPRITES, ORIENTATION_NAMES, ROM_PATH, SPRITE_NAMES, load_atlas, rom_hash, unpack,
+)
+
+
+def preview(atlas, sprite_ids):
+    """Print each sprite in its four orientations side by side ('#' = pixel on)."""
+    pixels = unpack(atlas)
+    for sprite in sprite_ids:
+        print(f"{sprite}: {SPRITE_NAMES[sprite]}")
+        print("  ".join(f"{name:<8}" for name in ORIENTATION_NAMES))
+        for line in range(8):
+            print("  ".join("".join("#" if p else "." for p in pixels[sprite, o, line]) for o in range(len(ORIENTATION_NAMES))))
+        print("")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Tiny Tapestation sprite atlas tool")
+    parser.add_argument("-rom", default=ROM_PATH, help="SpriteROM.v to parse")
+    parser.add_argument("-preview", action="store_true", help="print ASCII previews of the sprites")
+    parser.add_argument("-sprite", type=int, nargs="+", default=None, help="only preview these sprite IDs")
+    parser.add_argument("-out", default=None, help="also save the packed atlas to this .npy file")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    atlas = load_atlas(args.rom)
+    print(f"[SPRITES] {args.rom} ({rom_hash(args.rom)[:12]}): {atlas.shape[0]} sprites x {atlas.shape[1]} orientations "
+          f"in {1000 * (time.perf_counter() - start):.1f} ms, cache {CACHE_DIR}")
+
+    if args.out:
+        np.save(args.out, atlas)
+        print(f"[SPRITES] saved atlas to {args.out}")
+
+    if args.preview or args.sprite:
+        preview(atlas, args.sprite if args.sprite else range(N_SPRITES))
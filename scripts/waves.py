@@ -0,0 +1,103 @@
+# WAVEFORM ANALYSER
+# Pulls VGA frames and the APU sound output out of a VCD/FST dump in a single streaming pass, so dumps
+# far too big for gtkwave (multi-frame top level runs) can still be looked at. Only the signals needed
+# are tracked and memory use doesn't grow with the dump size (see test/lib/tts/vcd.py) - apart from a .wav,
+# which keeps the demodulated 48 kHz audio (a sample per 520 clock cycles) to normalise it before writing.
+#
+# usage: python3 waves.py <dump.vcd|.vcd.gz|.fst> -list
+#        python3 waves.py <dump> -frames <first> [<count>] [-out <dir>] [-format png|npy]
+#        python3 waves.py <dump> -audio <sound.bin|sound.wav> [-sound <signal>[<bit>]]
+#        [-clock <signal>] [-bus <signal>]
+
+import argparse
+import os
+import re
+import sys
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT_DIR, "test", "lib"))
+
+import numpy as np  # noqa: E402
+from tts import vcd  # noqa: E402
+from tts.audio import AUDIO_RATE, stream_pcm, write_wav  # noqa: E402
+from tts.vga import decode_rgb, write_png  # noqa: E402
+
+
+def parse_bit(signal):
+    """'uio_out[7]' -> ('uio_out', 7), 'sound' -> ('sound', 0)."""
+    match = re.fullmatch(r"(.+)\[(\d+)\]", signal)
+    return (match.group(1), int(match.group(2))) if match else (signal, 0)
+
+
+def extract_frames(args):
+    first = args.frames[0]
+    count = args.frames[1] if len(args.frames) > 1 else 1
+    os.makedirs(args.out, exist_ok=True)
+
+    written = 0
+    for number, frame in vcd.frames(args.dump, clock=args.clock, bus=args.bus, first=first, count=count):
+        path = os.path.join(args.out, f"frame_{number:04d}.{args.format}")
+        if args.format == "png":
+            write_png(path, decode_rgb(frame))
+        else:
+            np.save(path, frame)
+        print(f"[WAVES] frame {number} -> {path}")
+        written += 1
+    return written == count
+
+
+def extract_audio(args):
+    signal, bit = parse_bit(args.sound)
+    counts = {"samples": 0, "high": 0}
+
+    def chunks():
+        for chunk in vcd.audio(args.dump, clock=args.clock, signal=signal, bit=bit):
+            counts["samples"] += len(chunk)
+            counts["high"] += int(np.count_nonzero(chunk))
+            yield chunk
+
+    if args.audio.endswith(".wav"):  # demodulate to 48 kHz audio, keeping only the audio (a sample per 520 cycles)
+        write_wav(args.audio, np.concatenate([np.zeros(0), *stream_pcm(chunks())]))
+        layout = f"{AUDIO_RATE} Hz WAV"
+    else:
+        with open(args.audio, "wb") as out:
+            for chunk in chunks():
+                out.write(np.packbits(chunk, bitorder="little").tobytes())
+        layout = "1 bit per clock cycle"
+
+    duty = 100 * counts["high"] / counts["samples"] if counts["samples"] else 0
+    print(f"[WAVES] {counts['samples']} sound samples ({duty:.2f}% high), {layout} -> {args.audio}")
+    return counts["samples"] > 0
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Tiny Tapestation streaming waveform analyser")
+    parser.add_argument("dump", help="VCD (optionally .gz) or FST dump")
+    parser.add_argument("-list", action="store_true", help="list the signals in the dump")
+    parser.add_argument("-frames", type=int, nargs="+", metavar="N", help="first frame (from 0) and number of frames to extract")
+    parser.add_argument("-out", default="frames", help="directory for extracted frames")
+    parser.add_argument("-format", choices=("png", "npy"), default="png", help="frame file format")
+    parser.add_argument("-audio", default=None, help="write the sound output to this file: .wav is demodulated audio, anything else is bit packed, LSB first")
+    parser.add_argument("-clock", default="clk", help="clock to sample on")
+    parser.add_argument("-bus", default="uo_out", help="VGA output bus")
+    parser.add_argument("-sound", default="uio_out[7]", help="sound output, e.g. uio_out[7] or sound")
+    args = parser.parse_args()
+
+    if not (args.list or args.frames or args.audio):
+        parser.error("nothing to do: give -list, -frames or -audio")
+    if args.frames and (len(args.frames) > 2 or min(args.frames) < 0):
+        parser.error("-frames takes a first frame and optionally a count")
+
+    start = time.perf_counter()
+    ok = True
+    if args.list:
+        for name, width in vcd.signals(args.dump).items():
+            print(f"{name} [{width}]" if width > 1 else name)
+    if args.frames:
+        ok &= extract_frames(args)
+    if args.audio:
+        ok &= extract_audio(args)
+    print(f"[WAVES] done in {time.perf_counter() - start:.1f} s")
+    sys.exit(0 if ok else 1)
@@ -10,6 +10,7 @@
  // Tiny Tapestation Top Module
 
 //  === SIMULATION BUILD DEPENDENCIES ===
+//   `include "NESTest_Top.v"
 //   `include "InputCollector.v"
 //   `include "CollisionDetector.v"
 //   `include "Heart.v"
@@ -17,12 +18,12 @@
 //   `include "DragonHead.v"
 //   `include "DragonBody.v"
 //   `include "DragonTarget.v"
-//   `include "Sheep.v"
 //   `include "Sync.v"
 //   `include "PPU.v"
 //   `include "SpriteROM.v"
 //   `include "APU.v"
-//   `include "APU_trigger.v"
+//   `include "APUTrigger.v"
+//   `include "Oscillator.v"
 //   `include "RNG.v"
 //  === END ===
 
@@ -0,0 +1,172 @@
+# Shared simulation setup for the testbench Makefiles (test/top, test/unit/* and create_test).
+# Include this in place of cocotb's Makefile.sim so every testbench picks up the same simulator tweaks.
+
+TTS_TEST_DIR    := $(dir $(abspath $(lastword $(MAKEFILE_LIST))))
+TTS_SCRIPTS_DIR := $(abspath $(TTS_TEST_DIR)../scripts)
+TTS_MAKEFILE    := $(abspath $(firstword $(MAKEFILE_LIST)))
+
+ifeq ($(SIM),verilator)
+SIM_BUILD ?= sim_build/verilator
+
+ifeq ($(DUMP),1)  # see WAVEFORMS below
+WAVES := 1
+VERILATOR_TRACE := 1
+endif
+endif
+
+# shared cocotb helpers and golden models (test/lib/tts)
+export PYTHONPATH := $(PYTHONPATH):$(TTS_TEST_DIR)lib
+
+include $(shell cocotb-config --makefiles)/Makefile.sim
+
+# ====================== COMPILE CACHE ======================
+# Icarus compiles go through scripts/simcache.py, which copies a cached .vvp into sim_build when the
+# sources, wrapper TB, COMPILE_ARGS and toplevel hash the same as a previous build - even under `make -B`.
+# Set SIMCACHE=no to always run iverilog. The cache location/size is set by SIMCACHE_DIR/SIMCACHE_MAX_MB.
+
+SIMCACHE ?= yes
+
+ifeq ($(SIM),icarus)
+ifneq ($(SIMCACHE),no)
+CMD := python3 $(TTS_SCRIPTS_DIR)/simcache.py $(CMD)
+endif
+endif
+
+# ====================== VERILATOR ======================
+# SIM=verilator builds a compiled C++ model, which is much faster than Icarus for multi-frame top level runs.
+# The RTL isn't lint clean, so warnings are reported but not fatal. The wrappers skip their own
+# $dumpvars under Verilator - use DUMP=1 (or WAVES=1) to have cocotb trace the model instead.
+#
+#   VERILATOR_THREADS=<n>  build a multi-threaded model (opt in, only pays off for the larger designs)
+#   OPT_FAST               C++ optimisation level for the model (default -O2)
+#   OBJCACHE               compiler cache for the model's C++ (defaults to ccache when it is installed),
+#                          so an unchanged design isn't recompiled even under `make -B`
+
+ifeq ($(SIM),verilator)
+COMPILE_ARGS += -Wno-fatal -Wno-lint -Wno-style -O3
+
+ifdef VERILATOR_THREADS
+COMPILE_ARGS += --threads $(VERILATOR_THREADS)
+endif
+
+export OPT_FAST ?= -O2
+export OBJCACHE ?= $(shell command -v ccache 2>/dev/null)
+endif
+
+# ====================== WAVEFORMS ======================
+# The wrappers only dump waveforms when asked to (test/lib/dump.vh), so a normal run - and CI - writes nothing.
+# When a test fails, it is re-run on its own with a dump of the last DUMP_FAIL_NS before the failure.
+#
+#   DUMP=1                 dump the wrapper to <name>.fst in the testbench directory (moved to sim/ by cleanup)
+#   DUMP_FORMAT            fst (default) or vcd
+#   DUMP_DEPTH=<n>         only dump n scope levels below the wrapper
+#   DUMP_SIGNALS="a b.c"   only dump these signals, named from the wrapper (e.g. "uo_out dut.hsync")
+#   DUMP_START/DUMP_STOP   clock cycle window to dump
+#   DUMP_FRAME_RANGE=<a>:<b> the same window in VGA frames (FRAME_CYCLES clock cycles each)
+#   DUMP_FILE              dump file name
+#   DUMP_ON_FAIL=no        don't re-run failing tests with a dump (scripts/dumponfail.py)
+#
+# Under Verilator DUMP=1 traces the whole model - the depth, signal, window and dump on fail options are Icarus only.
+
+DUMP_FORMAT  ?= fst
+ifeq ($(SIM),icarus)
+DUMP_ON_FAIL ?= yes
+else
+# the Verilator model would have to be rebuilt with tracing
+DUMP_ON_FAIL ?= no
+endif
+DUMP_FAIL_NS ?= 1000000
+# 800 x 525, see src/Sync.v
+FRAME_CYCLES := 420000
+TTS_COMMA    := ,
+
+COMPILE_ARGS += -I$(TTS_TEST_DIR)lib
+
+ifeq ($(DUMP),1)
+PLUSARGS += +dump
+
+ifeq ($(DUMP_FORMAT),fst)
+PLUSARGS += +dump_fst
+ifeq ($(SIM),icarus)
+PLUSARGS += -fst
+endif
+endif
+
+ifdef DUMP_FRAME_RANGE
+DUMP_START := $(shell echo $$(( $(word 1,$(subst :, ,$(DUMP_FRAME_RANGE))) * $(FRAME_CYCLES) )))
+DUMP_STOP  := $(shell echo $$(( $(word 2,$(subst :, ,$(DUMP_FRAME_RANGE))) * $(FRAME_CYCLES) )))
+endif
+
+PLUSARGS += $(if $(DUMP_FILE),+dump_file=$(DUMP_FILE))
+PLUSARGS += $(if $(DUMP_DEPTH),+dump_depth=$(DUMP_DEPTH))
+PLUSARGS += $(if $(DUMP_START),+dump_start=$(DUMP_START))
+PLUSARGS += $(if $(DUMP_STOP),+dump_stop=$(DUMP_STOP))
+PLUSARGS += $(if $(DUMP_START_NS),+dump_start_ns=$(DUMP_START_NS))
+PLUSARGS += $(if $(DUMP_STOP_NS),+dump_stop_ns=$(DUMP_STOP_NS))
+
+# the allowlist is compiled in as a $dumpvars call, only rewritten when it changes so it doesn't force a recompile
+ifdef DUMP_SIGNALS
+DUMP_SIGNALS_VH := $$dumpvars(0, $(subst $(eval) ,$(TTS_COMMA) ,$(addprefix $(TOPLEVEL).,$(strip $(DUMP_SIGNALS)))));
+COMPILE_ARGS += -DDUMP_SIGNALS -I$(abspath $(SIM_BUILD))
+CUSTOM_COMPILE_DEPS += $(SIM_BUILD)/dump_signals.vh
+
+$(SIM_BUILD)/dump_signals.vh: dump_signals_check | $(SIM_BUILD)
+	@echo '$(DUMP_SIGNALS_VH)' > $@.new
+	@if cmp -s $@.new $@; then rm -f $@.new; else mv -f $@.new $@; fi
+endif
+endif
+
+# ====================== RANDOM SEED ======================
+# cocotb seeds Python's random module from RANDOM_SEED (the time when it isn't set, logged at the start of the run
+# and stored in the results file) and reseeds it for every test from that seed and the test's name. A random test
+# is therefore replayed exactly by SEED=<seed> TESTCASE=<test>, whichever other tests run with it.
+
+ifdef SEED
+export RANDOM_SEED := $(SEED)
+endif
+
+# ====================== COVERAGE ======================
+# Random tests stop once their tts.coverage bins are all hit. COVERAGE_DB=<dir> shares those hits between runs:
+# each run starts from what the runs before it saved there and adds its own, so a sweep stops re-checking states
+# it has already seen. scripts/regress.py points all its jobs at test/regress/coverage and merges it at the end.
+
+ifdef COVERAGE_DB
+export COVERAGE_DB := $(abspath $(COVERAGE_DB))
+endif
+
+# ====================== PROFILING ======================
+# PROFILE=1 loads tts.profiling ahead of the test module. It logs, per test, the time spent in Python against
+# the simulator, the GPI callbacks, the trigger awaits by type and the hottest coroutine lines, plus a summary
+# at the end. PROFILE_FOLDED=<file> also writes the Python time as folded stacks for a flamegraph.
+
+ifeq ($(PROFILE),1)
+MODULE := tts.profiling,$(MODULE)
+endif
+
+# ====================== BUILD ONLY ======================
+# Compile the simulation without running it, so scripts/benchmark.py can time the two separately.
+
+.PHONY: build
+
+ifeq ($(SIM),verilator)
+build: $(SIM_BUILD)/Vtop
+else
+build: $(SIM_BUILD)/sim.vvp
+endif
+
+# ====================== SHARDING ======================
+# scripts/regress.py -shards splits a testbench's tests across several simulator processes with TESTCASE.
+# It asks for the cocotb modules here, builds once with JOB_TARGETS=build and points every shard's SIM_BUILD at it.
+
+.PHONY: list_modules
+
+list_modules:
+	@echo $(subst $(TTS_COMMA), ,$(MODULE))
+
+.PHONY: dump_on_fail dump_signals_check
+
+dump_on_fail:
+ifeq ($(DUMP_ON_FAIL),yes)
+	@python3 $(TTS_SCRIPTS_DIR)/dumponfail.py $(COCOTB_RESULTS_FILE) -makefile $(TTS_MAKEFILE) \
+		-window $(DUMP_FAIL_NS) -format $(DUMP_FORMAT)
+endif
@@ -0,0 +1,66 @@
+// Waveform dump control, shared by the testbench wrappers.
+//
+// Nothing is dumped unless the simulation is run with +dump - test/common.mk turns the DUMP* make
+// variables into the plusargs below, so a normal (CI) run costs nothing.
+//
+//   +dump                  enable dumping
+//   +dump_fst              name the default dump file .fst instead of .vcd (vvp also needs -fst)
+//   +dump_file=<name>      dump file, defaults to `DUMP_NAME.vcd / .fst
+//   +dump_depth=<n>        scope levels dumped below the wrapper, 0 = all of them
+//   +dump_start=<n>        start dumping at clock cycle n of `DUMP_CLK
+//   +dump_stop=<n>         stop dumping at clock cycle n
+//   +dump_start_ns=<t>     the same window in simulation time (used when a failing test is re-run)
+//   +dump_stop_ns=<t>
+//
+// With -DDUMP_SIGNALS the `$dumpvars` list in dump_signals.vh (generated by common.mk) replaces the scope dump.
+//
+// The including wrapper defines the dump name, scope and clock first:
+//
+//   `define DUMP_NAME  "sync"
+//   `define DUMP_SCOPE sync_tb
+//   `define DUMP_CLK   clk
+//   `include "dump.vh"
+
+`ifndef VERILATOR  // Verilator traces through cocotb instead (make SIM=verilator DUMP=1)
+  reg [8*256-1:0] dump_file;
+  integer         dump_depth;
+  integer         dump_start;
+  integer         dump_stop;
+  reg [63:0]      dump_start_ns;
+  reg [63:0]      dump_stop_ns;
+
+  initial begin
+    if ($test$plusargs("dump")) begin
+      if (!$value$plusargs("dump_file=%s", dump_file))
+        dump_file = $test$plusargs("dump_fst") ? {`DUMP_NAME, ".fst"} : {`DUMP_NAME, ".vcd"};
+      if (!$value$plusargs("dump_depth=%d", dump_depth))       dump_depth = 0;
+      if (!$value$plusargs("dump_start=%d", dump_start))       dump_start = 0;
+      if (!$value$plusargs("dump_stop=%d", dump_stop))         dump_stop = -1;
+      if (!$value$plusargs("dump_start_ns=%d", dump_start_ns)) dump_start_ns = 0;
+      if (!$value$plusargs("dump_stop_ns=%d", dump_stop_ns))   dump_stop_ns = 0;
+
+      // $dumpvars is only called once the window opens, so nothing before it is written at all
+      if (dump_start_ns > 0) #(dump_start_ns);
+      repeat (dump_start) @(posedge `DUMP_CLK);
+
+      $dumpfile(dump_file);
+`ifdef DUMP_SIGNALS
+      `include "dump_signals.vh"
+`else
+      $dumpvars(dump_depth, `DUMP_SCOPE);
+`endif
+
+      if (dump_stop_ns > $time) begin
+        #(dump_stop_ns - $time);
+        $dumpoff;
+      end else if (dump_stop > dump_start) begin
+        repeat (dump_stop - dump_start) @(posedge `DUMP_CLK);
+        $dumpoff;
+      end
+    end
+  end
+`endif
+
+`undef DUMP_NAME
+`undef DUMP_SCOPE
+`undef DUMP_CLK
@@ -0,0 +1,16 @@
+// Generated by scripts/probes.py from tts.probe.PROBES["sync"] - don't edit.
+// Fields, from bit 0 up:
+//   hsync                [0:0]
+//   vsync                [1:1]
+//   display_on           [2:2]
+//   frame_end            [3:3]
+//   pix_x                [13:4]
+//   pix_y                [23:14]
+wire [23:0] probe = {
+  pix_y,
+  pix_x,
+  frame_end,
+  video_active,
+  vsync,
+  hsync
+};
@@ -0,0 +1,48 @@
+// Generated by scripts/probes.py from tts.probe.PROBES["top"] - don't edit.
+// Fields, from bit 0 up:
+//   input_data           [9:0]
+//   playerLives          [11:10]
+//   auto_rst_n           [12:12]
+//   attack_enable        [13:13]
+//   player_pos           [21:14]
+//   player_orientation   [23:22]
+//   player_direction     [25:24]
+//   sword_pos            [33:26]
+//   sword_orientation    [35:34]
+//   sheep_pos            [43:36]
+//   target_pos           [51:44]
+//   dragon_position      [59:52]
+//   dragon_direction     [61:60]
+//   VisibleSegments      [70:64]
+//   Dragon_1             [80:71]
+//   Dragon_2             [90:81]
+//   Dragon_3             [100:91]
+//   Dragon_4             [110:101]
+//   Dragon_5             [120:111]
+//   Dragon_6             [137:128]
+//   Dragon_7             [147:138]
+wire [147:0] probe = {
+  dut.Dragon_7,
+  dut.Dragon_6,
+  7'b0,
+  dut.Dragon_5,
+  dut.Dragon_4,
+  dut.Dragon_3,
+  dut.Dragon_2,
+  dut.Dragon_1,
+  dut.VisibleSegments,
+  2'b0,
+  dut.dragon_direction,
+  dut.dragon_position,
+  dut.target_pos,
+  dut.sheep_pos,
+  dut.sword_orientation,
+  dut.sword_pos,
+  dut.player_direction,
+  dut.player_orientation,
+  dut.player_pos,
+  dut.attack_enable,
+  dut.auto_rst_n,
+  dut.playerLives,
+  dut.input_data
+};
@@ -0,0 +1,5 @@
+"""Shared cocotb helpers and golden models for the Tiny Tapestation testbenches.
+
+test/common.mk puts test/lib on the PYTHONPATH of every testbench, so test modules can
+`from tts.<module> import ...` alongside their own tb/ folder.
+"""
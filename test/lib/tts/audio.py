@@ -0,0 +1,280 @@
+"""APU sound capture, PWM demodulation and analysis.
+
+The APU's `sound` output is a 1-bit pulse width modulated stream at the pixel clock. The recorder
+wakes only when it changes and stores the clock cycle of each change in preallocated arrays, so
+recording seconds of audio costs a few Python wake-ups per line instead of one per clock cycle.
+The stream is kept as runs (the cycle each run starts at and its value) and everything after
+that is vectorised NumPy:
+
+    runs -> boxcar average to `oversample` x rate -> FIR low-pass -> decimate to rate (48 kHz)
+
+stream_pcm does the same straight from chunks of samples, for recordings too long to keep as runs.
+
+Audio time is always in chip clock cycles (CLOCK_HZ), whatever clock period the testbench uses.
+"""
+
+import wave
+
+import cocotb
+import numpy as np
+from cocotb.triggers import Edge, RisingEdge, Timer
+from cocotb.utils import get_sim_time
+
+from tts.sync_model import FRAME_CYCLES, H_DISPLAY, H_TOTAL, V_DISPLAY, counters
+
+CLOCK_HZ = 25_000_000   # chip clock (info.yaml)
+AUDIO_RATE = 48_000     # output sample rate
+OVERSAMPLE = 4          # the boxcar stage runs at OVERSAMPLE x AUDIO_RATE before the FIR
+FIR_TAPS = 127
+FIR_CUTOFF = 20_000     # Hz, keeps the audio band and removes the 31.25 kHz line rate
+
+# oscillator and envelopes in src/APU.v
+OSC_PERIOD = 0xAAAA
+OSC_LOG2_STEP = 2
+OSC_BITS = 16
+SQUARE_WRAPS = 8        # the square wave toggles every 8 oscillator wraps
+
+
+class SoundRecorder:
+    """Record a 1-bit signal as runs of clock cycles.
+
+    Cycle 0 is the rising edge of `clk` the recording starts on; `period_ns` must match that clock.
+    The value of a cycle is the value of the signal after that cycle's edge.
+    """
+
+    def __init__(self, clk, sound, period_ns, capacity=1 << 16):
+        self.clk = clk
+        self.sound = sound
+        self.period_ns = period_ns
+        self.starts = np.empty(capacity, dtype=np.int64)
+        self.values = np.empty(capacity, dtype=np.uint8)
+        self.count = 0
+        self.n_cycles = 0
+        self._start_ns = 0
+        self._task = None
+
+    def _level(self):
+        return 1 if str(self.sound.value) == "1" else 0  # x/z read as 0
+
+    def _append(self, cycle, value):
+        if self.count and self.starts[self.count - 1] == cycle:
+            self.count -= 1  # several changes within one cycle, only the last one counts
+        if self.count and self.values[self.count - 1] == value:
+            return
+        if self.count == len(self.starts):
+            self.starts = np.concatenate([self.starts, np.empty_like(self.starts)])
+            self.values = np.concatenate([self.values, np.empty_like(self.values)])
+        self.starts[self.count] = cycle
+        self.values[self.count] = value
+        self.count += 1
+
+    async def _monitor(self):
+        edge = Edge(self.sound)
+        while True:
+            await edge
+            cycle = (get_sim_time("ns") - self._start_ns) // self.period_ns
+            self._append(int(cycle), self._level())
+
+    async def start(self):
+        """Start recording on the next rising edge of the clock."""
+        await RisingEdge(self.clk)
+        self._start_ns = get_sim_time("ns")
+        self.count = 0
+        self._append(0, self._level())
+        self._task = cocotb.start_soon(self._monitor())
+
+    def stop(self):
+        """Stop recording; the recording ends at the current clock cycle."""
+        if self._task is not None:
+            self._task.kill()
+            self._task = None
+        self.n_cycles = int((get_sim_time("ns") - self._start_ns) // self.period_ns)
+
+    async def record(self, n_cycles):
+        """Record the next `n_cycles` clock cycles."""
+        await self.start()
+        await Timer(n_cycles * self.period_ns, units="ns")
+        self.stop()
+
+    def runs(self):
+        """(run start cycles, run values, total cycles) of the recording."""
+        keep = self.starts[:self.count] < self.n_cycles
+        return self.starts[:self.count][keep], self.values[:self.count][keep], self.n_cycles
+
+    def packed(self):
+        """The recording as one bit per cycle, packed LSB first (the same layout as scripts/waves.py -audio)."""
+        return pack_runs(*self.runs())
+
+    def pcm(self, rate=AUDIO_RATE, clock_hz=CLOCK_HZ):
+        return runs_to_pcm(*self.runs(), rate=rate, clock_hz=clock_hz)
+
+
+def bits_to_runs(chunks):
+    """Turn an iterable of 0/1 uint8 arrays (one sample per cycle) into (starts, values, total cycles)."""
+    starts, values = [], []
+    offset = 0
+    last = None
+    for chunk in chunks:
+        chunk = np.asarray(chunk, dtype=np.uint8)
+        if not len(chunk):
+            continue
+        change = np.flatnonzero(np.diff(chunk)) + 1
+        if last != chunk[0]:
+            change = np.concatenate([[0], change])
+        starts.append(change + offset)
+        values.append(chunk[change])
+        last = chunk[-1]
+        offset += len(chunk)
+    if not starts:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.uint8), 0
+    return np.concatenate(starts).astype(np.int64), np.concatenate(values), offset
+
+
+def unpack_bits(packed, n_cycles, chunk=1 << 20):
+    """Yield the cycles of a bit packed recording (LSB first) as 0/1 uint8 chunks."""
+    for first in range(0, n_cycles, chunk):
+        count = min(chunk, n_cycles - first)
+        yield np.unpackbits(packed[first // 8:(first + count + 7) // 8], bitorder="little")[:count]
+
+
+def pack_runs(starts, values, n_cycles, chunk=1 << 20):
+    """Pack runs into one bit per cycle, LSB first, without expanding the whole recording at once."""
+    lengths = np.diff(np.append(starts, n_cycles))
+    out = np.zeros((n_cycles + 7) // 8, dtype=np.uint8)
+    for first in range(0, n_cycles, chunk):  # chunk is a multiple of 8, so each chunk packs to whole bytes
+        last = min(first + chunk, n_cycles)
+        j = max(np.searchsorted(starts, first, side="right") - 1, 0)
+        k = np.searchsorted(starts, last, side="left")
+        run_starts = np.maximum(starts[j:k], first)
+        run_ends = np.minimum(starts[j:k] + lengths[j:k], last)
+        bits = np.repeat(values[j:k], run_ends - run_starts)
+        out[first // 8:(last + 7) // 8] = np.packbits(bits, bitorder="little")
+    return out
+
+
+def high_cycles(starts, values, at):
+    """Number of high cycles before each cycle in `at` (the integral of the PWM stream)."""
+    lengths = np.diff(starts)
+    before = np.concatenate([[0], np.cumsum(values[:-1].astype(np.int64) * lengths)])
+    j = np.searchsorted(starts, at, side="right") - 1
+    return before[j] + values[j] * (at - starts[j])
+
+
+def lowpass_taps(cutoff, fs, n_taps=FIR_TAPS):
+    """Hamming windowed-sinc low-pass FIR with unity DC gain."""
+    n = np.arange(n_taps) - (n_taps - 1) / 2
+    taps = np.sinc(2 * cutoff / fs * n) * np.hamming(n_taps)
+    return taps / taps.sum()
+
+
+def runs_to_pcm(starts, values, n_cycles, rate=AUDIO_RATE, clock_hz=CLOCK_HZ, oversample=OVERSAMPLE):
+    """Demodulate the PWM runs into audio samples at `rate`, as the duty cycle (0 to 1) around each sample."""
+    if not len(starts):
+        return np.zeros(0)
+    fs = rate * oversample
+    n_fast = n_cycles * fs // clock_hz
+    bounds = np.arange(n_fast + 1, dtype=np.int64) * clock_hz // fs
+    duty = np.diff(high_cycles(starts, values, bounds)) / np.diff(bounds)  # boxcar average over each fast sample
+    filtered = np.convolve(duty, lowpass_taps(FIR_CUTOFF, fs), mode="same")
+    return filtered[::oversample]
+
+
+def stream_pcm(chunks, rate=AUDIO_RATE, clock_hz=CLOCK_HZ, oversample=OVERSAMPLE):
+    """Demodulate an iterable of 0/1 uint8 arrays (one sample per cycle) like runs_to_pcm, a chunk at a time.
+
+    Yields blocks of audio samples that together equal runs_to_pcm of the whole stream. The boxcar
+    carries its high count and the start of the fast sample it is in over from chunk to chunk, and
+    the FIR the fast samples it still needs, so memory is a chunk however long the recording is.
+    """
+    fs = rate * oversample
+    taps = lowpass_taps(FIR_CUTOFF, fs)
+    half = len(taps) // 2
+    history = np.zeros(half)  # mode="same" pads the start with zeros
+    cycles = high = n_fast = n_filtered = 0
+    high_at_bound = 0  # high cycles before the start of fast sample n_fast
+
+    def filter_block(history):
+        nonlocal n_filtered
+        filtered = np.convolve(history, taps, mode="valid")
+        block = filtered[-n_filtered % oversample::oversample]
+        n_filtered += len(filtered)
+        return history[len(filtered):], block
+
+    for chunk in chunks:
+        chunk = np.asarray(chunk, dtype=np.uint8)
+        if not len(chunk):
+            continue
+        integral = high + np.concatenate([[0], np.cumsum(chunk, dtype=np.int64)])  # high cycles before each cycle
+        ready = (cycles + len(chunk)) * fs // clock_hz
+        bounds = np.arange(n_fast, ready + 1, dtype=np.int64) * clock_hz // fs  # all but the first in this chunk
+        at = np.concatenate([[high_at_bound], integral[bounds[1:] - cycles]])
+        history = np.concatenate([history, np.diff(at) / np.diff(bounds)])
+        high_at_bound, high = at[-1], integral[-1]
+        cycles += len(chunk)
+        n_fast = ready
+        if len(history) >= len(taps):
+            history, block = filter_block(history)
+            yield block
+
+    if n_fast:
+        yield filter_block(np.concatenate([history, np.zeros(half)]))[1]
+
+
+def write_wav(path, pcm, rate=AUDIO_RATE):
+    """Write demodulated audio as a 16-bit mono WAV, with the DC removed and normalised to -1 dBFS."""
+    audio = pcm - pcm.mean() if len(pcm) else pcm
+    peak = np.abs(audio).max() if len(audio) else 0
+    if peak > 0:
+        audio = audio * (0.89 / peak)
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes((audio * 32767).astype("<i2").tobytes())
+
+
+def spectrum(pcm, rate=AUDIO_RATE):
+    """(frequencies, magnitudes) of the Hann windowed FFT of the audio, with the DC removed."""
+    window = np.hanning(len(pcm))
+    magnitude = np.abs(np.fft.rfft((pcm - pcm.mean()) * window))
+    return np.fft.rfftfreq(len(pcm), 1 / rate), magnitude
+
+
+def fundamental(pcm, rate=AUDIO_RATE, fmin=20, fmax=4000):
+    """Frequency of the strongest component between fmin and fmax, refined by parabolic interpolation."""
+    freqs, magnitude = spectrum(pcm, rate)
+    band = np.flatnonzero((freqs >= fmin) & (freqs <= fmax))
+    peak = band[np.argmax(magnitude[band])]
+    if 0 < peak < len(magnitude) - 1:
+        a, b, c = np.log(magnitude[peak - 1:peak + 2] + 1e-12)
+        offset = 0.5 * (a - c) / (a - 2 * b + c)
+        return freqs[peak] + offset * (freqs[1] - freqs[0])
+    return freqs[peak]
+
+
+def square_period(period=OSC_PERIOD, log2_step=OSC_LOG2_STEP, bits=OSC_BITS):
+    """Square wave period in clock cycles, from one full cycle of the APU's oscillator counter."""
+    delta = (period - (1 << log2_step)) % (1 << bits)
+    length = (1 << bits) // np.gcd(delta, 1 << bits)  # cycles before the counter repeats
+    counter = (np.arange(length, dtype=np.int64) * delta) % (1 << bits)
+    wraps = np.count_nonzero((counter >> log2_step) == 0)
+    return 2 * SQUARE_WRAPS * length / wraps
+
+
+def envelope_timer(frame):
+    """The APU's envelope timer (frame_counter) during the visible lines of a frame after reset.
+
+    x and y come from the sync generator, which reads 0 all through the blanking intervals, so the
+    timer advances on every blanking cycle of line 0 and of the vertical blanking lines - 7406 steps
+    a frame rather than one - and only holds still while the visible lines are drawn.
+    """
+    hpos, vpos = counters(FRAME_CYCLES)
+    at_origin = ((hpos == 0) | (hpos >= H_DISPLAY)) & ((vpos == 0) | (vpos >= V_DISPLAY))
+    per_frame = np.count_nonzero(at_origin)
+    line_0 = np.count_nonzero(at_origin[:H_TOTAL])
+    return np.asarray(frame) * per_frame + line_0
+
+
+def envelope_a(timer):
+    """envelopeA in src/APU.v for an envelope timer value (counts down from 31 as the timer advances)."""
+    return 31 - (np.asarray(timer) & 31)
@@ -0,0 +1,61 @@
+"""Vectorised model of CollisionDetector: the outputs after every clock edge of many checks at once.
+
+A check holds one set of inputs for a reset cycle (vsync, in the top level) and then RUN_CYCLES
+cycles of the segment sweep. collision_outputs() takes a batch of checks played back to back and
+returns what the three collision outputs read after each of their edges, computed with one NumPy
+pass per cycle of a check over the whole batch.
+
+Two details of the RTL shape the results. checksegment is registered from the same segmentCounter
+that picks the segment, so segment n is loaded when the active bit of segment n-1 is set (segment 0
+on the last bit of the check before). And dragonSegment, checksegment and player_attacking have no
+reset, so every check starts by comparing against the segment the one before it left behind.
+"""
+
+import numpy as np
+
+SEGMENTS = 7
+RUN_CYCLES = 10  # enough for segmentCounter to reach the last segment and that segment to be compared
+CHECK_CYCLES = 1 + RUN_CYCLES
+
+# output bits
+PLAYER = 1
+SWORD = 2
+SHEEP = 4
+
+
+def collision_outputs(player, sword, sheep, segments, active, run_cycles=RUN_CYCLES):
+    """{sheep, sword, player} collisions after each edge of each check, as a (checks, 1 + run_cycles) array.
+
+    `segments` holds the 7 positions of each check, segment 0 (dragonSegmentPositions[7:0]) first, and
+    `active` the activeDragonSegments masks. The registers the first check starts from aren't known, so
+    its outputs are only a guess: lead a stream with a check that loads a segment and ignore it.
+    """
+    player, sword, sheep, active = (np.asarray(values, dtype=np.int64) for values in (player, sword, sheep, active))
+    segments = np.asarray(segments, dtype=np.int64)
+    checks = len(player)
+
+    # run edge j loads segment min(j, 6) when checksegment is set: from the check before on edge 0, and
+    # from active bit min(j - 1, 6) after that
+    last_check = np.concatenate(([False], ((active[:-1] >> (SEGMENTS - 1)) & 1) != 0))
+    gates = [last_check] + [((active >> min(j - 1, SEGMENTS - 1)) & 1) != 0 for j in range(1, run_cycles)]
+    loads = [segments[:, min(j, SEGMENTS - 1)] for j in range(run_cycles)]
+
+    # dragonSegment at the end of each check: its own last load, or the one it started with
+    last = np.full(checks, -1)
+    for gate, segment in zip(gates, loads):
+        last = np.where(gate, segment, last)
+    source = np.maximum.accumulate(np.where(last >= 0, np.arange(checks), -1))
+    left = np.where(source >= 0, last[source], -1)
+    segment = np.concatenate(([-1], left[:-1]))
+
+    attacking = np.concatenate(([False], sword[:-1] != 0))  # player_attacking, from the check before
+    outputs = np.zeros((checks, 1 + run_cycles), dtype=np.int64)
+    flags = np.zeros(checks, dtype=np.int64)
+    for j in range(run_cycles):
+        flags |= np.where(player == segment, PLAYER, 0)
+        flags |= np.where((sword == segment) & attacking, SWORD, 0)
+        flags |= np.where(sheep == segment, SHEEP, 0)
+        outputs[:, 1 + j] = flags
+        segment = np.where(gates[j], loads[j], segment)
+        attacking = sword != 0
+    return outputs
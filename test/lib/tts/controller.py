@@ -0,0 +1,212 @@
+"""Bus-functional models of the NES controller and the SNES Gamepad Pmod.
+
+NESController plays the controller end of the NES port: the chip drives latch and clock, and the
+model only wakes on their rising edges to put the next button on the data line, like the 4021
+shift register inside the pad. Thousands of frames of input therefore cost a handful of Python
+wake-ups per controller read instead of one per clock cycle.
+
+SNESPmod plays the Gamepad Pmod, which is the bus master on its side: it clocks the 12 button
+bits into the chip and pulses the latch, using one Timer per edge.
+
+Buttons are held as a word with bit i set when BUTTONS[i] is pressed, and can be set by name:
+
+    pad = NESController(dut.nes_latch, dut.nes_clk, Pin(dut.ui_in, 0))
+    pad.start()
+    pad.press("A", "RIGHT")
+    await pad.wait_reads(2)   # the chip has read the new buttons
+
+Data and clock pins are either a 1-bit signal or a Pin (one bit of a bus such as ui_in).
+"""
+
+import cocotb
+from cocotb.triggers import Event, First, RisingEdge, Timer
+from cocotb.utils import get_sim_time
+
+# shift order on the wire, first bit out first
+NES_BUTTONS = ("A", "B", "SELECT", "START", "UP", "DOWN", "LEFT", "RIGHT")
+SNES_BUTTONS = ("B", "Y", "SELECT", "START", "UP", "DOWN", "LEFT", "RIGHT", "A", "X", "L", "R")
+
+SNES_MAX_PRESSED = 2  # gamepad_pmod_decoder ignores words with more buttons pressed than this
+SNES_BIT_CYCLES = 8   # Pmod half clock period in chip clock cycles, well clear of the 2-FF synchronisers
+
+
+class Pin:
+    """One bit of a bus driven from cocotb, written without disturbing the other bits.
+
+    cocotb only applies writes at the end of the time step, so a bus written twice in one step
+    reads back stale; the last word written is kept and reused until time moves on.
+    """
+
+    _written = {}  # bus -> (sim time, word) of the last write through any Pin
+
+    def __init__(self, bus, bit):
+        self.bus = bus
+        self.bit = bit
+
+    def _word(self):
+        time, word = self._written.get(self.bus, (None, 0))
+        return word if time == get_sim_time() else int(self.bus.value)
+
+    @property
+    def value(self):
+        return (self._word() >> self.bit) & 1
+
+    @value.setter
+    def value(self, level):
+        word = self._word()
+        word = (word | (1 << self.bit)) if level else (word & ~(1 << self.bit))
+        self._written[self.bus] = (get_sim_time(), word)
+        self.bus.value = word
+
+
+class _Buttons:
+    """Button word shared by both controllers."""
+
+    BUTTONS = ()
+
+    def __init__(self):
+        self.buttons = 0
+        self._task = None
+
+    def word(self, *names):
+        """The button word with the named buttons pressed."""
+        word = 0
+        for name in names:
+            word |= 1 << self.BUTTONS.index(name.upper())
+        return word
+
+    def pressed(self):
+        """Names of the buttons currently pressed."""
+        return [name for i, name in enumerate(self.BUTTONS) if (self.buttons >> i) & 1]
+
+    def press(self, *names):
+        self.buttons |= self.word(*names)
+
+    def release(self, *names):
+        self.buttons &= ~self.word(*names)
+
+    def release_all(self):
+        self.buttons = 0
+
+    def stop(self):
+        if self._task is not None:
+            self._task.kill()
+            self._task = None
+
+
+class NESController(_Buttons):
+    """NES controller on the chip's latch/clock/data port (data is active low, 0 = pressed).
+
+    The buttons are loaded on the rising edge of `latch`, which puts A on the data line; each
+    rising edge of `clk` then shifts out the next one. After the eighth bit the line reads
+    released (1), as on an original pad. Changes to `buttons` are picked up at the next latch.
+    """
+
+    BUTTONS = NES_BUTTONS
+
+    def __init__(self, latch, clk, data):
+        super().__init__()
+        self.latch = latch
+        self.clk = clk
+        self.data = data
+        self.reads = 0        # latch pulses seen
+        self.clocks = 0       # clock pulses since the last latch
+        self.last_clocks = 0  # clock pulses of the previous complete read
+        self._latched = Event()
+
+    def _drive(self, shift, index):
+        pressed = index < len(self.BUTTONS) and (shift >> index) & 1
+        self.data.value = 0 if pressed else 1
+
+    async def _run(self):
+        latch_edge = RisingEdge(self.latch)
+        either_edge = First(latch_edge, RisingEdge(self.clk))
+        shift = 0
+        index = len(self.BUTTONS)
+        self._drive(shift, index)
+        while True:
+            if await either_edge is latch_edge:
+                if self.reads:
+                    self.last_clocks = self.clocks
+                self.reads += 1
+                self.clocks = 0
+                shift, index = self.buttons, 0
+                self._latched.set()
+            else:
+                self.clocks += 1
+                index += 1
+            self._drive(shift, index)
+
+    def start(self):
+        """Answer the chip's reads in the background until stop() is called."""
+        self.stop()
+        self._task = cocotb.start_soon(self._run())
+
+    async def wait_reads(self, n=1):
+        """Wait for `n` more latch pulses. The read that started before the last one has finished."""
+        for _ in range(n):
+            self._latched.clear()
+            await self._latched.wait()
+
+
+class SNESPmod(_Buttons):
+    """Gamepad Pmod driving the chip's SNES pins (data is active high, 1 = pressed).
+
+    send() clocks the 12 bits out, B first, with data set up half a bit period before each rising
+    edge of `clk`, then pulses `latch`, which copies them into the chip. A disconnected pad is sent
+    as all ones, which the chip reads as "not present". `half_period_ns` has to cover a couple
+    of chip clock cycles for the synchronisers to see every edge (see SNES_BIT_CYCLES).
+    """
+
+    BUTTONS = SNES_BUTTONS
+
+    def __init__(self, data, clk, latch, half_period_ns):
+        super().__init__()
+        self.data = data
+        self.clk = clk
+        self.latch = latch
+        self.half_period_ns = half_period_ns
+        self.connected = True
+        self.sent = 0
+
+    def idle(self):
+        """Drive all three pins low, as the Pmod does between updates."""
+        self.data.value = 0
+        self.clk.value = 0
+        self.latch.value = 0
+
+    def frame_bits(self):
+        """The bits as they go out on the wire, first bit first."""
+        word = self.buttons if self.connected else (1 << len(self.BUTTONS)) - 1
+        return [(word >> i) & 1 for i in range(len(self.BUTTONS))]
+
+    async def send(self):
+        """Clock out the current buttons and latch them into the chip."""
+        half = Timer(self.half_period_ns, units="ns")
+        for bit in self.frame_bits():
+            self.data.value = bit
+            await half
+            self.clk.value = 1
+            await half
+            self.clk.value = 0
+        self.data.value = 0
+        await half
+        self.latch.value = 1
+        await half
+        await half
+        self.latch.value = 0
+        await half
+        self.sent += 1
+
+    def start(self, interval_ns):
+        """Send the buttons every `interval_ns` in the background until stop() is called."""
+        async def run():
+            while True:
+                await self.send()
+                await Timer(max(interval_ns - self.bus_time_ns(), self.half_period_ns), units="ns")
+        self.stop()
+        self._task = cocotb.start_soon(run())
+
+    def bus_time_ns(self):
+        """Length of one send()."""
+        return (2 * len(self.BUTTONS) + 4) * self.half_period_ns
@@ -0,0 +1,202 @@
+"""Lightweight functional coverage over DUT signals, with early termination and a shared database.
+
+A CoverGroup holds Coverpoints, each with named bins over the value of one or more signals:
+
+    cov = CoverGroup("sync")
+    cov.add(Coverpoint("vpos", {"display": range(0, 480), "vsync": (490, 491)}, width=10), uut.sync_gen.vpos)
+    cov.add(Transitions("hsync"), uut.hsync)
+    cov.add(Coverpoint("triggers", cross_bins("sheep", "sword", "player"), width=3), sheep, sword, player)
+
+Every coverpoint keeps a lookup table from value to bin and a NumPy array of hit counters, so a sample
+costs one table lookup per point, and whole captures (see tts.capture) are binned in one call with
+sample_arrays(). Random tests check `cov.covered`, or pick their next stimulus from `uncovered()`,
+and stop as soon as every bin has been hit `goal` times instead of running for a fixed time.
+
+With COVERAGE_DB=<dir> set (make COVERAGE_DB=..., or scripts/regress.py, which shares one directory
+between all its jobs), each group starts from the hits that earlier and parallel runs saved there,
+so bins another run already hit count as covered, and save() adds this run's hits to the directory.
+merge() sums a directory into one database.
+"""
+
+import glob
+import json
+import os
+
+import numpy as np
+from cocotb.triggers import Event
+
+DB_ENV = "COVERAGE_DB"
+
+
+class Coverpoint:
+    """Named bins over a `width`-bit value. A bin is a value, or an iterable of values (e.g. a range)."""
+
+    def __init__(self, name, bins, width, goal=1):
+        self.name = name
+        self.width = width
+        self.goal = goal
+        self.bins = list(bins)
+        self.values = []
+        self.lookup = np.full(1 << width, -1, dtype=np.int32)
+        for index, values in enumerate(bins.values()):
+            values = [values] if isinstance(values, int) else list(values)
+            self.values.append(values)
+            self.lookup[values] = index
+        self.hits = np.zeros(len(self.bins), dtype=np.int64)
+        self.prior = np.zeros(len(self.bins), dtype=np.int64)  # hits of other runs, from the database
+
+    def sample(self, value):
+        index = self.lookup[value]
+        if index >= 0:
+            self.hits[index] += 1
+
+    def sample_array(self, values):
+        index = self.lookup[np.asarray(values, dtype=np.int64)]
+        self.hits += np.bincount(index[index >= 0], minlength=len(self.bins))
+
+    def uncovered(self):
+        """Names of the bins that haven't been hit `goal` times, in this run or a previous one."""
+        return [name for name, total in zip(self.bins, self.hits + self.prior) if total < self.goal]
+
+    def values_of(self, name):
+        return self.values[self.bins.index(name)]
+
+    @property
+    def covered(self):
+        return bool(np.all(self.hits + self.prior >= self.goal))
+
+
+class Transitions(Coverpoint):
+    """Rising and falling edges of a `width`-bit signal, or any value-to-value change given as (from, to) bins."""
+
+    def __init__(self, name, bins=None, width=1, goal=1):
+        bins = bins or {"rise": (0, 1), "fall": (1, 0)}
+        super().__init__(name, {bin: (a << width) | b for bin, (a, b) in bins.items()}, 2 * width, goal)
+        self.signal_width = width
+        self.last = None
+
+    def sample(self, value):
+        if self.last is not None:
+            super().sample((self.last << self.signal_width) | value)
+        self.last = value
+
+    def sample_array(self, values):
+        values = np.asarray(values, dtype=np.int64)
+        if self.last is not None:
+            values = np.concatenate(([self.last], values))
+        if values.size:
+            super().sample_array((values[:-1] << self.signal_width) | values[1:])
+            self.last = int(values[-1])
+
+
+def cross_bins(*names):
+    """One bin per combination of 1-bit signals, named after the ones that are set ("none" for 0)."""
+    return {"+".join(name for bit, name in enumerate(names) if (value >> bit) & 1) or "none": value
+            for value in range(1 << len(names))}
+
+
+class CoverGroup:
+    """Coverpoints sampled together from DUT signals."""
+
+    def __init__(self, name, db=None):
+        self.name = name
+        self.db = db if db is not None else os.environ.get(DB_ENV)
+        self.points = []
+        self._covered = Event()
+        self._prior = load(self.db).get(name, {}) if self.db else {}
+
+    def add(self, point, *signals):
+        """Cover `point`, sampling the signals packed into one value (the first signal in the lowest bits)."""
+        shifts = []
+        shift = 0
+        for signal in signals:
+            shifts.append(shift)
+            shift += len(signal)
+        self.points.append((point, list(zip(signals, shifts))))
+        counts = self._prior.get(point.name, {})
+        point.prior[:] = [counts.get(name, 0) for name in point.bins]
+        return point
+
+    def __getitem__(self, name):
+        return next(point for point, _ in self.points if point.name == name)
+
+    def sample(self):
+        """Sample every point from its signals now."""
+        for point, signals in self.points:
+            value = 0
+            for signal, shift in signals:
+                value |= int(signal.value) << shift
+            point.sample(value)
+        if self.covered:
+            self._covered.set()
+
+    def sample_arrays(self, arrays):
+        """Bin whole captures at once: `arrays` maps point names to arrays of sampled values."""
+        for point, _ in self.points:
+            if point.name in arrays:
+                point.sample_array(arrays[point.name])
+        if self.covered:
+            self._covered.set()
+
+    async def sample_on(self, trigger):
+        """Sample every time `trigger` fires (start with cocotb.start_soon), until the group is covered."""
+        while not self.covered:
+            await trigger
+            self.sample()
+
+    async def wait_covered(self):
+        await self._covered.wait()
+
+    @property
+    def covered(self):
+        return all(point.covered for point, _ in self.points)
+
+    def uncovered(self):
+        """{point name: [uncovered bin names]} for every point that still has some."""
+        return {point.name: point.uncovered() for point, _ in self.points if not point.covered}
+
+    def to_dict(self):
+        return {point.name: dict(zip(point.bins, point.hits.tolist())) for point, _ in self.points}
+
+    def report(self):
+        lines = [f"COVERAGE {self.name}:"]
+        for point, _ in self.points:
+            total = point.hits + point.prior
+            hit = int(np.sum(total >= point.goal))
+            lines.append(f"  {point.name}: {hit}/{len(point.bins)} bins"
+                         + (f", missing {', '.join(point.uncovered())}" if hit < len(point.bins) else ""))
+        return "\n".join(lines)
+
+    def save(self, db=None):
+        """Add this run's hits to the database directory (one file per run, so parallel runs never clash)."""
+        db = db or self.db
+        if not db:
+            return None
+        os.makedirs(db, exist_ok=True)
+        path = os.path.join(db, f"{self.name}.{os.getpid()}.{id(self):x}.json")
+        with open(path + ".new", "w") as f:
+            json.dump({self.name: self.to_dict()}, f)
+        os.replace(path + ".new", path)
+        return path
+
+
+def load(db):
+    """Sum every database file in a directory (or a single merged file) into {group: {point: {bin: hits}}}."""
+    paths = [db] if os.path.isfile(db) else sorted(glob.glob(os.path.join(db, "*.json")))
+    merged = {}
+    for path in paths:
+        with open(path) as f:
+            for group, points in json.load(f).items():
+                for point, bins in points.items():
+                    counts = merged.setdefault(group, {}).setdefault(point, {})
+                    for name, hits in bins.items():
+                        counts[name] = counts.get(name, 0) + hits
+    return merged
+
+
+def merge(db, path):
+    """Write the sum of a database directory to one file and return it."""
+    merged = load(db)
+    with open(path, "w") as f:
+        json.dump(merged, f, indent=1, sort_keys=True)
+    return merged
@@ -0,0 +1,532 @@
+"""NumPy model of the game logic, stepped a frame at a time and batched over many independent games.
+
+The gameplay modules (PlayerLogic, DragonHead, DragonBody, DragonTarget, Hearts, CollisionDetector,
+rng and the glue in tt_um_enjimneering_tts_top) only change state at a few points of a frame:
+
+  - frame_end: player_trigger and collector_trigger advance the player and dragon state machines
+  - the controller: NES_Reciever polls the pad all the time, so a button change reaches the
+    InputCollector at the first read after it - a few thousand cycles later, maybe after vsync
+  - vsync: Hearts, DragonHead and DragonBody act on its rising edge, and the CollisionDetector
+    is held in reset while it is high, then sweeps the dragon segments again
+
+Everything in between is steady, so the model clocks the RTL's registers (one NumPy array each,
+one entry per game) for a few edges from each of those points and jumps over the rest - about a
+hundred edges per 420,000-cycle frame, whatever the number of games:
+
+    model = GameModel(games=4096, tolerance=1)
+    for frame in range(100_000):
+        model.step(buttons)           # InputCollector words, one per game: button_word("A", "RIGHT")
+    model.state()["playerLives"]
+
+The model matches the RTL frame for frame at every frame_end (ReplayDriver checks it against the
+probe bus, see tts.replay), except for the sheep: the rng re-seeds itself from the timer, the
+player and the dragon every clock cycle, so a respawned sheep is drawn from a NumPy generator with
+the same distribution instead - step() takes the RTL's sheep position when scoreboarding. The SNES
+Pmod's buttons are applied SNES_EDGE cycles after frame_end, roughly when ReplayDriver's send lands.
+
+Registers without a reset start at 0, as in Verilator, so the scoreboard supports Verilator only:
+under Icarus they are X until first written and the RTL's logic can take other branches on them
+than the model does (test_input_replay runs without the model there).
+"""
+
+import numpy as np
+
+from tts.controller import SNES_BIT_CYCLES, SNES_BUTTONS
+from tts.probe import PROBES
+from tts.rng_model import draw
+from tts.sync_model import FRAME_CYCLES, H_DISPLAY, H_TOTAL, V_DISPLAY, V_SYNC_END, V_SYNC_START
+
+WORD = 0xFFFF_FFFF
+
+# sync counter value at frame_end, and the edges (counted from the frame_end edge) that raise and lower vsync
+FRAME_END = V_DISPLAY * H_TOTAL + H_DISPLAY
+VSYNC_RISE = V_SYNC_START * H_TOTAL + 1 - FRAME_END
+VSYNC_FALL = (V_SYNC_END + 1) * H_TOTAL + 1 - FRAME_END
+
+# InputCollector bits ({attack, right, left, down, up})
+BUTTON_BITS = {"UP": 1, "DOWN": 2, "LEFT": 4, "RIGHT": 8, "A": 16}
+ALL_BUTTONS = 0x1F
+
+# NES_Reciever latches the pad every NES_PERIOD cycles from power-on (first on edge NES_LATCH) and
+# shifts the buttons in one at a time, A first: each one reaches the InputCollector (the first edge
+# that clocks the new value in) NES_BUTTON_EDGES after the latch. The SNES Pmod updates them all at once.
+NES_PERIOD = 5118
+NES_LATCH = 2
+NES_BUTTON_EDGES = ((16, 603), (1, 3011), (2, 3613), (4, 4215), (8, 4817))
+SNES_EDGE = (2 * len(SNES_BUTTONS) + 2) * SNES_BIT_CYCLES  # SNESPmod.send() pulses latch this long after it starts
+SETTLE = 16  # edges clocked after frame_end, a button change, vsync rising and vsync falling
+
+RESET_CYCLES = 10  # power-on reset, as in test_top
+
+# PlayerLogic states
+IDLE_STATE = 0
+ATTACK_STATE = 1
+MOVE_STATE = 2
+ATTACK_DURATION = 4
+
+# DragonTarget behaviours
+CHASE_SHEEP = 0
+RETREAT = 1
+CHASE_PLAYER = 2
+
+DRAGON_HOME = 0xFB
+PLAYER_HOME = 0x13
+HIT_COOLDOWN = 0x01000000  # DragonBody: cycles between two hits that shrink the dragon
+SEGMENTS = 7
+
+STATE_SIGNALS = tuple(field for field, _, _ in PROBES["top"])
+
+
+def button_word(*names):
+    """InputCollector word with the named buttons held (UP, DOWN, LEFT, RIGHT, A; others are ignored)."""
+    return sum(BUTTON_BITS.get(name.upper(), 0) for name in set(names))
+
+
+class GameModel:
+    """`games` independent copies of the game logic, all starting from power-on reset.
+
+    tolerance        Hearts' PlayerTolerance: vsyncs of contact the player survives before losing a life
+    attack_cooldown  cycles after the A button is released before attack_enable is set again
+    gate_attacks     only let PlayerLogic start an attack while attack_enable is set (the RTL computes
+                     attack_enable but doesn't use it yet)
+    pad              "nes" or "snes": how button changes arrive (see NES_BUTTON_EDGES)
+    seed             seed of the generator used for sheep respawns
+    """
+
+    def __init__(self, games=1, tolerance=1, attack_cooldown=0xFF, gate_attacks=False, pad="nes", seed=None):
+        if pad not in ("nes", "snes"):
+            raise ValueError(f"unknown pad '{pad}'")
+        self.games = games
+        self.tolerance = tolerance
+        self.attack_cooldown = attack_cooldown
+        self.gate_attacks = gate_attacks
+        self.pad_kind = pad
+        self.rng = np.random.default_rng(seed)
+        self.frame = 0
+        self.cycles = np.zeros(games, dtype=np.int64)  # edges from power-on to the last frame_end
+        self.pad_changes = []
+
+        def zeros(dtype=np.int64):
+            return np.zeros(games, dtype=dtype)
+
+        # top level
+        self.timer = zeros()                # timer at the last frame_end
+        self.restart = np.full(games, -1)   # last edge of this frame the sync generator was reset on
+        self.vsync = zeros(bool)
+        self.player_trigger = zeros(bool)
+        self.collector_trigger = zeros(bool)
+        self.current_time = zeros()
+        self.attack_enable = zeros(bool)
+        self.auto_rst_n = zeros(bool)
+        self.pad = np.full(games, ALL_BUTTONS)  # NES_Reciever resets every button to pressed
+
+        # InputCollector
+        self.ic_current = zeros()
+        self.ic_previous = zeros()
+        self.ic_pressed = zeros()
+        self.ic_released = zeros()
+        self.input_data = zeros()
+
+        # Hearts
+        self.lives = np.full(games, 3)
+        self.hearts_buffer = zeros()
+        self.hearts_vsync = zeros(bool)
+        self.player_hurt = zeros(bool)
+
+        # PlayerLogic
+        self.input_buffer = zeros()
+        self.player_state = zeros()
+        self.next_player_state = zeros()
+        self.anim_counter = zeros()
+        self.player_sprite = zeros()
+        self.sword_duration = zeros()
+        self.sword_visible = zeros()
+        self.action_complete = zeros(bool)
+        self.direction_stored = zeros(bool)
+        self.last_direction = zeros()
+        self.player_pos = zeros()
+        self.player_orientation = zeros()
+        self.player_direction = zeros()
+        self.sword_pos = zeros()
+        self.sword_orientation = zeros()
+
+        # DragonTarget
+        self.behaviour = np.full(games, CHASE_SHEEP)
+        self.next_behaviour = np.full(games, CHASE_PLAYER)
+        self.target_pos = zeros()
+
+        # DragonHead
+        self.dragon_x = zeros()
+        self.dragon_y = zeros()
+        self.dx = zeros()
+        self.dy = zeros()
+        self.sx = zeros()
+        self.sy = zeros()
+        self.dragon_pos = zeros()
+        self.dragon_direction = zeros()
+        self.movement_counter = zeros()
+        self.head_vsync = zeros(bool)
+
+        # DragonBody
+        self.segments = np.zeros((games, SEGMENTS), dtype=np.int64)  # Dragon_1 .. Dragon_7, {direction, position}
+        self.visible = zeros()
+        self.heal_reg = zeros(bool)
+        self.hit_reg = zeros(bool)
+        self.hit_time = zeros()
+        self.body_vsync = zeros(bool)
+
+        # rng
+        self.rng_trigger = zeros(bool)
+        self.rand_buf = zeros()
+        self.sheep_pos = zeros()
+        self.respawn = zeros()
+
+        # CollisionDetector
+        self.check_segment = zeros(bool)
+        self.segment_counter = zeros()
+        self.dragon_segment = zeros()
+        self.player_attacking = zeros(bool)
+        self.player_hit = zeros(bool)
+        self.sword_hit = zeros(bool)
+        self.sheep_hit = zeros(bool)
+
+        # statistics since power-on
+        self.hurts = zeros()
+        self.game_overs = zeros()
+        self.sheep_eaten = zeros()
+        self.dragon_hits = zeros()
+
+    def step(self, buttons, sheep=None):
+        """Run every game up to its next frame_end with `buttons` (InputCollector words, or one for all
+        games) held on the pad. `sheep` is where a sheep eaten this frame respawns, instead of a draw."""
+        buttons = np.broadcast_to(np.asarray(buttons, dtype=np.int64) & ALL_BUTTONS, (self.games,))
+        if sheep is None:
+            self.respawn = draw(self.rng.integers(0, 256, self.games))
+        else:
+            self.respawn = np.broadcast_to(np.asarray(sheep, dtype=np.int64), (self.games,)).copy()
+
+        # the edges that something happens on, per game; the frame-0 reset takes the place of frame_end
+        self.pad_changes = self._read_pad(buttons)
+        wakes = [1] + [edges for edges, _, _ in self.pad_changes]
+        if self.frame > 0:
+            wakes += [VSYNC_RISE, VSYNC_FALL]
+        wakes = np.sort(np.column_stack(np.broadcast_arrays(*wakes)), axis=1)
+        edge = np.ones(self.games, dtype=np.int64)
+        for wake in wakes.T:
+            edge = self._settle(self._jump(edge, wake))
+
+        # a reset restarts the sync generator, so that frame ends FRAME_END cycles after it
+        end = np.where(self.restart >= 0, self.restart + FRAME_END, FRAME_CYCLES)
+        edge = self._jump(edge, end)
+        while np.any(edge < end):
+            self._clock(edge, edge < end)
+            edge = np.minimum(edge + 1, end)
+        self._clock(end)
+        self.timer = (self.timer + end) & WORD
+        self.cycles += end
+        self.restart[:] = -1
+        self.frame += 1
+
+    def _read_pad(self, buttons):
+        """[(edges, bits, values)]: the edge (per game) on which the pad's `bits` change to `values`, for
+        every group of buttons that changes in some game this frame. The first NES read after power-on
+        comes before the buttons are set, and sees none held."""
+        if self.pad_kind == "snes":
+            reads = [(SNES_EDGE + (RESET_CYCLES if self.frame == 0 else 0), buttons)]
+            timing = ((ALL_BUTTONS, 0),)
+        else:
+            latch = 1 + (NES_LATCH - 1 - self.cycles) % NES_PERIOD
+            reads = [(latch, buttons)]
+            if self.frame == 0:
+                reads = [(latch, np.zeros_like(buttons)), (latch + NES_PERIOD, buttons)]
+            timing = NES_BUTTON_EDGES
+        pad = self.pad
+        changes = []
+        for start, values in reads:
+            for bits, delay in timing:
+                if ((pad ^ values) & bits).any():
+                    changes.append((np.broadcast_to(start + delay, (self.games,)), bits, values & bits))
+                pad = (pad & ~bits) | (values & bits)
+        return changes
+
+    def _settle(self, edge):
+        """Clock from `edge` until the player settles and return the next edge. A button release stays
+        in input_data for the rest of the frame and keeps clearing action_complete, so a player in
+        MOVE_STATE moves again every other edge: to the edge of the map, where it stops - or, with two
+        opposite directions held, back and forth between two squares until the next frame_end."""
+        for _ in range(SETTLE):
+            self._clock(edge)
+            edge = edge + 1
+        while True:
+            pos = self.player_pos
+            for _ in range(4):
+                self._clock(edge)
+                edge = edge + 1
+            if np.array_equal(pos, self.player_pos):
+                return edge
+
+    def _jump(self, edge, to):
+        """Jump from `edge` towards `to` (the next edges to clock, per game) over whole 4-edge cycles of
+        a settled game, and return where each game landed: at most 3 edges before `to`."""
+        edge = np.maximum(edge, to - (to - edge) % 4)
+        self._skip_to(edge)
+        return edge
+
+    def _skip_to(self, edge):
+        """Jump to just before `edge`: while the A button's release is in input_data, the top level
+        latches the timer into current_time on every edge skipped over."""
+        held = (self.input_data & 16) != 0
+        before = np.where(held, self.timer + edge - 3, self.current_time)
+        self.attack_enable = ((self.timer + edge - 2 - before) & WORD) > self.attack_cooldown
+        self.current_time = np.where(held, (self.timer + edge - 2) & WORD, self.current_time)
+
+    def state(self):
+        """The probe bus fields (tts.replay.STATE_SIGNALS) of every game, as arrays."""
+        state = {
+            "input_data": self.input_data,
+            "playerLives": self.lives,
+            "auto_rst_n": self.auto_rst_n.astype(np.int64),
+            "attack_enable": self.attack_enable.astype(np.int64),
+            "player_pos": self.player_pos,
+            "player_orientation": self.player_orientation,
+            "player_direction": self.player_direction,
+            "sword_pos": self.sword_pos,
+            "sword_orientation": self.sword_orientation,
+            "sheep_pos": self.sheep_pos,
+            "target_pos": self.target_pos,
+            "dragon_position": self.dragon_pos,
+            "dragon_direction": self.dragon_direction,
+            "VisibleSegments": self.visible,
+        }
+        for index in range(SEGMENTS):
+            state[f"Dragon_{index + 1}"] = self.segments[:, index]
+        return {name: state[name] for name in STATE_SIGNALS}
+
+    def mismatches(self, expected, game=0):
+        """'name: model X, RTL Y' for every field of `expected` (e.g. Probe.read()) that game `game` disagrees with."""
+        state = self.state()
+        return [f"{name}: model {int(state[name][game]):#x}, RTL {int(value):#x}"
+                for name, value in expected.items() if name in state and int(state[name][game]) != int(value)]
+
+    # ------------------------------------------------------------------ one clock edge
+
+    def _clock(self, edge, active=None):
+        """Clock every register once: `edge` (per game) counts from the frame_end that started this frame,
+        so the timer read `timer + edge - 1` before it. Games where `active` is False keep their state."""
+        if active is not None:
+            before = {name: value for name, value in vars(self).items() if isinstance(value, np.ndarray)}
+            self._clock(edge)
+            for name, value in before.items():
+                mask = active if value.ndim == 1 else active[:, None]
+                setattr(self, name, np.where(mask, getattr(self, name), value))
+            return
+        timer = (self.timer + (edge - 1)) & WORD
+        vsync_next = (edge >= VSYNC_RISE) & (edge < VSYNC_FALL)
+        frame_end = (edge == 1) & (self.frame > 0)
+        rst = ~self.auto_rst_n | ((edge <= RESET_CYCLES) & (self.frame == 0))
+        for edges, bits, values in self.pad_changes:
+            self.pad = np.where(edges == edge, (self.pad & ~bits) | values, self.pad)
+        keep = ~rst
+        vsync = self.vsync
+        lives = self.lives
+        hurt = self.player_hurt
+
+        # sync generator: a reset restarts the frame, so the vsync of the frame it interrupted never comes
+        self.restart = np.where(rst, edge, self.restart)
+        self.vsync = vsync_next & (self.restart < 0)
+        player_trigger, collector_trigger = self.player_trigger, self.collector_trigger
+        self.player_trigger = np.broadcast_to(frame_end, (self.games,))
+        self.collector_trigger = player_trigger
+
+        # InputCollector
+        input_data = self.input_data
+        pressed, released = self.ic_pressed, self.ic_released
+        self.ic_pressed = self.ic_current & ~self.ic_previous & ALL_BUTTONS
+        self.ic_released = self.ic_previous & ~self.ic_current & ALL_BUTTONS
+        self.ic_previous = self.ic_current
+        self.ic_current = self.pad
+        self.input_data = np.where(collector_trigger, 0, input_data | (pressed << 5) | released)
+
+        # attack enable
+        attack_released = (input_data & 16) != 0
+        self.attack_enable = ((timer - self.current_time) & WORD) > self.attack_cooldown
+        self.current_time = np.where(attack_released, timer, self.current_time)
+        self.auto_rst_n = lives != 0
+
+        # CollisionDetector (reset by vsync)
+        run = ~vsync
+        segment = self.dragon_segment
+        player_hit = self.player_hit | (self.player_pos == segment)
+        sword_hit = self.sword_hit | ((self.sword_pos == segment) & self.player_attacking)
+        sheep_hit = self.sheep_hit | (self.sheep_pos == segment)
+        counter = self.segment_counter
+        load = run & self.check_segment
+        rows = np.arange(self.games)
+        self.dragon_segment = np.where(load, self.segments[rows, SEGMENTS - 1 - counter] & 0xFF, segment)
+        self.check_segment = np.where(run, ((self.visible >> counter) & 1) != 0, self.check_segment)
+        self.segment_counter = np.where(run, np.minimum(counter + 1, SEGMENTS - 1), 0)
+        self.player_attacking = np.where(run, self.sword_pos != 0, self.player_attacking)
+        player_hit_now, sword_hit_now, sheep_hit_now = self.player_hit, self.sword_hit, self.sheep_hit
+        self.player_hit = run & player_hit
+        self.sword_hit = run & sword_hit
+        self.sheep_hit = run & sheep_hit
+
+        # Hearts
+        vsync_edge = keep & (vsync != self.hearts_vsync)
+        vsync_rise = vsync_edge & vsync
+        contact = vsync_rise & player_hit_now
+        tolerated = contact & (self.tolerance > self.hearts_buffer)
+        damaged = contact & ~tolerated
+        self.hearts_buffer = np.where(tolerated, self.hearts_buffer + 1, np.where(vsync_rise, 0, self.hearts_buffer))
+        self.player_hurt = damaged & (lives > 0)
+        self.lives = np.where(rst, 3, lives - self.player_hurt)
+        self.hearts_vsync = np.where(vsync_edge, vsync, self.hearts_vsync)
+        self.hurts += self.player_hurt
+        self.game_overs += self.player_hurt & (lives == 1)
+
+        self._player_logic(rst | hurt, player_trigger, input_data)
+        self._dragon(rst, collector_trigger, vsync, timer, player_hit_now, sword_hit_now, sheep_hit_now)
+
+    def _player_logic(self, reset, trigger, input_data):
+        keep = ~reset
+        pressed = input_data >> 5
+        released = (input_data & ALL_BUTTONS) != 0
+        state = self.player_state
+        buffer = self.input_buffer
+        complete = self.action_complete
+        stored = self.direction_stored
+        pos = self.player_pos
+        direction = self.player_direction
+        duration = self.sword_duration
+
+        # input FSM
+        self.input_buffer = np.where(reset, 0, np.where(pressed != 0, pressed, np.where(released, 0, buffer)))
+        self.player_state = np.where(reset, IDLE_STATE, np.where(trigger, self.next_player_state, state))
+
+        # animation
+        step = keep & trigger
+        self.sword_duration = np.where(reset, 0, np.where(step, np.where(self.sword_visible == 1, (duration + 1) & 63, 0),
+                                                          duration))
+        counter = self.anim_counter
+        self.player_sprite = np.where(reset | (step & (counter == 20)), 3,
+                                      np.where(step & (counter == 7), 2, self.player_sprite))
+        self.anim_counter = np.where(reset, 0, np.where(step, np.where(counter == 20, 0, (counter + 1) & 63), counter))
+
+        # player FSM
+        new_complete = complete & ~released
+        new_stored = stored & ~released
+        next_state = self.next_player_state
+
+        idle = keep & (state == IDLE_STATE)
+        attack_pressed = (buffer & 16) != 0
+        may_attack = ~complete & (self.attack_enable if self.gate_attacks else True)
+        next_state = np.where(idle & attack_pressed & may_attack, ATTACK_STATE, next_state)
+        next_state = np.where(idle & ~attack_pressed & ((buffer & 15) != 0) & ~complete, MOVE_STATE, next_state)
+        sword_pos = np.where(idle, 0xFF, self.sword_pos)
+
+        moving = keep & (state == MOVE_STATE)
+        go = moving & ~complete
+        x, y = pos >> 4, pos & 15
+        up = go & ((buffer & 1) != 0) & (y > 1)
+        down = go & ((buffer & 2) != 0) & (y < 11)
+        left = go & ((buffer & 4) != 0) & (x > 0)
+        right = go & ((buffer & 8) != 0) & (x < 15)
+        new_pos = np.where(right, pos + 16, np.where(left, pos - 16, np.where(down, pos + 1, np.where(up, pos - 1, pos))))
+        new_direction = np.where(right, 1, np.where(left, 3, np.where(down, 2, np.where(up, 0, direction))))
+        self.player_orientation = np.where(right, 1, np.where(left, 3, self.player_orientation))
+        new_complete |= up | down | left | right
+        next_state = np.where(moving & complete, IDLE_STATE, next_state)
+
+        attacking = keep & (state == ATTACK_STATE)
+        aim = attacking & ~complete & attack_pressed
+        aimed = (buffer & 15) != 0
+        aimed_direction = np.where(buffer & 8, 1, np.where(buffer & 4, 3, np.where(buffer & 2, 2, 0)))
+        last_direction = np.where(aim, np.where(aimed, aimed_direction, direction), self.last_direction)
+        new_direction = np.where(aim & aimed, aimed_direction, new_direction)
+        new_stored |= aim
+        swing = attacking & stored
+        offset = np.choose(self.last_direction, (-1, 16, 1, -16))
+        sword_pos = np.where(swing, (pos + offset) & 0xFF, sword_pos)
+        self.sword_orientation = np.where(swing, self.last_direction, self.sword_orientation)
+        sword_visible = np.where(swing, 1, self.sword_visible)
+        new_complete |= swing
+        new_stored &= ~swing
+        done = attacking & (duration == ATTACK_DURATION)
+        self.sword_visible = np.where(done, 15, sword_visible)
+        next_state = np.where(done | (keep & (state == 3)), IDLE_STATE, next_state)
+
+        self.last_direction = last_direction
+        self.sword_pos = sword_pos
+        self.next_player_state = np.where(reset, IDLE_STATE, next_state)
+        self.player_pos = np.where(reset, PLAYER_HOME, new_pos & 0xFF)
+        self.player_orientation = np.where(reset, 1, self.player_orientation)
+        self.player_direction = np.where(reset, 1, new_direction)
+        self.action_complete = keep & new_complete
+        self.direction_stored = keep & new_stored
+
+    def _dragon(self, rst, trigger, vsync, timer, player_hit, sword_hit, sheep_hit):
+        keep = ~rst
+
+        # DragonTarget
+        behaviour = self.behaviour
+        sheep = self.sheep_pos
+        inverse_sheep = ((~sheep & 0xF0) | ((12 - (sheep & 15)) & 15))
+        self.behaviour = np.where(rst, CHASE_PLAYER, np.where(trigger, self.next_behaviour, behaviour))
+        next_behaviour = self.next_behaviour
+        next_behaviour = np.where((behaviour == CHASE_PLAYER) & (sword_hit | player_hit), timer & 1, next_behaviour)
+        next_behaviour = np.where((behaviour == CHASE_SHEEP) & (sword_hit | sheep_hit), RETREAT, next_behaviour)
+        next_behaviour = np.where((behaviour == RETREAT) & (self.dragon_pos == inverse_sheep), CHASE_PLAYER, next_behaviour)
+        self.next_behaviour = np.where(rst, CHASE_PLAYER, next_behaviour)
+        target = np.choose(np.minimum(behaviour, 3), (sheep, inverse_sheep, self.player_pos, self.target_pos))
+        target_pos = self.target_pos
+        self.target_pos = np.where(rst, 0, target)
+
+        # DragonHead: one step every 11 vsyncs
+        rise = keep & vsync & ~self.head_vsync
+        counter = self.movement_counter
+        move = rise & (counter >= 10)
+        x, y, dx, dy = self.dragon_x, self.dragon_y, self.dx, self.dy
+        pos = self.dragon_pos
+        head = (self.dragon_direction << 8) | pos
+        go = move & ((dx >= 1) | (dy >= 1))
+        across = dx >= dy
+        target_x, target_y = target_pos >> 4, target_pos & 15
+        self.dx = np.where(rst, 0, np.where(move, (target_x - x) & 15, dx))
+        self.dy = np.where(rst, 0, np.where(move, (target_y - y) & 15, dy))
+        sx = self.sx
+        sy = self.sy
+        self.sx = np.where(rst, 0, np.where(move, np.where(x < target_x, 1, 15), sx))
+        self.sy = np.where(rst, 0, np.where(move, np.where(y < target_y, 1, 15), sy))
+        self.dragon_x = np.where(rst, 15, np.where(go & across, (x + sx) & 15, x))
+        self.dragon_y = np.where(rst, 11, np.where(go & ~across, (y + sy) & 15, y))
+        pos_x, pos_y = pos >> 4, pos & 15
+        turn = np.where(x > pos_x, 1, np.where(x < pos_x, 3, np.where(y > pos_y, 2, np.where(y < pos_y, 0, self.dragon_direction))))
+        self.dragon_direction = np.where(go, turn, self.dragon_direction)
+        self.dragon_pos = np.where(rst, DRAGON_HOME, np.where(go, (x << 4) | y, pos))
+        self.movement_counter = np.where(rst | move, 0, counter + rise)
+        self.head_vsync = np.where(rst, self.head_vsync, vsync)
+
+        # DragonBody: the segments follow the head when it moves; eating a sheep grows the dragon and
+        # a sword hit shrinks it, at most once every HIT_COOLDOWN cycles
+        shift = keep & vsync & ~self.body_vsync & (counter == 10)
+        segments = self.segments
+        self.segments = np.where(rst[:, None], DRAGON_HOME,
+                                 np.where(shift[:, None], np.column_stack((head, segments[:, :-1])), segments))
+        self.body_vsync = np.where(rst, self.body_vsync, vsync)
+        in_play = (segments[:, 0] & 0xFF) != DRAGON_HOME
+        grow = keep & sheep_hit & ~self.heal_reg & in_play
+        shrink = keep & ~grow & sword_hit & ~self.hit_reg & in_play & (((timer - self.hit_time) & WORD) > HIT_COOLDOWN)
+        visible = self.visible
+        self.visible = np.where(rst, 7, np.where(grow, ((visible << 1) | 1) & 0x7F, np.where(shrink, visible >> 1, visible)))
+        self.hit_time = np.where(shrink, timer, self.hit_time)
+        self.heal_reg = sheep_hit
+        self.hit_reg = sword_hit
+        self.dragon_hits += shrink
+
+        # rng: a sheep respawns when the collision that ate it is cleared
+        respawn = keep & self.rng_trigger & ~sheep_hit
+        rand_buf = self.rand_buf
+        self.rand_buf = np.where(rst, 0, np.where(respawn, self.respawn, rand_buf))
+        self.rng_trigger = keep & sheep_hit
+        self.sheep_pos = np.where(rand_buf != 0, rand_buf, 0xC3)
+        self.sheep_eaten += respawn
@@ -0,0 +1,108 @@
+"""Golden frame digests: check every VGA frame of a replay against a few bytes per frame.
+
+A .frames file sits next to its .replay and holds a digest of each frame the top level shows while
+the replay plays (raw uo_out bytes, see tts.vga.frame_digest), DIGESTS_PER_LINE to a line, under the
+simulator that recorded them - as in a .replay, each simulator checks against its own:
+
+    # VGA frames of walk.replay
+    sim verilator
+    digest 0 9c1f0e7a5b3d2e11 4a0b7f3c8d2e6a90 ...
+
+FrameDigests.check() is ScanlineGrabber's on_frame callback: a frame's digest is looked up by its
+number, frames without one are recorded, and only the first frame that differs is kept in full (as
+frame_<n>.png and the raw frame_<n>.npy in `directory`) - so a run saves no frames unless something
+changed, and the golden data for a thousand frames is about 20 KB.
+"""
+
+import os
+
+import numpy as np
+
+from tts.replay import simulator
+from tts.vga import decode_rgb, write_png
+
+DIGESTS_PER_LINE = 8
+
+
+class FrameDigests:
+    """Expected digest of each frame on simulator `sim`, and the result of checking the frames against them."""
+
+    def __init__(self, digests=None, comments=(), directory="frames", sim="verilator"):
+        self.sim = sim
+        self.digests = dict(digests or {})  # frame -> digest on `sim`
+        self.other_digests = {}  # simulator -> {frame -> digest}, saved unchanged
+        self.comments = list(comments)
+        self.directory = directory
+        self.checked = 0
+        self.recorded = 0
+        self.mismatches = []  # frame numbers
+        self.saved = []  # paths of the first mismatching frame
+
+    @classmethod
+    def load(cls, path, sim=None, **kwargs):
+        """Read a .frames file with the digests of `sim` (default: the running simulator); a missing file
+        gives an empty store (with the `comments` given) that records every frame."""
+        store = cls(sim=sim or simulator(), **kwargs)
+        if not os.path.exists(path):
+            return store
+        store.comments = []
+        digests = None
+        with open(path) as f:
+            for number, line in enumerate(f, 1):
+                text = line.strip()
+                if not text:
+                    continue
+                if text.startswith("#"):
+                    store.comments.append(text[1:].strip())
+                    continue
+                fields = text.split()
+                if fields[0] == "sim" and len(fields) == 2:
+                    name = fields[1].lower()
+                    digests = store.digests if name == store.sim else store.other_digests.setdefault(name, {})
+                    continue
+                if fields[0] != "digest" or len(fields) < 2 or not fields[1].isdigit():
+                    raise ValueError(f"{path}:{number}: can't parse '{text}'")
+                if digests is None:
+                    raise ValueError(f"{path}:{number}: digests before a 'sim' line")
+                first = int(fields[1])
+                digests.update((first + i, digest) for i, digest in enumerate(fields[2:]))
+        return store
+
+    def save(self, path):
+        with open(path, "w") as f:
+            for comment in self.comments:
+                f.write(f"# {comment}\n")
+            for sim, digests in sorted({**self.other_digests, self.sim: self.digests}.items()):
+                if not digests:
+                    continue
+                f.write(f"sim {sim}\n")
+                frames = sorted(digests)
+                for i in range(0, len(frames), DIGESTS_PER_LINE):
+                    line = frames[i:i + DIGESTS_PER_LINE]
+                    f.write(f"digest {line[0]} {' '.join(digests[frame] for frame in line)}\n")
+
+    def check(self, number, digest, frame):
+        """Check (or record) the digest of frame `number`, keeping `frame` if it is the first mismatch."""
+        expected = self.digests.get(number)
+        if expected is None:
+            self.digests[number] = digest
+            self.recorded += 1
+        elif expected != digest:
+            if not self.mismatches:
+                self.saved = self._save_frame(number, frame)
+            self.mismatches.append(number)
+        else:
+            self.checked += 1
+
+    def _save_frame(self, number, frame):
+        os.makedirs(self.directory, exist_ok=True)
+        png = os.path.join(self.directory, f"frame_{number:04d}.png")
+        raw = os.path.join(self.directory, f"frame_{number:04d}.npy")
+        write_png(png, decode_rgb(frame))
+        np.save(raw, frame)
+        return [png, raw]
+
+    def report(self):
+        """One line on the frames that didn't match, for an assertion message."""
+        return (f"{len(self.mismatches)} frames differ from the golden digests, first frame {self.mismatches[0]} "
+                f"(saved as {', '.join(self.saved)})")
@@ -0,0 +1,108 @@
+"""NumPy reference renderer for the Picture Processing Unit (src/PPU.v).
+
+The screen is a 16 x 12 grid of 40 x 40 pixel tiles, each showing one 8 x 8 sprite upscaled 5x.
+Every entity slot holds an 18-bit word:
+
+    [17:14] sprite ID (4'hf = empty), [13:12] orientation, [11:8] tile x, [7:4] tile y,
+    [3] vertical flip, [2:0] number of tiles
+
+An entity with n tiles covers tile columns x-n+1 .. x (wrapping round the 16 columns); n = 0 hides
+it. When several entities cover a tile the PPU shows the one it loads last, in the order
+entity_8 .. entity_1, entity_9 .. entity_15.
+
+The model reproduces the RTL exactly, including its pipelining: the first two tiles of each
+scanline are fetched during the previous line, so they use that line's sprite row.
+"""
+
+import numpy as np
+
+from tts.sprites import EMPTY_ID, rom_table
+from tts.sync_model import H_DISPLAY, H_TOTAL, V_DISPLAY
+
+N_ENTITIES = 15
+UPSCALE = 5
+TILE_SIZE = 8 * UPSCALE  # pixels
+TILES_H = H_DISPLAY // TILE_SIZE
+TILES_V = V_DISPLAY // TILE_SIZE
+
+PIXEL_LATENCY = 2  # cycles from the sync counters reaching a pixel to its colour appearing
+
+# entity slots (0 based) in the order the PPU loads them; later slots win
+LOAD_ORDER = np.array([7, 6, 5, 4, 3, 2, 1, 0, 8, 9, 10, 11, 12, 13, 14])
+
+EMPTY_ENTITY = 0b1111_11_1111_1111_0001
+
+
+def entity(sprite_id, x, y, orientation=0, tiles=1, flip=0):
+    """Pack the fields of an entity slot into its 18-bit word."""
+    return (sprite_id << 14) | (orientation << 12) | (x << 8) | (y << 4) | (flip << 3) | tiles
+
+
+def decode_entities(words):
+    """Split entity words into a dict of field arrays."""
+    words = np.asarray(words, dtype=np.int64)
+    return {
+        "id": (words >> 14) & 0xF,
+        "orientation": (words >> 12) & 0x3,
+        "x": (words >> 8) & 0xF,
+        "y": (words >> 4) & 0xF,
+        "flip": (words >> 3) & 0x1,
+        "tiles": words & 0x7,
+    }
+
+
+def tile_map(words):
+    """Return the index (into `words`) of the entity shown in every tile, or -1 for an empty tile.
+
+    The result is a (TILES_V, TILES_H) array.
+    """
+    order = LOAD_ORDER[:len(words)]
+    fields = decode_entities(np.asarray(words)[order])
+    column = np.arange(TILES_H)
+    row = np.arange(TILES_V)
+
+    covers = (
+        (fields["id"] != EMPTY_ID)[:, None, None]
+        & (fields["y"][:, None, None] == row[None, :, None])
+        & (((fields["x"][:, None, None] - column[None, None, :]) % TILES_H) < fields["tiles"][:, None, None])
+    )
+
+    last = len(order) - 1 - np.argmax(covers[::-1], axis=0)  # last loaded entity covering each tile
+    return np.where(covers.any(axis=0), order[last], -1)
+
+
+def render(words, table=None):
+    """Render the 640 x 480 frame for 15 entity words.
+
+    Returns a uint8 array of the PPU `colour` output per pixel: 1 = background (white), 0 = sprite pixel.
+    """
+    if table is None:
+        table = rom_table()
+
+    tiles = tile_map(words)
+    fields = decode_entities(words)
+
+    # sprite row and tile row used for each (scanline, tile column)
+    line = np.arange(V_DISPLAY)[:, None]
+    source_line = np.where(np.arange(TILES_H)[None, :] < 2, np.maximum(line - 1, 0), line)
+    tile_row = source_line // TILE_SIZE
+    sprite_row = (source_line // UPSCALE) % 8
+
+    shown = tiles[tile_row, np.arange(TILES_H)[None, :]]
+    slot = np.maximum(shown, 0)
+    sprite_id = np.where(shown >= 0, fields["id"][slot], EMPTY_ID)
+    sprite_row = np.where(fields["flip"][slot] == 1, 7 - sprite_row, sprite_row)
+
+    data = table[sprite_id, fields["orientation"][slot], sprite_row]  # (V_DISPLAY, TILES_H)
+    bits = (data[:, :, None] >> np.arange(8, dtype=np.uint8)) & 1
+    return np.repeat(bits.reshape(V_DISPLAY, TILES_H * 8), UPSCALE, axis=1)
+
+
+def frame_from_trace(trace, start=0):
+    """Cut the visible frame out of a per-cycle `colour` trace.
+
+    `start` is the trace index of the cycle where the sync counters are at pixel (0, 0).
+    """
+    first = start + PIXEL_LATENCY
+    index = first + np.arange(V_DISPLAY)[:, None] * H_TOTAL + np.arange(H_DISPLAY)[None, :]
+    return np.asarray(trace)[index]
@@ -0,0 +1,160 @@
+"""Packed probe buses: many DUT signals read through one handle.
+
+Reading a handle is a round trip through the simulator interface, so a monitor that reads six
+signals every cycle pays six times what it needs to. Each wrapper instead includes a generated
+probes/<name>.vh (scripts/probes.py writes them from PROBES below) declaring
+
+    wire [WIDTH-1:0] probe = {..., pix_x, vsync, hsync};
+
+and Python reads `probe` once and splits it into the named fields:
+
+    probe = Probe(uut.probe, "sync")
+    state = probe.read()                          # {"hsync": 0, "vsync": 0, "pix_x": 12, ...}
+    fields = await probe.record(uut.clk, 1000)    # {"hsync": array, ...}, one entry per cycle
+
+Fields are packed from bit 0 up in the order they're declared. A field never straddles a 64-bit
+boundary (padding is added in front of it instead), so a recording is kept as one uint64 column
+per 64-bit word and each field is a shift and a mask of one column - however wide the probe is.
+
+X and Z bits (registers without a reset, under Icarus) read as 0, as tts.capture.resolve does, and
+the fields that had any are listed in `unresolved` for the caller to report.
+"""
+
+import numpy as np
+from cocotb.triggers import RisingEdge
+
+from tts.capture import resolve
+
+WORD_BITS = 64
+
+# probe name: ((field, Verilog expression in the wrapper, width), ...)
+PROBES = {
+    "sync": (
+        ("hsync", "hsync", 1),
+        ("vsync", "vsync", 1),
+        ("display_on", "video_active", 1),
+        ("frame_end", "frame_end", 1),
+        ("pix_x", "pix_x", 10),
+        ("pix_y", "pix_y", 10),
+    ),
+    # the game state tts.replay digests every frame (in its STATE_SIGNALS order)
+    "top": (
+        ("input_data", "dut.input_data", 10),
+        ("playerLives", "dut.playerLives", 2),
+        ("auto_rst_n", "dut.auto_rst_n", 1),
+        ("attack_enable", "dut.attack_enable", 1),
+        ("player_pos", "dut.player_pos", 8),
+        ("player_orientation", "dut.player_orientation", 2),
+        ("player_direction", "dut.player_direction", 2),
+        ("sword_pos", "dut.sword_pos", 8),
+        ("sword_orientation", "dut.sword_orientation", 2),
+        ("sheep_pos", "dut.sheep_pos", 8),
+        ("target_pos", "dut.target_pos", 8),
+        ("dragon_position", "dut.dragon_position", 8),
+        ("dragon_direction", "dut.dragon_direction", 2),
+        ("VisibleSegments", "dut.VisibleSegments", 7),
+        ("Dragon_1", "dut.Dragon_1", 10),
+        ("Dragon_2", "dut.Dragon_2", 10),
+        ("Dragon_3", "dut.Dragon_3", 10),
+        ("Dragon_4", "dut.Dragon_4", 10),
+        ("Dragon_5", "dut.Dragon_5", 10),
+        ("Dragon_6", "dut.Dragon_6", 10),
+        ("Dragon_7", "dut.Dragon_7", 10),
+    ),
+}
+
+
+class ProbeLayout:
+    """Bit positions of a probe's fields: `fields` maps a name to (offset, width)."""
+
+    def __init__(self, name, declaration):
+        self.name = name
+        self.declaration = declaration
+        self.fields = {}
+        offset = 0
+        for field, _, width in declaration:
+            if width > WORD_BITS:
+                raise ValueError(f"probe {name}: {field} is wider than {WORD_BITS} bits")
+            if offset // WORD_BITS != (offset + width - 1) // WORD_BITS:
+                offset = (offset // WORD_BITS + 1) * WORD_BITS
+            self.fields[field] = (offset, width)
+            offset += width
+        self.width = offset
+        self.words = (offset + WORD_BITS - 1) // WORD_BITS
+
+    def verilog(self):
+        """The probes/<name>.vh include declaring the packed `probe` wire."""
+        parts = []
+        position = 0
+        for field, expression, width in self.declaration:
+            offset = self.fields[field][0]
+            if offset > position:
+                parts.append(f"{offset - position}'b0")
+            parts.append(expression)
+            position = offset + width
+        lines = [
+            f"// Generated by scripts/probes.py from tts.probe.PROBES[\"{self.name}\"] - don't edit.",
+            "// Fields, from bit 0 up:",
+        ]
+        lines += [f"//   {field:<20} [{offset + width - 1}:{offset}]" for field, (offset, width) in self.fields.items()]
+        lines.append(f"wire [{self.width - 1}:0] probe = {{")
+        lines.append(",\n".join(f"  {part}" for part in reversed(parts)))
+        lines.append("};")
+        return "\n".join(lines) + "\n"
+
+    def unpack(self, value):
+        """Split one probe value into its fields."""
+        return {field: (value >> offset) & ((1 << width) - 1) for field, (offset, width) in self.fields.items()}
+
+    def fields_in(self, mask):
+        """The fields with a bit set in `mask`."""
+        return [field for field, value in self.unpack(mask).items() if value]
+
+    def unpack_words(self, words):
+        """Split a recording, one row of 64-bit words per sample, into one array per field."""
+        fields = {}
+        for field, (offset, width) in self.fields.items():
+            column = words[:, offset // WORD_BITS]
+            fields[field] = (column >> np.uint64(offset % WORD_BITS)) & np.uint64((1 << width) - 1)
+        return fields
+
+
+class Probe:
+    """Reads a wrapper's `probe` wire and decodes it with the layout of the same name."""
+
+    def __init__(self, handle, name):
+        self.handle = handle
+        self.layout = ProbeLayout(name, PROBES[name])
+        if len(handle) != self.layout.width:
+            raise ValueError(f"{handle._path} is {len(handle)} bits but PROBES[\"{name}\"] packs "
+                             f"{self.layout.width}: regenerate the include with scripts/probes.py")
+        self.unresolved = set()
+
+    def _resolve(self, value):
+        value, mask = resolve(value)
+        if mask:
+            self.unresolved.update(self.layout.fields_in(mask))
+        return value
+
+    def read(self):
+        """The current value of every field, from one read of the probe."""
+        return self.layout.unpack(self._resolve(self.handle.value))
+
+    async def record(self, clk, n_cycles, dtype=np.uint16):
+        """Sample the probe on each of the next `n_cycles` rising edges of `clk` (straight after the edge,
+        like tts.capture.record_signals) and return one `dtype` array per field."""
+        words = np.empty((n_cycles, self.layout.words), dtype=np.uint64)
+        handle = self.handle
+        edge = RisingEdge(clk)
+        if self.layout.words == 1:
+            column = words[:, 0]
+            for i in range(n_cycles):
+                await edge
+                column[i] = self._resolve(handle.value)
+        else:
+            mask = (1 << WORD_BITS) - 1
+            for i in range(n_cycles):
+                await edge
+                value = self._resolve(handle.value)
+                words[i] = [(value >> (WORD_BITS * word)) & mask for word in range(self.layout.words)]
+        return {field: column.astype(dtype) for field, column in self.layout.unpack_words(words).items()}
@@ -0,0 +1,179 @@
+"""Per-test profiling of where a cocotb run spends its time.
+
+Loaded ahead of the test module when a testbench is run with `make PROFILE=1` (see test/common.mk);
+importing it hooks cocotb's scheduler, so runs without PROFILE pay nothing. For every test it records
+
+  - the time spent in Python (cocotb's event loop and the coroutines it resumes) against the time
+    spent in the simulator, which is the rest of the test's wall time
+  - the number of simulator (GPI) callbacks into Python
+  - the number of awaits of each trigger type
+  - the coroutine lines that run the most Python, by the line each coroutine was resumed at
+
+and logs a table when the test ends and a summary of all of them at the end of the run. With
+PROFILE_FOLDED=<file> the Python time is also written as folded stacks ("test;coroutine;... us"),
+which flamegraph.pl, speedscope and inferno read directly.
+
+The hooks use cocotb 1.x's scheduler internals (`_react`, `_schedule`, `_resume_coro_upon`).
+"""
+
+import collections
+import os
+import time
+
+import cocotb
+from cocotb.log import SimLog
+from cocotb.regression import RegressionManager
+from cocotb.scheduler import Scheduler
+from cocotb.triggers import GPITrigger
+
+HOT_LINES = 8       # hottest lines logged per test
+TOP_AWAITS = 6      # trigger types logged per test
+COCOTB_DIR = os.path.dirname(os.path.abspath(cocotb.__file__))
+
+_log = SimLog("cocotb.profile")
+
+
+class TestProfile:
+    def __init__(self, name):
+        self.name = name
+        self.python_s = 0.0
+        self.wall_s = 0.0
+        self.sim_ns = 0.0
+        self.callbacks = 0
+        self.awaits = collections.Counter()
+        self.lines = collections.defaultdict(lambda: [0, 0.0])  # line -> [resumes, seconds]
+        self.stacks = collections.Counter()  # folded stack -> seconds
+
+    @property
+    def simulator_s(self):
+        return max(self.wall_s - self.python_s, 0.0)
+
+    def report(self):
+        share = 100 * self.python_s / self.wall_s if self.wall_s else 0.0
+        lines = [f"PROFILE {self.name}: {self.wall_s:.2f} s wall, {self.python_s:.2f} s Python ({share:.0f}%), "
+                 f"{self.simulator_s:.2f} s simulator, {self.callbacks} GPI callbacks"]
+        awaits = ", ".join(f"{kind} {count}" for kind, count in self.awaits.most_common(TOP_AWAITS))
+        lines.append(f"  awaits: {awaits or 'none'}")
+        lines.append(f"  {'PYTHON (s)':>10} {'RESUMES':>9}  LINE")
+        hottest = sorted(self.lines.items(), key=lambda item: item[1][1], reverse=True)[:HOT_LINES]
+        for line, (count, seconds) in hottest:
+            lines.append(f"  {seconds:>10.3f} {count:>9}  {line}")
+        return "\n".join(lines)
+
+
+_profiles = []
+_current = TestProfile("<setup>")
+
+
+def _frame_name(frame):
+    return f"{frame.f_code.co_name} ({os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno})"
+
+
+def _stack(task):
+    """Where a task is suspended, outermost first, leaving out cocotb's own frames."""
+    coro = getattr(task, "_coro", task)
+    frames = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is not None and not frame.f_code.co_filename.startswith(COCOTB_DIR):
+            frames.append(_frame_name(frame))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    if not frames:  # cocotb's own tasks, e.g. Clock.start
+        frames.append(getattr(getattr(task, "_coro", None), "__qualname__", type(task).__name__))
+    return frames
+
+
+def _hook(cls, name):
+    def install(wrapper):
+        original = getattr(cls, name)
+        setattr(cls, name, lambda self, *args, **kwargs: wrapper(original, self, *args, **kwargs))
+        return wrapper
+    return install
+
+
+@_hook(Scheduler, "_react")
+def _react(original, scheduler, trigger):
+    if scheduler._is_reacting:  # queued behind the trigger being handled
+        return original(scheduler, trigger)
+    _current.callbacks += isinstance(trigger, GPITrigger)
+    start = time.perf_counter()
+    try:
+        return original(scheduler, trigger)
+    finally:
+        _current.python_s += time.perf_counter() - start
+
+
+@_hook(Scheduler, "_resume_coro_upon")
+def _resume_coro_upon(original, scheduler, coro, trigger):
+    if coro is not scheduler._write_coro_inst:
+        _current.awaits[type(trigger).__name__] += 1
+    return original(scheduler, coro, trigger)
+
+
+@_hook(Scheduler, "_schedule")
+def _schedule(original, scheduler, coroutine, trigger=None):
+    if coroutine is scheduler._write_coro_inst:
+        stack = ["<cocotb writes>"]
+    else:
+        stack = _stack(coroutine)
+    start = time.perf_counter()
+    try:
+        return original(scheduler, coroutine, trigger)
+    finally:
+        elapsed = time.perf_counter() - start
+        line = _current.lines[stack[-1]]
+        line[0] += 1
+        line[1] += elapsed
+        _current.stacks[";".join([_current.name] + stack)] += elapsed
+
+
+@_hook(RegressionManager, "_start_test")
+def _start_test(original, manager):
+    global _current
+    _current = TestProfile(manager._test.__qualname__)
+    return original(manager)
+
+
+@_hook(RegressionManager, "_record_result")
+def _record_result(original, manager, test, outcome, wall_time_s, sim_time_ns):
+    if _current.name == test.__qualname__ and wall_time_s:
+        _current.wall_s = wall_time_s
+        _current.sim_ns = sim_time_ns
+        _profiles.append(_current)
+        _log.info(_current.report())
+    return original(manager, test, outcome, wall_time_s, sim_time_ns)
+
+
+@_hook(RegressionManager, "_tear_down")
+def _tear_down(original, manager):
+    if _profiles:
+        _log.info(summary(_profiles))
+        path = os.environ.get("PROFILE_FOLDED")
+        if path:
+            write_folded(path, _profiles)
+            _log.info(f"Wrote folded Python stacks to {path}")
+    return original(manager)
+
+
+def summary(profiles):
+    width = max(len(p.name) for p in profiles)
+    rule = "-" * (width + 66)
+    lines = ["PROFILE SUMMARY", rule,
+             f"{'TEST':<{width}} {'WALL (s)':>9} {'PYTHON (s)':>11} {'SIM (s)':>9} {'PYTHON %':>9} {'CALLBACKS':>11} {'AWAITS':>11}",
+             rule]
+    for p in profiles:
+        share = 100 * p.python_s / p.wall_s if p.wall_s else 0.0
+        lines.append(f"{p.name:<{width}} {p.wall_s:>9.2f} {p.python_s:>11.2f} {p.simulator_s:>9.2f} {share:>9.1f} "
+                     f"{p.callbacks:>11} {sum(p.awaits.values()):>11}")
+    lines.append(rule)
+    return "\n".join(lines)
+
+
+def write_folded(path, profiles):
+    """Write the Python time of every test as folded stacks, one 'frame;frame;... microseconds' per line."""
+    with open(path, "w") as f:
+        for p in profiles:
+            for stack, seconds in sorted(p.stacks.items()):
+                micros = round(seconds * 1e6)
+                if micros:
+                    f.write(f"{stack} {micros}\n")
@@ -0,0 +1,222 @@
+"""Input replays for long gameplay runs of the top level.
+
+A replay is a text file of button states held for a number of frames, plus a digest of the game
+state at the end of every frame:
+
+    # walk right, then swing the sword
+    pad nes
+    60 -
+    30 RIGHT
+    4 RIGHT+A
+    sim verilator
+    digest 0 1f3a9c02 77be1d40 ...
+
+Each input line holds the buttons ("-" for none) for that many frames. `digest <n>` lines list the
+digests of frames n, n+1, ... (DIGESTS_PER_LINE to a line) for the simulator named on the `sim` line
+above them. The simulators don't start from the same state - registers without a reset are 0 under
+Verilator and X, digested as 0, under Icarus - so a replay is loaded with the digests of the
+simulator it runs on and keeps the others as they are. Frames without a digest are recorded
+instead of checked, so running a replay without digests and saving it produces the checked version.
+
+ReplayDriver applies the buttons through the NES or SNES controller model at every `frame_end`
+and digests the game state registers there, so a long replay costs one Python wake-up per frame
+on top of the clock, and a mismatch stops the run at the first frame that diverged. Given a
+tts.game_model.GameModel it also steps the model with the same buttons and checks every state
+register against it, so a replay recorded on a broken design still fails - naming the registers.
+Registers still X or Z (no reset, under Icarus) are digested as 0 and named in a warning the first
+frame they are seen.
+"""
+
+import hashlib
+import time
+
+import cocotb
+from cocotb.triggers import RisingEdge
+
+from tts.controller import SNESPmod
+from tts.game_model import button_word
+from tts.probe import PROBES, Probe
+
+DIGESTS_PER_LINE = 16
+NO_BUTTONS = "-"
+
+# game state registers of tt_um_enjimneering_tts_top, digested at every frame_end - read through
+# top_tb's probe bus, so a digest costs one handle read
+STATE_SIGNALS = tuple(field for field, _, _ in PROBES["top"])
+
+
+class ReplayMismatch(AssertionError):
+    pass
+
+
+class ModelMismatch(AssertionError):
+    pass
+
+
+def simulator():
+    """Name of the running simulator as replays record it ("verilator", "icarus", ...)."""
+    return cocotb.SIM_NAME.split()[0].lower()
+
+
+class Replay:
+    """Buttons per frame and the expected state digest of each frame on simulator `sim`."""
+
+    def __init__(self, pad="nes", inputs=(), digests=None, comments=(), sim="verilator"):
+        self.pad = pad
+        self.inputs = list(inputs)  # [(frames, (button names))]
+        self.sim = sim
+        self.digests = dict(digests or {})  # frame -> digest on `sim`
+        self.other_digests = {}  # simulator -> {frame -> digest}, saved unchanged
+        self.comments = list(comments)
+
+    @classmethod
+    def load(cls, path, sim=None):
+        """Read a replay with the digests of `sim` (default: the running simulator)."""
+        replay = cls(sim=sim or simulator())
+        digests = None
+        with open(path) as f:
+            for number, line in enumerate(f, 1):
+                text = line.strip()
+                if not text:
+                    continue
+                if text.startswith("#"):
+                    if not replay.inputs:
+                        replay.comments.append(text[1:].strip())
+                    continue
+                fields = text.split()
+                if fields[0] == "pad":
+                    replay.pad = fields[1].lower()
+                elif fields[0] == "sim" and len(fields) == 2:
+                    name = fields[1].lower()
+                    digests = replay.digests if name == replay.sim else replay.other_digests.setdefault(name, {})
+                elif fields[0] == "digest":
+                    if digests is None:
+                        raise ValueError(f"{path}:{number}: digests before a 'sim' line")
+                    first = int(fields[1])
+                    digests.update((first + i, digest) for i, digest in enumerate(fields[2:]))
+                elif fields[0].isdigit() and len(fields) == 2:
+                    names = () if fields[1] == NO_BUTTONS else tuple(name.upper() for name in fields[1].split("+"))
+                    replay.inputs.append((int(fields[0]), names))
+                else:
+                    raise ValueError(f"{path}:{number}: can't parse '{text}'")
+        if replay.pad not in ("nes", "snes"):
+            raise ValueError(f"{path}: unknown pad '{replay.pad}'")
+        return replay
+
+    def save(self, path):
+        with open(path, "w") as f:
+            for comment in self.comments:
+                f.write(f"# {comment}\n")
+            f.write(f"pad {self.pad}\n")
+            for count, names in self.inputs:
+                f.write(f"{count} {'+'.join(names) or NO_BUTTONS}\n")
+            for sim, digests in sorted({**self.other_digests, self.sim: self.digests}.items()):
+                if not digests:
+                    continue
+                f.write(f"sim {sim}\n")
+                frames = sorted(digests)
+                for i in range(0, len(frames), DIGESTS_PER_LINE):
+                    line = frames[i:i + DIGESTS_PER_LINE]
+                    f.write(f"digest {line[0]} {' '.join(digests[frame] for frame in line)}\n")
+
+    @property
+    def frames(self):
+        return sum(count for count, _ in self.inputs)
+
+    def buttons(self):
+        """Yield the button names held during each frame, in order."""
+        for count, names in self.inputs:
+            for _ in range(count):
+                yield names
+
+
+def state_digest(values):
+    """Short digest of a tuple of register values."""
+    data = b"".join(value.to_bytes(8, "little") for value in values)
+    return hashlib.blake2s(data, digest_size=4).hexdigest()
+
+
+class ReplayDriver:
+    """Play a Replay into top_tb through a controller model, checking the state digests as it goes.
+
+    `pad` is a started NESController, or an SNESPmod (sent once per frame, right after the buttons
+    change). Start run() as soon as reset is released: the buttons for frame 0 are applied straight away.
+    `model` is an optional single-game GameModel (with the replay's pad) to scoreboard the frames against.
+    """
+
+    def __init__(self, dut, replay, pad, model=None):
+        self.dut = dut
+        self.replay = replay
+        self.pad = pad
+        self.model = model
+        self.probe = Probe(dut.probe, "top")
+        self.unresolved = set()
+        self.frames = 0
+        self.checked = 0
+        self.recorded = 0
+        self.wall_seconds = 0.0
+
+    def read_state(self, frame):
+        state = self.probe.read()
+        new = self.probe.unresolved - self.unresolved
+        if new:
+            self.dut._log.warning(f"frame {frame}: {', '.join(sorted(new))} had X/Z bits, digested as 0")
+            self.unresolved |= new
+        return tuple(state[name] for name in STATE_SIGNALS)
+
+    def _model_errors(self, names, state):
+        """Step the model through the frame just ended with the buttons held in it, and list the probed
+        registers it disagrees with."""
+        expected = dict(zip(STATE_SIGNALS, state))
+        self.model.step(button_word(*names), sheep=expected["sheep_pos"])
+        return self.model.mismatches(expected)
+
+    def _apply(self, names):
+        self.pad.release_all()
+        self.pad.press(*names)
+
+    async def _send(self):
+        if isinstance(self.pad, SNESPmod):
+            await self.pad.send()
+
+    async def run(self):
+        """Play the whole replay. Raises ReplayMismatch at the first frame whose digest differs, or
+        ModelMismatch at the first one the model disagrees with."""
+        buttons = self.replay.buttons()
+        names = next(buttons, ())
+        self._apply(names)
+        await self._send()
+        frame_end = RisingEdge(self.dut.frame_end)
+        start = time.perf_counter()
+
+        for frame in range(self.replay.frames):
+            await frame_end
+            state = self.read_state(frame)
+            digest = state_digest(state)
+            held, names = names, next(buttons, ())
+            self._apply(names)
+            self.frames += 1
+
+            errors = self._model_errors(held, state) if self.model is not None else []
+            if errors:
+                self.wall_seconds = time.perf_counter() - start
+                raise ModelMismatch(f"frame {frame} differs from the game model: {', '.join(errors)}")
+
+            expected = self.replay.digests.get(frame)
+            if expected is None:
+                self.replay.digests[frame] = digest
+                self.recorded += 1
+            elif expected != digest:
+                self.wall_seconds = time.perf_counter() - start
+                values = ", ".join(f"{name}={value:#x}" for name, value in zip(STATE_SIGNALS, state))
+                raise ReplayMismatch(f"frame {frame} diverged from the replay (digest {digest}, expected {expected}): {values}")
+            else:
+                self.checked += 1
+
+            await self._send()
+
+        self.wall_seconds = time.perf_counter() - start
+
+    @property
+    def frames_per_second(self):
+        return self.frames / self.wall_seconds if self.wall_seconds else 0.0
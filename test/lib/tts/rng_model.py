@@ -0,0 +1,97 @@
+"""Bit-exact model of rng (src/RNG.v), vectorised over seeds and states.
+
+seed_reg is loaded from `seed` on reset (1 if it is 0) and steps through mix() on every clock edge
+after that, with the `seed` input mixed back in. A falling edge of `trigger` latches the step's value,
+with its low nibble folded into 0-12, and on the next edge that latch is on rdm_num (0xC3 if it is 0)
+and ready rises:
+
+    edge 0: first edge with trigger low    rand_buf1 <= fold(mix(seed_reg, seed)), ready <= 0,
+                                           tri_pulse_reg <= 1
+    edge 1:                                rdm_num   <= draw(that value), ready <= 1
+
+For a fixed seed, mix() is a map of the 256 states onto themselves, so every run from reset runs into
+a cycle. sweep() follows all 256 states of all 256 seeds at once to find the tails, cycles and fixed
+points (scripts/rng_sweep.py reports them). In the top level the seed input changes from cycle to cycle
+(it comes from the timer, the player and the dragon), so a fixed seed is the worst case.
+"""
+
+import numpy as np
+
+SEEDS = 256
+STATES = 256
+RESET_SEED = 0x01  # seed_reg's reset value for a 0 seed
+EMPTY = 0xC3       # rdm_num while rand_buf1 is 0
+
+
+def mix(state, seed):
+    """seed_reg's next value (the `next` wire) for `state` and the `seed` input, for arrays of either."""
+    state, seed = (np.asarray(values, dtype=np.uint8) for values in (state, seed))
+    x1 = state ^ (state << 3)
+    x2 = x1 + seed
+    x3 = x2 ^ (x2 >> 2)
+    x4 = (x3 >> 1) | (x3 << 7)
+    return (x4 * np.uint8(0xB5)).astype(np.uint8)
+
+
+def reset_state(seed):
+    """seed_reg after reset with `seed` on the input."""
+    seed = np.asarray(seed, dtype=np.uint8)
+    return np.where(seed == 0, np.uint8(RESET_SEED), seed)
+
+
+def fold(values):
+    """rand_buf1 for a mixed byte: the low nibble's 13-15 wrap round to 1-3."""
+    values = np.asarray(values, dtype=np.int64)
+    low = values & 15
+    return (values & 0xF0) | np.where(low > 12, low - 12, low)
+
+
+def draw(values):
+    """rdm_num for a mixed byte, as latched by a trigger: fold() with 0 replaced by 0xC3."""
+    values = fold(values)
+    return np.where(values != 0, values, EMPTY)
+
+
+def transitions():
+    """The (seeds, states) table of mix(): transitions()[seed, state] is the state after `state`."""
+    return mix(np.arange(STATES)[None, :], np.arange(SEEDS)[:, None])
+
+
+def orbits(seeds, cycles):
+    """seed_reg at reset and after each of the `cycles` edges that follow, for each of `seeds` held
+    on the input, as a (seeds, 1 + cycles) array."""
+    seeds = np.asarray(seeds, dtype=np.uint8)
+    states = np.empty((len(seeds), 1 + cycles), dtype=np.uint8)
+    states[:, 0] = reset_state(seeds)
+    for cycle in range(cycles):
+        states[:, cycle + 1] = mix(states[:, cycle], seeds)
+    return states
+
+
+def sweep():
+    """Follow every state of every seed until it is on a cycle, and return a dict of (seeds, states)
+    arrays - `tail` (edges before the state reaches its cycle), `period` (the cycle's length) and
+    `cycle` (the cycle's smallest state, which names it) - plus the `table` from transitions()."""
+    table = transitions()
+    rows = np.arange(SEEDS)[:, None]
+    start = np.broadcast_to(np.arange(STATES, dtype=np.uint8), (SEEDS, STATES))
+
+    # after STATES edges every state is on its cycle; walk round it once more for its length and name
+    on_cycle = start
+    for _ in range(STATES):
+        on_cycle = table[rows, on_cycle]
+    state, period, name = on_cycle, np.zeros((SEEDS, STATES), dtype=np.int64), on_cycle
+    for step in range(1, STATES + 1):
+        state = table[rows, state]
+        period = np.where((period == 0) & (state == on_cycle), step, period)
+        name = np.minimum(name, state)
+
+    # the tail ends at the first state that is back again `period` edges later
+    ahead = start
+    for step in range(STATES):
+        ahead = np.where(period > step, table[rows, ahead], ahead)
+    state, tail = start, np.full((SEEDS, STATES), -1, dtype=np.int64)
+    for step in range(STATES + 1):
+        tail = np.where((tail < 0) & (state == ahead), step, tail)
+        state, ahead = table[rows, state], table[rows, ahead]
+    return {"table": table, "tail": tail, "period": period, "cycle": name.astype(np.int64)}
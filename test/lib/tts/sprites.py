@@ -0,0 +1,105 @@
+"""Sprite data decoded from src/SpriteROM.v.
+
+The ROM contents only exist as `romData[n] = 8'b...` lines in the Verilog, so they are parsed
+from the source rather than copied here, and the four read orientations are applied with the
+same bit indexing as the RTL.
+
+The result is an atlas of every sprite in every orientation, normalised so that 1 = pixel on
+(the ROM itself is active low). Each entry is one packed byte per sprite line, with bit i being
+screen column i from the left. The atlas is cached on disk keyed by the SHA-256 of SpriteROM.v,
+so models and preview tools only parse the Verilog again after the ROM changes.
+"""
+
+import hashlib
+import os
+import re
+
+import numpy as np
+
+ROM_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "src", "SpriteROM.v"))
+CACHE_DIR = os.environ.get("SPRITE_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "tinytapestation", "sprites"))
+
+N_SPRITES = 9
+N_ORIENTATIONS = 4  # UP, RIGHT, DOWN, LEFT
+EMPTY_ID = 0b1111
+
+UP, RIGHT, DOWN, LEFT = range(N_ORIENTATIONS)
+SPRITE_NAMES = (
+    "Heart", "Sword", "Gnome_Idle_1", "Gnome_Idle_2", "Dragon_Wing_Up",
+    "Dragon_Wing_Down", "Dragon_Head", "Sheep_Idle_1", "Sheep_Idle_2",
+)
+ORIENTATION_NAMES = ("UP", "RIGHT", "DOWN", "LEFT")
+
+_ROM_LINE = re.compile(r"romData\[(\d+)\]\s*=\s*8'b([01_]+)\s*;")
+_COMMENT = re.compile(r"/\*.*?\*/|//[^\n]*", re.DOTALL)
+_atlases = {}  # in-process cache, keyed like the disk cache
+
+
+def parse_rom(path=ROM_PATH):
+    """Return the ROM contents as a (N_SPRITES * 8,) uint8 array, one byte per sprite line."""
+    rom = np.full(N_SPRITES * 8, 0xFF, dtype=np.uint8)
+    with open(path) as f:
+        source = _COMMENT.sub(" ", f.read())  # commented out assignments aren't part of the ROM
+        for index, bits in _ROM_LINE.findall(source):
+            rom[int(index)] = int(bits.replace("_", ""), 2)  # later assignments win, as in the initial block
+    return rom
+
+
+def build_atlas(rom):
+    """Precompute the packed, active-high (N_SPRITES, 4, 8) atlas from raw ROM bytes."""
+    bits = (~rom.reshape(N_SPRITES, 8, 1) >> np.arange(8)) & 1  # [sprite, rom line, bit], 1 = on
+    flipped = bits[:, ::-1, ::-1]                                 # [sprite, ~line, 7 - bit]
+
+    oriented = np.empty((N_SPRITES, N_ORIENTATIONS, 8, 8), dtype=np.uint8)  # [sprite, orientation, line, data bit]
+    oriented[:, UP] = bits[:, :, ::-1]                       # data[i] = rom[line][7 - i]
+    oriented[:, RIGHT] = flipped.transpose(0, 2, 1)          # data[i] = rom[7 - i][~line]
+    oriented[:, DOWN] = bits[:, ::-1, :]                     # data    = rom[~line]
+    oriented[:, LEFT] = bits[:, :, ::-1].transpose(0, 2, 1)  # data[i] = rom[i][~line]
+
+    return (oriented << np.arange(8, dtype=np.uint8)).sum(axis=-1, dtype=np.uint8)
+
+
+def rom_hash(path=ROM_PATH):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def load_atlas(path=ROM_PATH):
+    """Return the sprite atlas for a SpriteROM.v, from the cache when the file hasn't changed."""
+    key = rom_hash(path)
+    if key in _atlases:
+        return _atlases[key]
+
+    cache_file = os.path.join(CACHE_DIR, f"atlas_{key}.npy")
+    try:
+        atlas = np.load(cache_file)
+    except (OSError, ValueError):
+        atlas = build_atlas(parse_rom(path))
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            tmp = f"{cache_file}.{os.getpid()}.tmp.npy"  # parallel jobs may store the same key at once
+            np.save(tmp, atlas)
+            os.replace(tmp, cache_file)
+        except OSError:
+            pass  # a read-only cache just means parsing every time
+
+    _atlases[key] = atlas
+    return atlas
+
+
+def unpack(atlas):
+    """Expand a packed atlas (any leading shape) to one uint8 per pixel, as [..., line, column]."""
+    return (atlas[..., None] >> np.arange(8, dtype=np.uint8)) & 1
+
+
+def rom_table(atlas=None):
+    """Return the SpriteROM `data` output for every (sprite_ID, orientation, line_index).
+
+    The result is a (16, 4, 8) uint8 array in the ROM's active-low encoding. Unused IDs (9-15)
+    read as 0xFF, i.e. all pixels off.
+    """
+    if atlas is None:
+        atlas = load_atlas()
+    table = np.full((16, N_ORIENTATIONS, 8), 0xFF, dtype=np.uint8)
+    table[:N_SPRITES] = ~atlas
+    return table
@@ -0,0 +1,61 @@
+"""NumPy golden model of the VGA sync generator (src/Sync.v).
+
+The model works on whole arrays of clock cycles at once: cycle 0 is the first rising edge
+after reset is released, when the counters are at (0, 0).
+"""
+
+import numpy as np
+
+# 640 x 480 timing constants (must match the parameters in Sync.v)
+H_DISPLAY = 640  # horizontal display width
+H_BACK = 48      # horizontal left border (back porch)
+H_FRONT = 16     # horizontal right border (front porch)
+H_SYNC = 96      # horizontal sync width
+
+V_DISPLAY = 480  # vertical display height
+V_TOP = 33       # vertical top border
+V_BOTTOM = 10    # vertical bottom border
+V_SYNC = 2       # vertical sync width (number of lines)
+
+H_SYNC_START = H_DISPLAY + H_FRONT
+H_SYNC_END = H_DISPLAY + H_FRONT + H_SYNC - 1
+H_MAX = H_DISPLAY + H_BACK + H_FRONT + H_SYNC - 1
+V_SYNC_START = V_DISPLAY + V_BOTTOM
+V_SYNC_END = V_DISPLAY + V_BOTTOM + V_SYNC - 1
+V_MAX = V_DISPLAY + V_TOP + V_BOTTOM + V_SYNC - 1
+
+H_TOTAL = H_MAX + 1                 # cycles per line
+V_TOTAL = V_MAX + 1                 # lines per frame
+FRAME_CYCLES = H_TOTAL * V_TOTAL    # cycles per frame (420,000)
+
+SIGNALS = ("hsync", "vsync", "display_on", "pix_x", "pix_y", "frame_end")
+
+
+def counters(n_cycles, start=0):
+    """Return the internal (hpos, vpos) counters for each cycle."""
+    cycle = np.arange(start, start + n_cycles, dtype=np.int64)
+    return cycle % H_TOTAL, (cycle // H_TOTAL) % V_TOTAL
+
+
+def sync_frame(n_cycles=FRAME_CYCLES, start=0):
+    """Return the expected value of every sync_generator output for `n_cycles` cycles.
+
+    The result maps each name in SIGNALS to an array with one entry per cycle.
+    """
+    hpos, vpos = counters(n_cycles, start)
+
+    # hsync and vsync are registered, so they follow the previous cycle's counters
+    # (cycle -1 wraps to (H_MAX, V_MAX), which is outside both pulses - matching the reset value).
+    prev_hpos, prev_vpos = counters(n_cycles, start - 1)
+
+    h_visible = hpos < H_DISPLAY
+    v_visible = vpos < V_DISPLAY
+
+    return {
+        "hsync": ((prev_hpos >= H_SYNC_START) & (prev_hpos <= H_SYNC_END)).astype(np.uint16),
+        "vsync": ((prev_vpos >= V_SYNC_START) & (prev_vpos <= V_SYNC_END)).astype(np.uint16),
+        "display_on": (h_visible & v_visible).astype(np.uint16),
+        "pix_x": np.where(h_visible, hpos, 0).astype(np.uint16),
+        "pix_y": np.where(v_visible, vpos, 0).astype(np.uint16),
+        "frame_end": ((hpos == H_DISPLAY) & (vpos == V_DISPLAY)).astype(np.uint16),
+    }
@@ -0,0 +1,230 @@
+"""Streaming reader for VCD (and FST) waveform dumps.
+
+Multi-frame dumps of the top level run to gigabytes, so nothing here loads a whole file: the dump
+is read in a single pass, only the requested signals are tracked, and frames or audio are
+produced as soon as they are complete. Memory use depends on the frame or chunk size, not the
+dump size. FST dumps are streamed through gtkwave's `fst2vcd`.
+
+Signals are named from the dump root ("top_tb.uo_out") or by any unique trailing part ("uo_out").
+Values are sampled on the rising edge of the clock and read as they were just before it, the same
+as a cocotb monitor reading after `await RisingEdge(clk)`.
+"""
+
+import contextlib
+import gzip
+import re
+import subprocess
+
+import numpy as np
+
+from tts.sync_model import H_DISPLAY, H_TOTAL, V_DISPLAY
+from tts.vga import FRAME_START, VSYNC_BIT
+
+AUDIO_CHUNK = 1 << 16  # sound samples per yielded chunk
+READ_BLOCK = 1 << 22   # bytes of dump scanned at a time
+
+
+@contextlib.contextmanager
+def open_dump(path):
+    """Open a .vcd, .vcd.gz or .fst dump as a binary stream."""
+    if path.endswith(".fst"):
+        proc = subprocess.Popen(["fst2vcd", "-f", path], stdout=subprocess.PIPE)
+        try:
+            yield proc.stdout
+        finally:
+            proc.stdout.close()
+            proc.kill()
+            proc.wait()
+    elif path.endswith(".gz"):
+        with gzip.open(path, "rb") as f:
+            yield f
+    else:
+        with open(path, "rb") as f:
+            yield f
+
+
+def read_header(dump):
+    """Read the declarations up to $enddefinitions, returning {full name: (id code, width)}."""
+    variables = {}
+    scope = []
+    tokens = []
+    for line in dump:
+        tokens.extend(line.decode("utf-8", errors="replace").split())
+        if "$end" not in tokens:
+            continue
+
+        kind = tokens[0]
+        if kind == "$scope":
+            scope.append(tokens[2])
+        elif kind == "$upscope":
+            scope.pop()
+        elif kind == "$var":
+            width, code, name = int(tokens[2]), tokens[3], tokens[4]
+            variables[".".join(scope + [name.split("[")[0]])] = (code, width)
+        elif kind == "$enddefinitions":
+            return variables
+        tokens = []
+    raise ValueError("dump ended before $enddefinitions")
+
+
+def resolve(variables, name):
+    """Find a signal by its full name, or the shallowest signal whose name ends with it."""
+    if name in variables:
+        return name
+    matches = sorted((full for full in variables if full.endswith("." + name)), key=lambda full: full.count("."))
+    if not matches:
+        raise KeyError(f"signal '{name}' is not in the dump")
+    if len(matches) > 1 and matches[0].count(".") == matches[1].count("."):
+        raise KeyError(f"signal '{name}' is ambiguous: {', '.join(matches)}")
+    return matches[0]
+
+
+def signals(path):
+    """{full name: width} of every signal in a dump (reads the header only)."""
+    with open_dump(path) as dump:
+        return {name: width for name, (code, width) in read_header(dump).items()}
+
+
+def _value(text):
+    """A VCD value as an int, or None if any bit is x or z."""
+    try:
+        return int(text, 2)
+    except ValueError:
+        return None
+
+
+def _change_pattern(codes):
+    """Match timestamps and the value changes of the given id codes only, one line at a time."""
+    ids = b"|".join(re.escape(code.encode()) for code in sorted(codes, key=len, reverse=True))
+    return re.compile(rb"^(?:#(\d+)|([01xzXZ])(" + ids + rb")|[bB]([01xzXZ]+) (" + ids + rb"))\r?$", re.MULTILINE)
+
+
+def changes(path, names):
+    """Yield (time, name, value) for every change of the named signals, in dump order.
+
+    Values are ints, or None while any bit is x/z (including while dumping is switched off).
+    The body is scanned in large blocks with a regex that only matches the tracked id codes, so
+    the lines of every other signal are skipped without ever reaching Python.
+    """
+    with open_dump(path) as dump:
+        variables = read_header(dump)
+        codes = {}
+        for name in names:
+            codes.setdefault(variables[resolve(variables, name)][0], []).append(name)
+        pattern = _change_pattern(codes)
+        names_of = {code.encode(): tracked for code, tracked in codes.items()}
+
+        time = 0
+        rest = b""
+        while True:
+            data = dump.read(READ_BLOCK)
+            block = rest + (data or b"\n")
+            end = block.rfind(b"\n") + 1  # only scan whole lines, the remainder waits for the next block
+            rest = block[end:]
+            for stamp, scalar, scalar_code, vector, vector_code in pattern.findall(block, 0, end):
+                if stamp:
+                    time = int(stamp)
+                elif scalar:
+                    for name in names_of[scalar_code]:
+                        yield time, name, _value(scalar)
+                else:
+                    for name in names_of[vector_code]:
+                        yield time, name, _value(vector)
+            if not data:
+                break
+
+
+def samples(path, clock, names):
+    """Yield (time, values) at every rising edge of `clock`, with the values of `names` just before the edge."""
+    names = list(names)
+    index = {name: i for i, name in enumerate(names)}
+    current = [None] * len(names)
+    clock_value = None
+    block_time = None
+    block = []  # changes in the current timestep, applied once the timestep is over
+    edge = False
+
+    for time, name, value in changes(path, [clock] + names):
+        if time != block_time:
+            if edge:
+                yield block_time, tuple(current)
+            for i, block_value in block:
+                current[i] = block_value
+            block_time, block, edge = time, [], False
+
+        if name == clock and clock_value is not None and clock_value == 0 and value == 1:
+            edge = True
+        if name == clock:
+            clock_value = value
+        if name in index:
+            block.append((index[name], value))
+
+    if edge:
+        yield block_time, tuple(current)
+
+
+def frames(path, clock="clk", bus="uo_out", first=0, count=None):
+    """Yield (number, frame) for the VGA frames in a dump, as raw (480, 640) uo_out bytes.
+
+    Frames are numbered from the first vsync in the dump and aligned the same way as
+    tts.vga.FrameGrabber. Frames before `first` are skipped without being stored, and a frame
+    that runs into a gap in the dump (dumping switched off) is dropped.
+    """
+    frame = np.zeros((V_DISPLAY, H_DISPLAY), dtype=np.uint8)
+    last_offset = (V_DISPLAY - 1) * H_TOTAL + H_DISPLAY - 1
+    number = -1
+    start = None  # sample index of pixel (0, 0) of the current frame
+    valid = False
+    prev_vsync = None
+    prev_time = None
+    period = None
+
+    for i, (time, (raw,)) in enumerate(samples(path, clock, [bus])):
+        if prev_time is not None:
+            if period is None:
+                period = time - prev_time
+            elif time - prev_time != period:
+                valid = False  # the dump skipped some cycles
+        prev_time = time
+
+        if raw is None:
+            prev_vsync = None
+            valid = False
+            continue
+
+        vsync = (raw >> VSYNC_BIT) & 1
+        if prev_vsync == 1 and vsync == 0:
+            number += 1
+            start = i + FRAME_START
+            valid = number >= first
+        prev_vsync = vsync
+
+        if not valid or i < start:
+            continue
+        offset = i - start
+        x = offset % H_TOTAL
+        if x < H_DISPLAY:
+            frame[offset // H_TOTAL, x] = raw
+        if offset == last_offset:
+            valid = False
+            yield number, frame.copy()
+            if count is not None and number + 1 >= first + count:
+                return
+
+
+def audio(path, clock="clk", signal="uio_out", bit=7, chunk=AUDIO_CHUNK):
+    """Yield the 1-bit sound output sampled every clock cycle, in uint8 chunks of up to `chunk` samples.
+
+    On the top level the APU drives uio_out[7]; for the APU unit testbench use signal="sound", bit=0.
+    Cycles where the signal is x/z read as 0.
+    """
+    buffer = np.zeros(chunk, dtype=np.uint8)
+    filled = 0
+    for _, (value,) in samples(path, clock, [signal]):
+        buffer[filled] = ((value or 0) >> bit) & 1
+        filled += 1
+        if filled == chunk:
+            yield buffer.copy()
+            filled = 0
+    if filled:
+        yield buffer[:filled].copy()
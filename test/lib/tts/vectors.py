@@ -0,0 +1,79 @@
+"""Vector mode: stream a batch of per-cycle input vectors through a wrapper at simulator speed.
+
+Driving inputs from Python costs a round trip per signal per cycle, which caps a unit test at tens
+of thousands of cycles a second. A wrapper with a vector mode instead reads a whole batch with
+$readmemh, clocks itself, applies one row of inputs every cycle and keeps the outputs after each
+rising edge, then writes them out with $writememh - so Python only packs the inputs and compares
+the outputs, a NumPy array at a time:
+
+    rows = [(reset, 1), (player, 2), (segments, 14)]       # (values, hex digits), first field in the top bits
+    results = await stream(uut, "collision", rows)         # one output word per row
+
+The wrapper side (see test/unit/collision/tb/collision_wtb.v) reads <name>_vectors.hex and writes
+<name>_results.hex in the simulator's directory when `vector_start` rises, with `vector_count` rows,
+and raises `vector_done` when the results are written. Both files are removed again afterwards.
+"""
+
+import os
+
+import numpy as np
+from cocotb.triggers import RisingEdge, Timer
+
+HEX_DIGITS = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+
+# ASCII -> nibble; anything else (x, z) reads as INVALID
+NIBBLES = np.full(256, 0xFF, dtype=np.uint8)
+NIBBLES[HEX_DIGITS] = np.arange(16)
+NIBBLES[np.frombuffer(b"ABCDEF", dtype=np.uint8)] = np.arange(10, 16)
+INVALID = -1
+
+
+def write_memh(path, columns):
+    """Write a $readmemh file with one row per entry of the `columns`, a list of (values, hex digits)."""
+    rows = len(columns[0][0])
+    width = sum(digits for _, digits in columns)
+    text = np.empty((rows, width + 1), dtype=np.uint8)
+    position = 0
+    for values, digits in columns:
+        values = np.asarray(values, dtype=np.uint64)
+        for digit in range(digits):
+            text[:, position] = HEX_DIGITS[(values >> np.uint64(4 * (digits - 1 - digit))) & np.uint64(15)]
+            position += 1
+    text[:, -1] = ord("\n")
+    with open(path, "wb") as f:
+        f.write(text.tobytes())
+
+
+def read_memh(path):
+    """Read a $writememh file (comment and address lines skipped) into an int64 array, with INVALID
+    for the words that hold x or z bits."""
+    with open(path, "rb") as f:
+        lines = [line.strip() for line in f.read().splitlines()]
+    lines = [line for line in lines if line and not line.startswith((b"//", b"@"))]
+    if not lines:
+        return np.zeros(0, dtype=np.int64)
+    digits = len(lines[0])
+    nibbles = NIBBLES[np.frombuffer(b"".join(lines), dtype=np.uint8)].reshape(-1, digits).astype(np.int64)
+    words = np.zeros(len(lines), dtype=np.int64)
+    for digit in range(digits):
+        words = (words << 4) | nibbles[:, digit]
+    return np.where(np.any(nibbles == 0xFF, axis=1), INVALID, words)
+
+
+async def stream(uut, name, columns):
+    """Play the rows of `columns` (see write_memh) through the wrapper's vector mode, one per clock
+    cycle, and return the wrapper's result word for each row."""
+    vectors, results = f"{name}_vectors.hex", f"{name}_results.hex"
+    write_memh(vectors, columns)
+    try:
+        uut.vector_count.value = len(columns[0][0])
+        uut.vector_start.value = 0
+        await Timer(1, units="ns")
+        uut.vector_start.value = 1
+        await RisingEdge(uut.vector_done)
+        uut.vector_start.value = 0
+        return read_memh(results)
+    finally:
+        for path in (vectors, results):
+            if os.path.exists(path):
+                os.remove(path)
@@ -0,0 +1,227 @@
+"""VGA frame grabber for the top level testbench.
+
+The grabber reads the packed `uo_out` bus once per visible pixel and skips the blanking
+intervals with a single Timer each, so Python only runs for the 640 x 480 pixels that end up
+on screen. Frames are stored raw (one uo_out byte per pixel) in a preallocated ring and decoded
+to RGB with lookup tables only when they are looked at or dumped.
+
+ScanlineGrabber reads whole lines instead, from a line buffer in top_tb that shifts in the visible
+pixels of each line, and digests every frame as it comes in - one wake-up per line, for the frame
+digests of tts.golden.
+
+uo_out = {hsync, B[0], G[0], R[0], vsync, B[1], G[1], R[1]}
+"""
+
+import hashlib
+import os
+import struct
+import zlib
+
+import cocotb
+import numpy as np
+from cocotb.triggers import FallingEdge, ReadOnly, RisingEdge, Timer
+
+from tts.capture import resolve
+from tts.sync_model import H_DISPLAY, H_TOTAL, V_DISPLAY, V_SYNC_END, V_TOTAL
+
+HSYNC_BIT = 7
+VSYNC_BIT = 3
+SYNC_MASK = (1 << HSYNC_BIT) | (1 << VSYNC_BIT)
+
+# cycles from the first sample after vsync falls (line V_SYNC_END + 1, column 0) to pixel (0, 0)
+FRAME_START = (V_TOTAL - V_SYNC_END - 1) * H_TOTAL
+LINE_BLANK = H_TOTAL - H_DISPLAY
+
+DIGEST_BYTES = 8  # frame digests, see ScanlineGrabber
+
+
+def _channel(raw, high_bit, low_bit):
+    return (((raw >> high_bit) & 1) << 1) | ((raw >> low_bit) & 1)
+
+
+# uo_out byte -> 8-bit RGB (each 2-bit channel scaled to 0, 85, 170, 255)
+_codes = np.arange(256)
+RGB_LUT = (np.stack([_channel(_codes, 0, 4), _channel(_codes, 1, 5), _channel(_codes, 2, 6)], axis=1) * 85).astype(np.uint8)
+
+
+def decode_rgb(raw):
+    """Decode raw uo_out bytes (any shape) to an array of RGB pixels with a trailing axis of 3."""
+    return RGB_LUT[raw]
+
+
+def write_png(path, rgb):
+    """Write an (height, width, 3) uint8 array as an 8-bit RGB PNG."""
+    height, width, _ = rgb.shape
+    rows = np.zeros((height, 1 + width * 3), dtype=np.uint8)  # filter byte 0 (none) per row
+    rows[:, 1:] = rgb.reshape(height, width * 3)
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(rows.tobytes(), 6)))
+        f.write(chunk(b"IEND", b""))
+
+
+class FrameGrabber:
+    """Capture the frames shown on the VGA output of top_tb.
+
+    `depth` is the number of most recent frames kept; older frames are overwritten.
+    `period_ns` must match the clock driving `clk`.
+    """
+
+    def __init__(self, clk, uo_out, vsync, period_ns, depth=8):
+        self.clk = clk
+        self.uo_out = uo_out
+        self.vsync = vsync
+        self.period_ns = period_ns
+        self.frames = np.zeros((depth, V_DISPLAY, H_DISPLAY), dtype=np.uint8)
+        self.numbers = np.full(depth, -1, dtype=np.int64)  # frame number held in each ring slot
+        self.captured = 0
+        self._line = bytearray(H_DISPLAY)
+        self._task = None
+
+    async def _skip(self, n_cycles):
+        """Jump to the rising edge `n_cycles` + 1 edges ahead without waking on the ones between."""
+        await Timer(n_cycles * self.period_ns + self.period_ns // 2, units="ns")
+        await RisingEdge(self.clk)
+
+    async def capture_frame(self):
+        """Wait for the next vsync and capture the frame that follows it into the ring."""
+        await FallingEdge(self.vsync)
+        await self._skip(FRAME_START)
+
+        slot = self.captured % len(self.frames)
+        frame = self.frames[slot]
+        line = self._line
+        uo_out = self.uo_out
+        edge = RisingEdge(self.clk)
+
+        for y in range(V_DISPLAY):
+            line[0] = int(uo_out.value)
+            for x in range(1, H_DISPLAY):
+                await edge
+                line[x] = int(uo_out.value)
+            frame[y] = np.frombuffer(line, dtype=np.uint8)
+            if y != V_DISPLAY - 1:
+                await self._skip(LINE_BLANK)
+
+        self.numbers[slot] = self.captured
+        self.captured += 1
+        return frame
+
+    async def capture(self, n_frames):
+        """Capture `n_frames` consecutive frames."""
+        for _ in range(n_frames):
+            await self.capture_frame()
+
+    def start(self):
+        """Keep capturing every frame in the background until stop() is called."""
+        async def run():
+            while True:
+                await self.capture_frame()
+        self._task = cocotb.start_soon(run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.kill()
+            self._task = None
+
+    def frame(self, index=-1):
+        """Raw uo_out bytes of a captured frame; negative indices count back from the latest."""
+        number = self.captured + index if index < 0 else index
+        slot = number % len(self.frames)
+        if number < 0 or self.numbers[slot] != number:
+            raise IndexError(f"frame {number} is not in the ring (captured {self.captured}, depth {len(self.frames)})")
+        return self.frames[slot]
+
+    def rgb(self, index=-1):
+        """A captured frame decoded to a (480, 640, 3) uint8 RGB image."""
+        return decode_rgb(self.frame(index))
+
+    def sync_errors(self, index=-1):
+        """Number of pixels with hsync or vsync asserted inside the visible area (0 when aligned)."""
+        return int(np.count_nonzero(self.frame(index) & SYNC_MASK))
+
+    def dump(self, directory, fmt="png"):
+        """Write every frame still in the ring to `directory` as frame_<n>.png or frame_<n>.npy."""
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for number in sorted(n for n in self.numbers if n >= 0):
+            path = os.path.join(directory, f"frame_{number:04d}.{fmt}")
+            if fmt == "png":
+                write_png(path, self.rgb(number))
+            elif fmt == "npy":
+                np.save(path, self.frame(number))
+            else:
+                raise ValueError(f"unknown frame format '{fmt}' (expected png or npy)")
+            paths.append(path)
+        return paths
+
+
+def frame_digest(frame):
+    """Digest of a frame of raw uo_out bytes, as ScanlineGrabber computes it a line at a time."""
+    digest = hashlib.blake2b(digest_size=DIGEST_BYTES)
+    for line in np.asarray(frame, dtype=np.uint8):
+        digest.update(line.tobytes())
+    return digest.hexdigest()
+
+
+class ScanlineGrabber:
+    """Capture and digest the frames shown on the VGA output of top_tb, a scanline at a time.
+
+    top_tb shifts the visible uo_out bytes of each line into `scanline` (pixel 0 in the low byte) and
+    pulses `line_ready` once the line is complete, with its row on `line_y`. Each complete frame is
+    passed to `on_frame(number, digest, frame)` as soon as its last line is in; frames cut short by a
+    reset aren't counted. `frame` is the grabber's own buffer, overwritten by the next frame.
+    X or Z bits on uo_out (from registers without a reset, under Icarus) are captured as 0, and the
+    lines that had any are counted in `unresolved_lines`, with a warning for the first.
+    """
+
+    def __init__(self, dut, on_frame):
+        self.log = dut._log
+        self.line_ready = dut.line_ready
+        self.scanline = dut.scanline
+        self.line_y = dut.line_y
+        self.on_frame = on_frame
+        self.frame = np.zeros((V_DISPLAY, H_DISPLAY), dtype=np.uint8)
+        self.captured = 0
+        self.unresolved_lines = 0
+        self._task = None
+
+    async def _run(self):
+        ready = RisingEdge(self.line_ready)
+        expected, digest = None, None
+        while True:
+            await ready
+            await ReadOnly()
+            y = int(self.line_y.value)
+            if y == 0:
+                expected, digest = 0, hashlib.blake2b(digest_size=DIGEST_BYTES)
+            if y != expected:
+                expected = None  # joined mid-frame, or the sync generator was reset
+                continue
+            value, mask = resolve(self.scanline.value)
+            if mask:
+                if not self.unresolved_lines:
+                    self.log.warning(f"frame {self.captured} line {y}: uo_out had X/Z bits, captured as 0")
+                self.unresolved_lines += 1
+            line = value.to_bytes(H_DISPLAY, "little")
+            self.frame[y] = np.frombuffer(line, dtype=np.uint8)
+            digest.update(line)
+            expected += 1
+            if expected == V_DISPLAY:
+                self.on_frame(self.captured, digest.hexdigest(), self.frame)
+                self.captured += 1
+                expected = None
+
+    def start(self):
+        """Capture every frame in the background until stop() is called."""
+        self._task = cocotb.start_soon(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.kill()
+            self._task = None
@@ -0,0 +1,88 @@
+"""Event-driven wait helpers.
+
+These replace `for _ in range(n): await RisingEdge(clk)` polling loops. Each helper races an
+`Edge` on the watched signal against a single `Timer` covering the whole window, so Python only
+wakes up when the signal actually changes (or the window runs out) and long windows, such as the
+multi-million cycle APU cooldowns, cost no more than short ones.
+
+Windows are given in clock cycles; `period_ns` is the clock period used to convert them to time.
+Time is kept in simulator steps, so the Timers are exact whatever the window. A signal with X or Z
+bits never matches a value, and the failure messages show it as it reads.
+"""
+
+from cocotb.triggers import Edge, First, Timer
+from cocotb.utils import get_sim_steps, get_sim_time
+
+
+def _steps(cycles, period_ns):
+    return get_sim_steps(cycles * period_ns, "ns")
+
+
+def _elapsed_cycles(start, period_ns):
+    return (get_sim_time() - start) // _steps(1, period_ns)
+
+
+def _value(signal):
+    """`signal` as an integer, or None while it has X or Z bits."""
+    value = signal.value
+    return int(value) if value.is_resolvable else None
+
+
+async def wait_for_value(signal, value, timeout_cycles, period_ns):
+    """Wait until `signal` equals `value`, for at most `timeout_cycles` clock cycles.
+
+    Returns the number of whole cycles waited (0 if it already had the value), or None on timeout.
+    """
+    start = get_sim_time()
+    deadline = start + _steps(timeout_cycles, period_ns)
+
+    while _value(signal) != value:
+        remaining = deadline - get_sim_time()
+        if remaining <= 0:
+            return None
+        fired = await First(Edge(signal), Timer(remaining, units="step"))
+        if isinstance(fired, Timer):
+            return None
+
+    return _elapsed_cycles(start, period_ns)
+
+
+async def wait_for_edge(signal, timeout_cycles, period_ns):
+    """Wait for the next change of `signal`, for at most `timeout_cycles` clock cycles.
+
+    Returns the number of whole cycles waited, or None on timeout.
+    """
+    start = get_sim_time()
+    fired = await First(Edge(signal), Timer(_steps(timeout_cycles, period_ns), units="step"))
+    if isinstance(fired, Timer):
+        return None
+    return _elapsed_cycles(start, period_ns)
+
+
+async def assert_quiet(signal, n_cycles, period_ns, message="signal"):
+    """Assert that `signal` is 0 now and stays 0 for the next `n_cycles` clock cycles."""
+    assert _value(signal) == 0, f"{message} was already {signal.value}"
+
+    changed_after = await wait_for_edge(signal, n_cycles, period_ns)
+    assert changed_after is None, f"{message} changed to {signal.value} after {changed_after} of {n_cycles} cycles"
+
+
+async def measure_pulse(signal, timeout_cycles, period_ns, holdoff_cycles=0):
+    """Measure how long `signal` is active, in clock cycles.
+
+    Waits up to `timeout_cycles` for the signal to go high, then returns (start, width): the cycles
+    waited before it went high and how long it stayed high. With `holdoff_cycles` the pulse only
+    ends once the signal has stayed low for that many cycles, so a PWM or square-wave burst is
+    measured as one pulse. Returns None if the pulse doesn't start, or doesn't end, in time.
+    """
+    started_after = await wait_for_value(signal, 1, timeout_cycles, period_ns)
+    if started_after is None:
+        return None
+
+    start = get_sim_time()
+    while True:
+        if await wait_for_value(signal, 0, timeout_cycles, period_ns) is None:
+            return None
+        width = _elapsed_cycles(start, period_ns)
+        if holdoff_cycles == 0 or await wait_for_edge(signal, holdoff_cycles, period_ns) is None:
+            return started_after, width
@@ -0,0 +1,25 @@
+# Fixed workload for scripts/benchmark.py (run with TEST_MODULE=bench_top): free-run the top level
+# for BENCH_CYCLES clock cycles with nothing but the clock driven from Python.
+
+import os
+
+import cocotb
+from cocotb.clock import Clock
+from cocotb.triggers import ClockCycles, Timer
+
+PERIOD_NS = int(os.environ.get("BENCH_PERIOD_NS", "10000"))
+CYCLES = int(os.environ.get("BENCH_CYCLES", "420000"))
+
+
+@cocotb.test()
+async def bench_frames(dut):
+    cocotb.start_soon(Clock(dut.clk, PERIOD_NS, units="ns").start())
+
+    dut.ena.value = 1
+    dut.ui_in.value = 0
+    dut.uio_in.value = 0
+    dut.rst_n.value = 0
+    await ClockCycles(dut.clk, 10)
+    dut.rst_n.value = 1
+
+    await Timer(CYCLES * PERIOD_NS, units="ns")
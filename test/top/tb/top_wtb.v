@@ -16,6 +16,41 @@ module top_tb ();
   wire [7:0] uio_out;
   wire [7:0] uio_oe;
 
+  // VGA sync outputs, broken out of uo_out for the frame grabber
+  wire hsync = uo_out[7];
+  wire vsync = uo_out[3];
+
+  // NES controller port, broken out of uio_out for the controller model
+  wire nes_latch = uio_out[2];
+  wire nes_clk   = uio_out[1];
+
+`ifndef GL_TEST
+  // end of frame pulse from the sync generator, for the input replay harness
+  wire frame_end = dut.frame_end;
+
+  // the game state the replay harness digests, packed into one vector (see test/lib/tts/probe.py)
+  `include "probes/top.vh"
+
+  // line buffer for tts.vga.ScanlineGrabber: the RGB outputs lag pix_x/pix_y by a cycle, so the visible
+  // uo_out bytes of a line are shifted in a cycle behind display_on, pixel 0 ending up in the low byte,
+  // and line_ready is high for the cycle after the last one
+  reg [8*640-1:0] scanline;
+  reg [9:0] line_y;
+  reg line_ready;
+  reg display_d;
+  reg [9:0] pix_x_d;
+  reg [9:0] pix_y_d;
+
+  always @(posedge clk) begin
+    display_d <= dut.video_active;
+    pix_x_d   <= dut.pix_x;
+    pix_y_d   <= dut.pix_y;
+    if (display_d) scanline <= {uo_out, scanline[8*640-1:8]};
+    line_ready <= display_d && pix_x_d == 639;
+    if (display_d && pix_x_d == 639) line_y <= pix_y_d;
+  end
+`endif
+
   wire VPWR = 1'b1;
   wire VGND = 1'b0;
 
@@ -34,11 +69,10 @@ module top_tb ();
       .rst_n  (rst_n)     // not reset
   );
 
-  // Dump the signals to a VCD file so it can be viewed in gtkwave.
-  initial begin
-    $dumpfile("tb.vcd");
-    $dumpvars(0, top_tb);
-    #1;
-  end
+  // Dump the signals so they can be viewed in surfer/GTKWAVE - only when asked for (make DUMP=1, see test/common.mk).
+  `define DUMP_NAME  "tb"
+  `define DUMP_SCOPE top_tb
+  `define DUMP_CLK   clk
+  `include "dump.vh"
 
 endmodule
@@ -12,20 +12,56 @@ module apu_tb ();
   reg [9:0] y;
   wire sound;
 
+  // with use_sync set, x/y come from the sync generator as in the top level, so the
+  // envelopes and mixer windows run in real time without driving x/y from python
+  reg use_sync = 1'b0;
+  wire [9:0] pix_x;
+  wire [9:0] pix_y;
+
+  sync_generator sync_gen (
+      .clk(clk),
+      .reset(reset),
+      .screen_hpos(pix_x),
+      .screen_vpos(pix_y)
+  );
+
+  // APU_trigger turns the collisions into the voice triggers, as in the top level (eat: saw, die: noise,
+  // hit: square). frame_end is driven by the test, so a "frame" is as long as the test needs it to be.
+  reg SheepDragonCollision = 1'b0;
+  reg SwordDragonCollision = 1'b0;
+  reg PlayerDragonCollision = 1'b0;
+  reg frame_end = 1'b0;
+  wire eat_sound;
+  wire die_sound;
+  wire hit_sound;
+
+  APU_trigger apu_trigger (
+      .clk(clk),
+      .reset(reset),
+      .frame_end(frame_end),
+      .test_mode(1'b0),
+      .SheepDragonCollision(SheepDragonCollision),
+      .SwordDragonCollision(SwordDragonCollision),
+      .PlayerDragonCollision(PlayerDragonCollision),
+      .eat_sound(eat_sound),
+      .die_sound(die_sound),
+      .hit_sound(hit_sound)
+  );
+
   AudioProcessingUnit audioprocessingunit (
       .clk(clk),
       .reset(reset),
-      .saw_trigger(saw_trigger),
-      .square_trigger(square_trigger),
-      .noise_trigger(noise_trigger),
-      .x(x),
-      .y(y),
+      .saw_trigger(saw_trigger | eat_sound),
+      .square_trigger(square_trigger | hit_sound),
+      .noise_trigger(noise_trigger | die_sound),
+      .x(use_sync ? pix_x : x),
+      .y(use_sync ? pix_y : y),
       .sound(sound)
   );
 
-  initial begin
-    $dumpfile("apu.vcd");
-    $dumpvars(0, apu_tb);
-    #1;
-  end
+  // Dump the signals so they can be viewed in surfer/GTKWAVE - only when asked for (make DUMP=1, see test/common.mk).
+  `define DUMP_NAME  "apu"
+  `define DUMP_SCOPE apu_tb
+  `define DUMP_CLK   clk
+  `include "dump.vh"
 endmodule
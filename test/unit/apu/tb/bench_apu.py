@@ -0,0 +1,26 @@
+# Fixed workload for scripts/benchmark.py (run with TEST_MODULE=bench_apu): hold the square voice on,
+# with x/y from the sync generator, for BENCH_CYCLES clock cycles.
+
+import os
+
+import cocotb
+from cocotb.clock import Clock
+from cocotb.triggers import ClockCycles, Timer
+
+PERIOD_NS = int(os.environ.get("BENCH_PERIOD_NS", "10"))
+CYCLES = int(os.environ.get("BENCH_CYCLES", "420000"))
+
+
+@cocotb.test()
+async def bench_sustain(dut):
+    cocotb.start_soon(Clock(dut.clk, PERIOD_NS, units="ns").start())
+
+    dut.use_sync.value = 1
+    dut.saw_trigger.value = 0
+    dut.square_trigger.value = 1
+    dut.noise_trigger.value = 0
+    dut.reset.value = 1
+    await ClockCycles(dut.clk, 5)
+    dut.reset.value = 0
+
+    await Timer(CYCLES * PERIOD_NS, units="ns")
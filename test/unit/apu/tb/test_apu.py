@@ -1,7 +1,28 @@
+import os
+
 import cocotb
-from random import randint
+import numpy as np
 from cocotb.clock import Clock
-from cocotb.triggers import ClockCycles, RisingEdge, Timer
+from cocotb.triggers import ClockCycles, RisingEdge
+
+from tts.audio import (
+    AUDIO_RATE, CLOCK_HZ, SoundRecorder, envelope_a, envelope_timer, fundamental, square_period, write_wav,
+)
+from tts.sync_model import FRAME_CYCLES, H_DISPLAY, H_TOTAL, V_DISPLAY
+from tts.waits import assert_quiet, wait_for_value
+
+CLK_PERIOD = 10  # ns
+
+# APU_trigger holds a voice from the rising edge of its collision until just after the next frame_end
+# (the player's for as long as the collision lasts) - there is no cooldown. With x/y from the sync
+# generator each voice is only audible on part of every line, and the noise voice not on every line,
+# so "sounding" and "quiet" are judged over this many cycles.
+LINES = 32 * H_TOTAL
+SQUARE_CYCLES = int(square_period())  # the square voice is off for half of each period
+FRAME_END_CYCLES = 4  # frame_end to the voices being cleared
+SUSTAIN_CYCLES = 100_000
+
+AUDIO_FRAMES = int(os.environ.get("APU_AUDIO_FRAMES", "6"))  # 0.1 s of audio
 
 
 async def reset(dut, reset_duration=5):
@@ -12,179 +33,170 @@ async def reset(dut, reset_duration=5):
     await RisingEdge(dut.clk)
 
 
-@cocotb.test()
-async def test_reset_behavior(dut):
-    """Check that after reset the sound output is 0"""
-    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
-    await reset(dut)
-    for _ in range(5):
-        await RisingEdge(dut.clk)
-        assert dut.sound.value == 0, "Sound should be 0 right after reset"
-
-
-@cocotb.test()
-async def test_no_collision_silence(dut):
-    """Ensure no sound is produced if no collisions occur"""
-    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
-    await reset(dut)
-
-    dut.SheepDragonCollision.value = 0
-    dut.SwordDragonCollision.value = 0
-    dut.PlayerDragonCollision.value = 0
+async def start(dut, use_sync=1):
+    """Start the clock, drive every input idle and reset. APU_trigger's outputs have no reset, so a
+    frame_end clears them before the test starts."""
+    cocotb.start_soon(Clock(dut.clk, CLK_PERIOD, units="ns").start())
+    dut.use_sync.value = use_sync
     dut.x.value = 0
     dut.y.value = 0
+    for name in ("saw_trigger", "square_trigger", "noise_trigger", "frame_end",
+                 "SheepDragonCollision", "SwordDragonCollision", "PlayerDragonCollision"):
+        getattr(dut, name).value = 0
+    await reset(dut)
+    await end_frame(dut)
 
-    silent = True
-    for _ in range(100):
-        await RisingEdge(dut.clk)
-        if dut.sound.value:
-            silent = False
-            break
-    assert silent, "Sound was produced without any collision!"
 
+async def end_frame(dut):
+    """Pulse frame_end and wait for APU_trigger to act on it."""
+    dut.frame_end.value = 1
+    await RisingEdge(dut.clk)
+    dut.frame_end.value = 0
+    await ClockCycles(dut.clk, FRAME_END_CYCLES)
 
-@cocotb.test()
-async def test_sheep_collision_duration(dut):
-    """Sheep collision should produce sustained sound"""
-    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
-    await reset(dut)
 
-    dut.SheepDragonCollision.value = 1
+async def collide(dut, name):
+    """Raise a collision for one cycle."""
+    getattr(dut, name).value = 1
     await RisingEdge(dut.clk)
-    dut.SheepDragonCollision.value = 0
+    getattr(dut, name).value = 0
+
 
-    active_cycles = 0
-    for _ in range(2000):
-        await RisingEdge(dut.clk)
-        if dut.sound.value:
-            active_cycles += 1
-    assert active_cycles > 50, f"Sheep sound too short ({active_cycles} cycles)"
+async def assert_sounding(dut, message, window=LINES):
+    assert await wait_for_value(dut.sound, 1, window, CLK_PERIOD) is not None, f"{message}: no sound in {window} cycles"
 
 
 @cocotb.test()
-async def test_sheep_collision_cooldown(dut):
-    """Verify cooldown prevents retrigger of sheep SFX before cooldown expires"""
-    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
-    await reset(dut)
+async def test_reset_behavior(dut):
+    """Check that after reset the sound output is 0"""
+    await start(dut, use_sync=0)
+    await assert_quiet(dut.sound, 5, CLK_PERIOD, "Sound right after reset")
 
-    # First trigger
-    dut.SheepDragonCollision.value = 1
-    await RisingEdge(dut.clk)
-    dut.SheepDragonCollision.value = 0
 
-    # Let sound run its course (dragon_duration ≈ 3000 cycles)
-    await ClockCycles(dut.clk, 4000)
+@cocotb.test()
+async def test_no_collision_silence(dut):
+    """Ensure no sound is produced if no collisions occur"""
+    await start(dut)
+    await assert_quiet(dut.sound, LINES, CLK_PERIOD, "Sound without any collision")
 
-    # Now still in cooldown (3,000,000 cycles!)
-    dut.SheepDragonCollision.value = 1
-    await RisingEdge(dut.clk)
-    dut.SheepDragonCollision.value = 0
 
-    # Watch a window of cycles to check if retrigger happens (should NOT)
-    retriggered = False
-    for _ in range(5000):  # small window << cooldown length
-        await RisingEdge(dut.clk)
-        if dut.sound.value:
-            retriggered = True
-            break
+@cocotb.test()
+async def test_sheep_collision_duration(dut):
+    """Sheep collision should produce sustained sound, until the frame ends"""
+    await start(dut)
+    await collide(dut, "SheepDragonCollision")
 
-    assert not retriggered, "Cooldown failed: Sheep sound retriggered before cooldown expired"
+    await assert_sounding(dut, "Sheep sound after the collision")
+    await ClockCycles(dut.clk, SUSTAIN_CYCLES)
+    await assert_sounding(dut, f"Sheep sound {SUSTAIN_CYCLES} cycles later, before the frame ended")
 
-@cocotb.test()
-async def test_sword_collision_cooldown(dut):
-    """Verify cooldown prevents retrigger of sword SFX before cooldown expires"""
-    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
-    await reset(dut)
+    await end_frame(dut)
+    await assert_quiet(dut.sound, LINES, CLK_PERIOD, "Sheep sound after the frame ended")
 
-    # First trigger
-    dut.SwordDragonCollision.value = 1
-    await RisingEdge(dut.clk)
-    dut.SwordDragonCollision.value = 0
 
-    # Let sound run its course (duration ≈ 1800 cycles)
-    await ClockCycles(dut.clk, 2500)
+async def check_held_collision(dut, name, voice):
+    """A collision held high across frame ends sounds for one frame only, and again once it is raised anew."""
+    await start(dut)
+    getattr(dut, name).value = 1
+    await assert_sounding(dut, f"{voice} sound in the frame the collision started")
 
-    # Still in cooldown
-    dut.SwordDragonCollision.value = 1
+    for frame in range(3):
+        await end_frame(dut)
+        await assert_quiet(dut.sound, LINES, CLK_PERIOD, f"{voice} sound {frame + 1} frames into a held collision")
+
+    getattr(dut, name).value = 0
     await RisingEdge(dut.clk)
-    dut.SwordDragonCollision.value = 0
+    await collide(dut, name)
+    await assert_sounding(dut, f"{voice} sound after a new collision")
+    await end_frame(dut)
+    await assert_quiet(dut.sound, LINES, CLK_PERIOD, f"{voice} sound after the frame ended")
 
-    retriggered = False
-    for _ in range(2000):  # shorter window, cooldown ≈ 1800
-        await RisingEdge(dut.clk)
-        if dut.sound.value:
-            retriggered = True
-            break
 
-    assert not retriggered, "Cooldown failed: Sword sound retriggered before cooldown expired"
+@cocotb.test()
+async def test_sheep_collision_retrigger(dut):
+    """A held sheep collision doesn't retrigger the saw voice at every frame"""
+    await check_held_collision(dut, "SheepDragonCollision", "Sheep")
 
 
 @cocotb.test()
-async def test_player_collision_cooldown(dut):
-    """Verify cooldown prevents retrigger of player SFX before cooldown expires"""
-    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
-    await reset(dut)
-
-    # First trigger
-    dut.PlayerDragonCollision.value = 1
-    await RisingEdge(dut.clk)
-    dut.PlayerDragonCollision.value = 0
+async def test_sword_collision_retrigger(dut):
+    """A held sword collision doesn't retrigger the noise voice at every frame"""
+    await check_held_collision(dut, "SwordDragonCollision", "Sword")
 
-    # Let sound run its course (duration ≈ 1500 cycles)
-    await ClockCycles(dut.clk, 2200)
 
-    # Still in cooldown
+@cocotb.test()
+async def test_player_collision_held(dut):
+    """The player's square voice lasts as long as the collision, and stops at the frame end after it"""
+    await start(dut)
     dut.PlayerDragonCollision.value = 1
-    await RisingEdge(dut.clk)
+    for frame in range(3):
+        await assert_sounding(dut, f"Player sound {frame} frames into a held collision", SQUARE_CYCLES)
+        await end_frame(dut)
+
     dut.PlayerDragonCollision.value = 0
+    await assert_sounding(dut, "Player sound in the frame the collision ended", SQUARE_CYCLES)
+    await end_frame(dut)
+    await assert_quiet(dut.sound, LINES, CLK_PERIOD, "Player sound after the frame ended")
 
-    retriggered = False
-    for _ in range(2000):  # cooldown ≈ 1500
-        await RisingEdge(dut.clk)
-        if dut.sound.value:
-            retriggered = True
-            break
 
-    assert not retriggered, "Cooldown failed: Player sound retriggered before cooldown expired"
-    
 @cocotb.test()
 async def test_all_triggers_overlap(dut):
     """Trigger all three collisions simultaneously and check sound output"""
-    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
-    await reset(dut)
+    await start(dut)
 
-    # Turn all collisions on at the same time
+    # Turn all collisions on at the same time, for one cycle
     dut.SheepDragonCollision.value = 1
     dut.SwordDragonCollision.value = 1
     dut.PlayerDragonCollision.value = 1
-    dut.x.value = 0
-    dut.y.value = 0
-
     await RisingEdge(dut.clk)
-    
-    # Turn off the collisions immediately after triggering
     dut.SheepDragonCollision.value = 0
     dut.SwordDragonCollision.value = 0
     dut.PlayerDragonCollision.value = 0
 
-    # Check that sound occurs for at least a few cycles
-    sound_detected = False
-    for _ in range(2000):
-        await RisingEdge(dut.clk)
-        if dut.sound.value:
-            sound_detected = True
-            dut._log.info(f"Sound active at cycle {_} when all triggers overlapped")
-            break
-
-    assert sound_detected, "Sound did not occur when all triggers were active"
-
-    # Continue clock until sound goes low
-    sound_off_detected = False
-    for _ in range(5000):
-        await RisingEdge(dut.clk)
-        if not dut.sound.value:
-            sound_off_detected = True
-            dut._log.info(f"Sound went low at cycle {_} after collisions ended")
-            break
-
-    assert sound_off_detected, "Sound did not turn off after collisions ended"
+    # Check that sound occurs
+    on_after = await wait_for_value(dut.sound, 1, LINES, CLK_PERIOD)
+    assert on_after is not None, "Sound did not occur when all triggers were active"
+    dut._log.info(f"Sound active at cycle {on_after} when all triggers overlapped")
+
+    # and that every voice stops at the end of the frame
+    await end_frame(dut)
+    await assert_quiet(dut.sound, LINES, CLK_PERIOD, "Sound after the frame ended")
+
+
+@cocotb.test()
+async def test_square_audio(dut):
+    """Record the square voice, demodulate it and check its pitch and envelope.
+
+    Set DUMP_AUDIO=1 to keep the demodulated audio in sim/apu_square.wav.
+    """
+    await start(dut)
+    dut.square_trigger.value = 1
+
+    recorder = SoundRecorder(dut.clk, dut.sound, CLK_PERIOD)
+    await recorder.record(AUDIO_FRAMES * FRAME_CYCLES)
+    pcm = recorder.pcm()
+    dut._log.info(f"Recorded {recorder.n_cycles} cycles as {recorder.count} runs")
+
+    if os.environ.get("DUMP_AUDIO"):
+        write_wav("apu_square.wav", pcm)
+
+    expected_hz = CLOCK_HZ / square_period()
+    measured_hz = fundamental(pcm, AUDIO_RATE, fmin=20, fmax=1000)
+    assert abs(measured_hz - expected_hz) < 0.02 * expected_hz, \
+        f"Square wave at {measured_hz:.1f} Hz, expected {expected_hz:.1f} Hz"
+
+    # the envelope only holds still on the visible lines; while the square wave is high each of them is on for
+    # x < envelopeA * 4, where x also reads 0 through the horizontal blanking
+    envelope = envelope_a(envelope_timer(np.arange(AUDIO_FRAMES)))
+    expected = np.where(envelope > 0, envelope * 4 + H_TOTAL - H_DISPLAY, 0) / H_TOTAL
+
+    margin = AUDIO_RATE // 1000  # let the low-pass filter settle
+    levels = []
+    for frame in range(AUDIO_FRAMES):
+        first = (frame * FRAME_CYCLES + H_TOTAL) * AUDIO_RATE // CLOCK_HZ + margin
+        last = (frame * FRAME_CYCLES + V_DISPLAY * H_TOTAL) * AUDIO_RATE // CLOCK_HZ - margin
+        levels.append(np.percentile(pcm[first:last], 90))
+    levels = np.array(levels)
+
+    assert np.allclose(levels, expected, rtol=0.05, atol=0.005), \
+        f"Square envelope {np.round(levels, 4)}, expected {np.round(expected, 4)}"
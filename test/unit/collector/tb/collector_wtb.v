@@ -25,9 +25,9 @@ module collector_tb();
   );
  
 
-  initial begin
-    $dumpfile("collector.vcd");
-    $dumpvars(0, collector_tb);
-    #1;
-  end
+  // Dump the signals so they can be viewed in surfer/GTKWAVE - only when asked for (make DUMP=1, see test/common.mk).
+  `define DUMP_NAME  "collector"
+  `define DUMP_SCOPE collector_tb
+  `define DUMP_CLK   clk
+  `include "dump.vh"
 endmodule
@@ -3,7 +3,9 @@ from random import randint
 from cocotb.clock import Clock
 from cocotb.triggers import ClockCycles, RisingEdge
 
-async def reset(uut, reset_duration=randint(1,10)):
+async def reset(uut, reset_duration=None):
+    if reset_duration is None:  # drawn per call, so it follows the test's seed
+        reset_duration = randint(1, 10)
     # assert reset
     uut._log.info("Resetting Module")
     uut.reset.value = 1
@@ -0,0 +1,90 @@
+`default_nettype none
+`timescale 1ns / 1ns
+
+module collision_tb();
+
+// CollisionDetector
+  reg clk = 0;
+  reg reset;
+  reg [7:0] playerPos;
+  reg [7:0] swordPos;
+  reg attack_enable;
+  reg [7:0] sheepPos;
+  reg [55:0] dragonSegmentPositions;
+  reg [6:0] activeDragonSegments;
+  wire playerDragonCollision;
+  wire swordDragonCollision;
+  wire sheepDragonCollision;
+
+  CollisionDetector u_CollisionDetector (
+    .clk(clk),
+    .reset(reset),
+    .playerPos(playerPos),
+    .swordPos(swordPos),
+    .attack_enable(attack_enable),
+    .sheepPos(sheepPos),
+    .dragonSegmentPositions(dragonSegmentPositions),
+    .activeDragonSegments(activeDragonSegments),
+    .playerDragonCollision(playerDragonCollision),
+    .swordDragonCollision(swordDragonCollision),
+    .sheepDragonCollision(sheepDragonCollision)
+  );
+
+  // Vector mode (test/lib/tts/vectors.py): on a rising vector_start the wrapper loads vector_count rows
+  // of collision_vectors.hex, clocks itself, applies a row on every falling edge and keeps the outputs
+  // after each rising edge, then writes them to collision_results.hex and raises vector_done.
+  //   row:    {3'b0, reset, 3'b0, attack_enable, playerPos, swordPos, sheepPos, dragonSegmentPositions, 1'b0, activeDragonSegments}
+  //   result: {1'b0, sheepDragonCollision, swordDragonCollision, playerDragonCollision}
+  localparam VECTOR_DEPTH = 1 << 20;
+  localparam CLK_HALF_NS = 20;
+
+  reg [95:0] vectors [0:VECTOR_DEPTH-1];
+  reg [3:0]  results [0:VECTOR_DEPTH-1];
+  reg [31:0] vector_count = 0;
+  reg        vector_start = 0;
+  reg        vector_done = 0;
+  reg        streaming = 0;
+  integer    vector_index = 0;
+
+  task apply_vector;
+    begin
+      reset                  = vectors[vector_index][92];
+      attack_enable          = vectors[vector_index][88];
+      playerPos              = vectors[vector_index][87:80];
+      swordPos               = vectors[vector_index][79:72];
+      sheepPos               = vectors[vector_index][71:64];
+      dragonSegmentPositions = vectors[vector_index][63:8];
+      activeDragonSegments   = vectors[vector_index][6:0];
+      vector_index = vector_index + 1;
+    end
+  endtask
+
+  always @(posedge vector_start) begin
+    $readmemh("collision_vectors.hex", vectors, 0, vector_count - 1);
+    vector_done = 0;
+    vector_index = 0;
+    apply_vector;
+    streaming = 1;
+  end
+
+  always #(CLK_HALF_NS) if (streaming) clk = ~clk;
+
+  always @(negedge clk) begin
+    if (streaming) begin
+      results[vector_index - 1] = {1'b0, sheepDragonCollision, swordDragonCollision, playerDragonCollision};
+      if (vector_index < vector_count) begin
+        apply_vector;
+      end else begin
+        streaming = 0;
+        $writememh("collision_results.hex", results, 0, vector_count - 1);
+        vector_done = 1;
+      end
+    end
+  end
+
+  // Dump the signals so they can be viewed in surfer/GTKWAVE - only when asked for (make DUMP=1, see test/common.mk).
+  `define DUMP_NAME  "collision"
+  `define DUMP_SCOPE collision_tb
+  `define DUMP_CLK   clk
+  `include "dump.vh"
+endmodule
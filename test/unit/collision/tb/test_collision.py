@@ -0,0 +1,93 @@
+import random
+import time
+
+import cocotb
+import numpy as np
+
+from tts.collision_model import CHECK_CYCLES, SEGMENTS, collision_outputs
+from tts.coverage import CoverGroup, Coverpoint, cross_bins
+from tts.vectors import stream
+
+VECTOR_DEPTH = 1 << 20  # rows the wrapper holds, see collision_wtb.v
+DENSE_CHECKS = 1 << 18
+
+
+def check_rows(player, sword, sheep, segments, active, attack_enable):
+    """Vector rows for a stream of checks: each check's inputs held for a reset cycle and the sweep."""
+    held = [np.repeat(np.asarray(values, dtype=np.uint64), CHECK_CYCLES) for values in
+            (attack_enable, player, sword, sheep, active)]
+    packed = sum(np.asarray(segments[:, i], dtype=np.uint64) << np.uint64(8 * i) for i in range(SEGMENTS))
+    reset = np.tile(np.arange(CHECK_CYCLES) == 0, len(player))
+    attack_enable, player, sword, sheep, active = held
+    return [(reset, 1), (attack_enable, 1), (player, 2), (sword, 2), (sheep, 2),
+            (np.repeat(packed, CHECK_CYCLES), 14), (active, 2)]
+
+
+async def run_checks(uut, player, sword, sheep, segments, active, attack_enable):
+    """Stream the checks back to back, after one that puts the unreset registers in a known state, and
+    compare every cycle with tts.collision_model. Returns the outputs at the end of each check."""
+    prime = (0, 0, 0, np.full(SEGMENTS, 0xFF), 0x7F, 0)
+    inputs = [np.concatenate(([first], values)) for first, values in zip(prime, (player, sword, sheep, segments, active, attack_enable))]
+    expected = collision_outputs(*inputs[:5])
+    rows = check_rows(*inputs)
+
+    start = time.perf_counter()
+    batch = VECTOR_DEPTH // CHECK_CYCLES * CHECK_CYCLES
+    results = np.concatenate([await stream(uut, "collision", [(values[i:i + batch], digits) for values, digits in rows])
+                              for i in range(0, len(rows[0][0]), batch)])
+    seconds = time.perf_counter() - start
+    uut._log.info(f"{len(player)} checks ({len(results)} cycles) in {seconds:.1f} s, "
+                  f"{len(results) / seconds:.0f} cycles/s")
+
+    actual = results.reshape(-1, CHECK_CYCLES)[1:]
+    expected = expected[1:]
+    bad = np.flatnonzero(np.any(actual != expected, axis=1))
+    if bad.size:
+        i = bad[0]
+        raise AssertionError(
+            f"{bad.size} of {len(player)} checks differ from the model, first check {i}: player {player[i]:#04x} "
+            f"sword {sword[i]:#04x} sheep {sheep[i]:#04x} segments {[hex(s) for s in segments[i]]} "
+            f"active {active[i]:07b}: outputs {actual[i].tolist()}, expected {expected[i].tolist()}")
+    return actual[:, -1]
+
+
+@cocotb.test()
+async def test_collision_pairs(uut):
+    """Every player, sword and sheep position against every dragon segment position."""
+    rng = np.random.default_rng(random.getrandbits(64))
+    position = np.repeat(np.arange(256), 256)
+    segment = np.tile(np.arange(256), 256)
+    outputs = await run_checks(uut, position, position, position, np.repeat(segment[:, None], SEGMENTS, axis=1),
+                               np.full(len(position), 0x7F), rng.integers(0, 2, len(position)))
+    # each check also compares against the segment the check before it left behind
+    assert np.array_equal((outputs & 1) != 0, (position == segment) | (position == np.roll(segment, 1)))
+
+
+@cocotb.test()
+async def test_collision_segments(uut):
+    """A dense random sample of the 7-segment space: positions drawn from a few per check, so collisions
+    are common, under every activeDragonSegments mask."""
+    rng = np.random.default_rng(random.getrandbits(64))
+    pool = rng.integers(0, 256, (DENSE_CHECKS, 3))
+    picks = rng.integers(0, 3, (DENSE_CHECKS, SEGMENTS + 3))
+    positions = pool[np.arange(DENSE_CHECKS)[:, None], picks]
+    positions = np.where(rng.random(positions.shape) < 0.125, rng.integers(0, 256, positions.shape), positions)
+    player, sword, sheep = positions[:, 0], positions[:, 1], positions[:, 2]
+    sword = np.where(rng.random(DENSE_CHECKS) < 0.125, 0, sword)
+    segments = positions[:, 3:]
+    active = rng.integers(0, 1 << SEGMENTS, DENSE_CHECKS)
+    outputs = await run_checks(uut, player, sword, sheep, segments, active, rng.integers(0, 2, DENSE_CHECKS))
+
+    cov = CoverGroup("collision")
+    cov.add(Coverpoint("active", {f"{mask:07b}": mask for mask in range(1 << SEGMENTS)}, width=SEGMENTS))
+    cov.add(Coverpoint("outputs", cross_bins("player", "sword", "sheep"), width=3))
+    on_segment = Coverpoint("player_segment", {f"{k} {state}": 2 * k + bit for k in range(SEGMENTS)
+                                               for bit, state in enumerate(("inactive", "active"))}, width=4)
+    cov.add(on_segment)
+    cov.sample_arrays({"active": active, "outputs": outputs})
+    for k in range(SEGMENTS):
+        on = player == segments[:, k]
+        on_segment.sample_array(2 * k + ((active[on] >> k) & 1))
+    uut._log.info(cov.report())
+    cov.save()
+    assert cov.covered, f"uncovered: {cov.uncovered()}"
@@ -20,10 +20,27 @@ module ppu_tb ();
   reg [17:0] entity_13;
   reg [17:0] entity_14;
   reg [17:0] entity_15;
-  reg [9:0] counter_V;
-  reg [9:0] counter_H;
+  wire [9:0] counter_V;
+  wire [9:0] counter_H;
   wire colour;
 
+  // the pixel counters come from the sync generator, as in the top level
+  wire hsync;
+  wire vsync;
+  wire video_active;
+  wire frame_end;
+
+  sync_generator sync_gen (
+      .clk(clk_in),
+      .reset(reset),
+      .hsync(hsync),
+      .vsync(vsync),
+      .display_on(video_active),
+      .screen_hpos(counter_H),
+      .screen_vpos(counter_V),
+      .frame_end(frame_end)
+  );
+
   PictureProcessingUnit u_PictureProcessingUnit (
       .clk_in(clk_in),
       .reset(reset),
@@ -64,9 +81,9 @@ module ppu_tb ();
   );
 
 
-  initial begin
-    $dumpfile("ppu.vcd");
-    $dumpvars(0, ppu_tb);
-    #1;
-  end
+  // Dump the signals so they can be viewed in surfer/GTKWAVE - only when asked for (make DUMP=1, see test/common.mk).
+  `define DUMP_NAME  "ppu"
+  `define DUMP_SCOPE ppu_tb
+  `define DUMP_CLK   clk_in
+  `include "dump.vh"
 endmodule
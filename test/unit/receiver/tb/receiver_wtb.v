@@ -51,9 +51,9 @@ module receiver_tb();
   );
  
  
-  initial begin
-    $dumpfile("receiver.vcd");
-    $dumpvars(0, receiver_tb);
-    #1;
-  end
+  // Dump the signals so they can be viewed in surfer/GTKWAVE - only when asked for (make DUMP=1, see test/common.mk).
+  `define DUMP_NAME  "receiver"
+  `define DUMP_SCOPE receiver_tb
+  `define DUMP_CLK   clk
+  `include "dump.vh"
 endmodule
@@ -3,25 +3,96 @@ from random import randint
 from cocotb.clock import Clock
 from cocotb.triggers import ClockCycles, RisingEdge
 
-async def reset(uut, reset_duration=randint(1,10)):
+from tts.controller import NES_BUTTONS, SNES_BIT_CYCLES, SNES_BUTTONS, SNES_MAX_PRESSED, NESController, SNESPmod
+
+CLK_PERIOD_NS = 40
+SNES_SETTLE_CYCLES = 8  # latch edge -> synchroniser -> data_reg -> decoder outputs
+
+async def reset(uut, reset_duration=None):
+    if reset_duration is None:  # drawn per call, so it follows the test's seed
+        reset_duration = randint(1, 10)
     # assert reset
     uut._log.info("Resetting Module")
-    uut.reset.value = 0
-    await ClockCycles(uut.clk, reset_duration)
     uut.reset.value = 1
+    await ClockCycles(uut.clk, reset_duration)
+    uut.reset.value = 0
 
-@cocotb.test()
-async def test_receiver_sanity(uut):
-    # start clock
-    clock = Clock(uut.clk, 40, units="ns")
+def button_outputs(uut):
+    return {
+        "A": uut.A_out, "B": uut.B_out, "SELECT": uut.select_out, "START": uut.start_out,
+        "UP": uut.up_out, "DOWN": uut.down_out, "LEFT": uut.left_out, "RIGHT": uut.right_out,
+        "X": uut.X_out, "Y": uut.Y_out, "L": uut.L_out, "R": uut.R_out,
+    }
+
+def check_buttons(uut, pressed, snes):
+    for name, output in button_outputs(uut).items():
+        assert int(output.value) == (name in pressed), \
+            f"{name}_out is {int(output.value)} with {sorted(pressed) or 'nothing'} pressed"
+    assert int(uut.controller_status.value) == snes
+
+async def start(uut):
+    clock = Clock(uut.clk, CLK_PERIOD_NS, units="ns")
     cocotb.start_soon(clock.start())
+
+    nes = NESController(uut.NES_Latch, uut.NES_Clk, uut.NES_Data)
+    snes = SNESPmod(uut.SNES_PMOD_Data, uut.SNES_PMOD_Clk, uut.SNES_PMOD_Latch, SNES_BIT_CYCLES * CLK_PERIOD_NS)
+    snes.idle()
+    nes.start()
+
     await ClockCycles(uut.clk, 1)
-   
-    # reset the module
     await reset(uut)
     await RisingEdge(uut.clk)
+    return nes, snes
+
+@cocotb.test()
+async def test_receiver_sanity(uut):
+    await start(uut)
 
     # continue test ...
     await ClockCycles(uut.clk, 100)
     uut._log.info("Test Complete!")
 
+@cocotb.test()
+async def test_nes_buttons(uut):
+    nes, snes = await start(uut)
+
+    words = [0, (1 << len(NES_BUTTONS)) - 1] + [1 << i for i in range(len(NES_BUTTONS))]
+    words += [randint(0, (1 << len(NES_BUTTONS)) - 1) for _ in range(8)]
+
+    for word in words:
+        nes.buttons = word
+        await nes.wait_reads(2)  # the first latch loads the word, the second ends its read
+        check_buttons(uut, nes.pressed(), snes=0)
+        assert nes.last_clocks == len(NES_BUTTONS) - 1, f"{nes.last_clocks} clock pulses in a read"
+
+    uut._log.info(f"{len(words)} NES button words read over {nes.reads} latch pulses")
+
+@cocotb.test()
+async def test_snes_buttons(uut):
+    nes, snes = await start(uut)
+    assert int(uut.controller_status.value) == 0  # nothing sent yet, so the Pmod is not present
+
+    pairs = [(i, randint(0, len(SNES_BUTTONS) - 1)) for i in range(len(SNES_BUTTONS))]
+    words = [0] + [(1 << i) | (1 << j) for i, j in pairs]
+
+    for word in words:
+        snes.buttons = word
+        await snes.send()
+        await ClockCycles(uut.clk, SNES_SETTLE_CYCLES)
+        check_buttons(uut, snes.pressed(), snes=1)
+
+    # the decoder holds its last output when more buttons are pressed than it trusts
+    held = snes.pressed()
+    snes.buttons = (1 << (SNES_MAX_PRESSED + 1)) - 1
+    await snes.send()
+    await ClockCycles(uut.clk, SNES_SETTLE_CYCLES)
+    check_buttons(uut, held, snes=1)
+
+    # unplugging the pad hands the buttons back to the NES port
+    nes.press("START", "LEFT")
+    snes.connected = False
+    await snes.send()
+    await nes.wait_reads(2)
+    check_buttons(uut, nes.pressed(), snes=0)
+
+    uut._log.info(f"{snes.sent} SNES words sent")
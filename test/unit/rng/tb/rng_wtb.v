@@ -0,0 +1,28 @@
+`default_nettype none
+`timescale 1ns / 1ns
+
+module rng_tb();
+
+// rng
+  reg clk;
+  reg reset;
+  reg trigger;
+  reg [7:0] seed;
+  wire ready;
+  wire [7:0] rdm_num;
+
+  rng u_rng (
+    .clk(clk),
+    .reset(reset),
+    .trigger(trigger),
+    .seed(seed),
+    .ready(ready),
+    .rdm_num(rdm_num)
+  );
+
+  // Dump the signals so they can be viewed in surfer/GTKWAVE - only when asked for (make DUMP=1, see test/common.mk).
+  `define DUMP_NAME  "rng"
+  `define DUMP_SCOPE rng_tb
+  `define DUMP_CLK   clk
+  `include "dump.vh"
+endmodule
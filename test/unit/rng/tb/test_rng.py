@@ -0,0 +1,99 @@
+import random
+
+import cocotb
+import numpy as np
+from cocotb.clock import Clock
+from cocotb.triggers import FallingEdge, RisingEdge
+
+from tts.capture import record_signals
+from tts.rng_model import SEEDS, draw, fold, orbits, reset_state, sweep
+
+SAMPLE_SEEDS = 16
+
+
+def sample_seeds(period):
+    """Seed 0, the seeds with the shortest and longest periods from reset, and a random few more."""
+    order = np.argsort(period, kind="stable")
+    seeds = {0, *order[:4].tolist(), order[-1]}
+    seeds.update(random.sample(range(SEEDS), SAMPLE_SEEDS - len(seeds)))
+    return sorted(int(seed) for seed in seeds)
+
+
+async def run_seed(uut, seed, cycles, trigger=None):
+    """Reset with `seed` on the input and hold it, driving `trigger` (one level per cycle, changed on the
+    falling edges), and return seed_reg, rdm_num and ready after the reset edge and each edge after it."""
+    uut.seed.value = seed
+    uut.trigger.value = 0
+    uut.reset.value = 1
+    await FallingEdge(uut.clk)
+    await RisingEdge(uut.clk)
+    await FallingEdge(uut.clk)
+    uut.reset.value = 0
+
+    async def drive():
+        for level in trigger:
+            uut.trigger.value = int(level)
+            await FallingEdge(uut.clk)
+
+    if trigger is not None:
+        cocotb.start_soon(drive())
+    signals = {"seed_reg": uut.u_rng.seed_reg, "rdm_num": uut.rdm_num, "ready": uut.ready}
+    return await record_signals(uut.clk, signals, cycles)
+
+
+def expected_draws(states, trigger):
+    """rdm_num and ready after each edge for the seed_reg `states` (from orbits()) and trigger levels."""
+    edges = len(trigger)
+    # a falling trigger (high for the edge before, low for this one) latches the step into rand_buf1
+    before = np.concatenate(([0, 0], trigger[:-1]))[:edges]
+    now = np.concatenate(([0], trigger))[:edges]
+    pulse = (before == 1) & (now == 0)
+    last = np.maximum.accumulate(np.where(pulse, np.arange(edges), -1))
+    buf = np.where(last >= 0, fold(states[np.maximum(last, 0)]), 0)
+    rdm_num = np.concatenate(([draw(0)], draw(buf[:-1])))
+    ready = np.zeros(edges, dtype=np.int64)
+    for edge in range(1, edges):
+        ready[edge] = 0 if pulse[edge] else 1 if pulse[edge - 1] else ready[edge - 1]
+    return rdm_num, ready
+
+
+@cocotb.test()
+async def test_rng_orbits(uut):
+    """seed_reg from reset for a sample of seeds, against the model, for a little over the period the
+    sweep found for each."""
+    clock = Clock(uut.clk, 40, units="ns")
+    cocotb.start_soon(clock.start())
+    result = sweep()
+    period = result["period"][np.arange(SEEDS), reset_state(np.arange(SEEDS)).astype(np.int64)]
+
+    for seed in sample_seeds(period):
+        cycles = max(64, period[seed] + 8)
+        actual = await run_seed(uut, seed, cycles)
+        expected = orbits([seed], cycles - 1)[0]
+        bad = np.flatnonzero(actual["seed_reg"] != expected)
+        assert not bad.size, (f"seed {seed:#04x}: seed_reg {actual['seed_reg'][bad[0]]:#04x} after edge {bad[0]}, "
+                              f"expected {expected[bad[0]]:#04x}")
+        returns = np.flatnonzero(expected[1:] == expected[0]) + 1
+        assert returns[0] == period[seed], f"seed {seed:#04x}: back at reset after {returns[0]} edges, not {period[seed]}"
+    uut._log.info("seed_reg matches the model for every sampled seed")
+
+
+@cocotb.test()
+async def test_rng_draws(uut):
+    """rdm_num and ready after random trigger pulses, against the model."""
+    clock = Clock(uut.clk, 40, units="ns")
+    cocotb.start_soon(clock.start())
+    rng = np.random.default_rng(random.getrandbits(64))
+
+    for seed in rng.choice(SEEDS, SAMPLE_SEEDS, replace=False):
+        cycles = 256
+        trigger = (rng.random(cycles) < 0.3).astype(np.int64)
+        trigger[-2:] = 0  # tri_pulse_reg has no reset, so leave it clear for the next seed
+        actual = await run_seed(uut, int(seed), cycles, trigger)
+        rdm_num, ready = expected_draws(orbits([seed], cycles - 1)[0], trigger)
+        for name, expected in (("rdm_num", rdm_num), ("ready", ready)):
+            # rdm_num after the reset edge is still the last seed's draw
+            bad = np.flatnonzero(actual[name][1:] != expected[1:]) + 1
+            assert not bad.size, (f"seed {seed:#04x}: {name} {actual[name][bad[0]]:#04x} after edge {bad[0]}, "
+                                  f"expected {expected[bad[0]]:#04x}")
+    uut._log.info("rdm_num and ready match the model for every sampled seed")
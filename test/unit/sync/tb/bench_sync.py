@@ -0,0 +1,22 @@
+# Fixed workload for scripts/benchmark.py (run with TEST_MODULE=bench_sync): run the sync generator
+# for BENCH_CYCLES clock cycles.
+
+import os
+
+import cocotb
+from cocotb.clock import Clock
+from cocotb.triggers import ClockCycles, Timer
+
+PERIOD_NS = int(os.environ.get("BENCH_PERIOD_NS", "40"))
+CYCLES = int(os.environ.get("BENCH_CYCLES", "420000"))
+
+
+@cocotb.test()
+async def bench_frame(dut):
+    cocotb.start_soon(Clock(dut.clk, PERIOD_NS, units="ns").start())
+
+    dut.rst_n.value = 0
+    await ClockCycles(dut.clk, 1)
+    dut.rst_n.value = 1
+
+    await Timer(CYCLES * PERIOD_NS, units="ns")
@@ -35,11 +35,13 @@ module sync_tb();
     // .input_enable(enable_input)
   );
 
-  // Dump the signals to a VCD file so it can be viewed in surfer/GTKWAVE.
-  initial begin
-    $dumpfile("sync.vcd");
-    $dumpvars(0, sync_tb);
-    #1;
-  end
+  // every output in one vector, so the tests read a single handle per sample (see test/lib/tts/probe.py)
+  `include "probes/sync.vh"
+
+  // Dump the signals so they can be viewed in surfer/GTKWAVE - only when asked for (make DUMP=1, see test/common.mk).
+  `define DUMP_NAME  "sync"
+  `define DUMP_SCOPE sync_tb
+  `define DUMP_CLK   clk
+  `include "dump.vh"
 
 endmodule
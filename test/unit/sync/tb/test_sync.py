@@ -5,7 +5,12 @@ import cocotb
 from cocotb.clock import Clock
 from cocotb.triggers import ClockCycles
 from cocotb.triggers import RisingEdge, FallingEdge, Timer, First
-from random import randint
+from random import choice, randint
+
+from tts.capture import compare_traces
+from tts.coverage import CoverGroup, Coverpoint, Transitions
+from tts.probe import Probe
+from tts.sync_model import FRAME_CYCLES, H_TOTAL, sync_frame
 
 # 640 X 480 Timing Constants
 
@@ -31,6 +36,27 @@ V_MAX = 524  # V_DISPLAY + V_TOP + V_BOTTOM + V_SYNC - 1
 V_SYNC_START = 490  # V_DISPLAY + V_BOTTOM
 V_SYNC_END = 491  # V_DISPLAY + V_BOTTOM + V_SYNC - 1
 
+CLK_PERIOD_NS = 40
+
+# Coverage bins of the random tests, which stop once every one has been checked
+HPOS_BINS = {
+    "display": range(0, H_DISPLAY),
+    "front porch": range(H_DISPLAY, H_SYNC_START),
+    "sync start": H_SYNC_START,
+    "sync": range(H_SYNC_START + 1, H_SYNC_END),
+    "sync end": H_SYNC_END,
+    "back porch": range(H_SYNC_END + 1, H_MAX + 1),
+}
+VPOS_BINS = {
+    "top": range(0, 160),
+    "middle": range(160, 320),
+    "bottom": range(320, V_DISPLAY),
+    "bottom border": range(V_DISPLAY, V_SYNC_START),
+    "vsync": range(V_SYNC_START, V_SYNC_END + 1),
+    "top border": range(V_SYNC_END + 1, V_MAX + 1),
+}
+MIN_CHECKS = 8  # random checks made even when the coverage database already has every bin
+
 clock_running = False
 
 
@@ -44,7 +70,7 @@ async def init_module(uut):
     start_clock(uut)
 
 
-def start_clock(uut, period_ns=40):
+def start_clock(uut, period_ns=CLK_PERIOD_NS):
     """Start the module clock."""
     global clock_running
     clock_running = True
@@ -62,16 +88,36 @@ async def reset(uut, reset_duration=1):
     uut.rst_n.value = 1
 
 
+def sync_probe(uut) -> Probe:
+    """Every output of the module, named as in the sync model, read through the wrapper's probe bus."""
+    return Probe(uut.probe, "sync")
+
+
 def get_state(uut) -> list[int]:
     """Capture the current state of the module and return it as a list."""
-    return [
-        int(uut.hsync.value),
-        int(uut.vsync.value),
-        int(uut.video_active.value),
-        uut.pix_x.value.to_unsigned(),
-        uut.pix_y.value.to_unsigned(),
-        int(uut.frame_end.value),
-    ]
+    state = sync_probe(uut).read()
+    return [state[name] for name in ("hsync", "vsync", "display_on", "pix_x", "pix_y", "frame_end")]
+
+
+async def jump_to(uut, cycle, target):
+    """From just after the rising edge of clock cycle `cycle` (cycle 0 being the first one after reset),
+    run to just after the edge of cycle `target` with a single Timer, and return `target`."""
+    if target > cycle + 1:
+        await Timer((target - cycle - 1) * CLK_PERIOD_NS + CLK_PERIOD_NS // 2, units="ns")
+    await RisingEdge(uut.clk)
+    return target
+
+
+def next_cycle_in(cycle, point, cycles_per_value, period, spread=0):
+    """The nearest cycle after `cycle` at which a counter that advances every `cycles_per_value` cycles and wraps
+    every `period` cycles has a random value from one of the point's uncovered bins (any bin once they are all
+    covered), up to `spread` cycles into that value."""
+    targets = []
+    for name in point.uncovered() or point.bins:
+        position = choice(point.values_of(name)) * cycles_per_value + randint(0, spread)
+        target = (cycle // period) * period + position
+        targets.append(target if target > cycle else target + period)
+    return min(targets)
 
 
 # Reset Tests
@@ -106,6 +152,37 @@ async def test_reset(uut):
     uut._log.info("Reset Condition Test Passed!")
 
 
+# Whole-Frame Tests
+
+
+@cocotb.test()
+async def test_full_frame(uut):
+    """
+    Record every output on every cycle of a frame (plus the first line of the next one)
+    and compare the whole capture against the NumPy golden model in one pass.
+    """
+    uut._log.info("Starting Full Frame Test")
+
+    await init_module(uut)
+    await ClockCycles(uut.clk, 1)
+    await reset(uut, 1)
+
+    n_cycles = FRAME_CYCLES + H_TOTAL
+    captured = await sync_probe(uut).record(uut.clk, n_cycles)
+    mismatches = compare_traces(captured, sync_frame(n_cycles))
+
+    cov = CoverGroup("sync_frame")
+    for name in ("hsync", "vsync", "display_on", "frame_end"):
+        cov.add(Transitions(name))
+    cov.sample_arrays(captured)
+    uut._log.info(cov.report())
+    cov.save()
+
+    assert not mismatches, "Sync generator diverged from the model:\n" + "\n".join(mismatches)
+
+    uut._log.info("Full Frame Test Passed!")
+
+
 # @cocotb.test()
 # async def test_reset_random(uut):
 
@@ -190,8 +267,9 @@ async def test_reset(uut):
 @cocotb.test()
 async def test_vertical_counter_random(uut):
     """
-    Constrained random test for the vertical pixel counter (pix_y).
-    Randomly waits for a number of clock cycles and verifies pix_y behavior.
+    Coverage-driven random test for the vertical pixel counter (pix_y).
+    Jumps to a random point of a line in a region of the frame that hasn't been checked yet,
+    compares pix_y there with the sync model, and stops once every region has been checked.
     """
     uut._log.info("Starting Constrained Random Pixel Y Counter Test")
 
@@ -199,28 +277,30 @@ async def test_vertical_counter_random(uut):
 
     # Reset the module
     await reset(uut)
+    await RisingEdge(uut.clk)
     uut._log.info("Module Reset Complete")
 
-    # Generate a random number of clock cycles to wait
-    random_cycles = randint(1, H_MAX * 50)  # Constrain to 50 vertical line periods
-    uut._log.info(f"Waiting for {random_cycles} clock cycles before checking pix_y")
-
-    # Wait for the random number of clock cycles
-    await ClockCycles(uut.clk, random_cycles)
+    cov = CoverGroup("sync_vertical")
+    vpos = cov.add(Coverpoint("vpos", VPOS_BINS, width=10), uut.sync_gen.vpos)
 
-    # Capture the current pix_x value
-    pix_y_value = uut.pix_y.value.to_unsigned()
-    uut._log.info(f"Pixel X value after {random_cycles} cycles: {pix_y_value}")
+    cycle = checks = 0
+    while not cov.covered or checks < MIN_CHECKS:
+        target = next_cycle_in(cycle, vpos, H_TOTAL, FRAME_CYCLES, spread=H_MAX)
+        cycle = await jump_to(uut, cycle, target)
+        cov.sample()
+        checks += 1
 
-    # Calculate the expected pix_x value (sticks to the end)
-    expected_pix_y = min((random_cycles // (H_MAX + 1)) % (V_MAX + 1), V_DISPLAY - 1)
+        pix_y_value = int(uut.pix_y.value)
+        expected_pix_y = int(sync_frame(1, start=cycle)["pix_y"][0])
+        assert (
+            pix_y_value == expected_pix_y
+        ), f"Pixel Y counter incorrect at cycle {cycle}: expected {expected_pix_y}, got {pix_y_value}"
 
-    # Assert that pix_x matches the expected value
-    assert (
-        pix_y_value == expected_pix_y
-    ), f"Pixel X counter incorrect: expected {expected_pix_y}, got {pix_y_value}"
+    uut._log.info(f"{checks} checks over {cycle} cycles")
+    uut._log.info(cov.report())
+    cov.save()
 
-    uut._log.info("Constrained Random Pixel X Counter Test Passed!")
+    uut._log.info("Constrained Random Pixel Y Counter Test Passed!")
 
 
 # H-sync Tests
@@ -293,8 +373,9 @@ async def test_vertical_counter_random(uut):
 @cocotb.test()
 async def test_hsync_random(uut):
     """
-    Constrained random test for hsync signal timing.
-    Randomly waits for a number of clock cycles and checks hsync behavior.
+    Coverage-driven random test for hsync signal timing.
+    Jumps to a random point in a part of the line that hasn't been checked yet, compares hsync
+    there with the sync model, and stops once every part (including both ends of the pulse) has been checked.
     """
     uut._log.info("Starting Constrained Random HSync Test")
 
@@ -302,32 +383,30 @@ async def test_hsync_random(uut):
 
     # Reset the module
     await reset(uut)
+    await RisingEdge(uut.clk)
     uut._log.info("Module Reset Complete")
 
-    # Generate a random number of clock cycles to wait (constrained range)
-    random_cycles = randint(1, H_MAX * 2)  # Constrain to 2 horizontal line periods
-    uut._log.info(f"Waiting for {random_cycles} clock cycles before checking hsync")
-
-    # Wait for the random number of clock cycles
-    await ClockCycles(uut.clk, random_cycles)
+    cov = CoverGroup("sync_hsync")
+    hpos_point = cov.add(Coverpoint("hpos", HPOS_BINS, width=10), uut.sync_gen.hpos)
 
-    # Capture the hsync signal value
-    hsync_value = uut.hsync.value
-    hpos = uut.sync_gen.hpos.value.to_unsigned()  # Current horizontal position
-    uut._log.info(
-        f"HSync value after {random_cycles} cycles: {hsync_value}, hpos: {hpos}"
-    )
+    cycle = checks = 0
+    while not cov.covered or checks < MIN_CHECKS:
+        target = next_cycle_in(cycle, hpos_point, 1, H_TOTAL)
+        cycle = await jump_to(uut, cycle, target)
+        cov.sample()
+        checks += 1
 
-    # Assert that hsync behaves as expected
-    # Check if hsync is high during the sync pulse
-    if H_SYNC_START <= hpos <= H_SYNC_END:
+        # hsync is registered, so it follows the previous cycle's hpos - the model accounts for that
+        hsync_value = int(uut.hsync.value)
+        hpos = int(uut.sync_gen.hpos.value)
+        expected = int(sync_frame(1, start=cycle)["hsync"][0])
         assert (
-            hsync_value == 1
-        ), f"HSync should be high during sync pulse at hpos={hpos}, but got {hsync_value}"
-    else:
-        assert (
-            hsync_value == 0
-        ), f"HSync should be low outside sync pulse at hpos={hpos}, but got {hsync_value}"
+            hsync_value == expected
+        ), f"HSync should be {expected} at hpos={hpos} (cycle {cycle}), but got {hsync_value}"
+
+    uut._log.info(f"{checks} checks over {cycle} cycles")
+    uut._log.info(cov.report())
+    cov.save()
 
     uut._log.info("Constrained Random HSync Test Passed!")
 